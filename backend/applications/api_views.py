@@ -1,11 +1,18 @@
+from dataclasses import asdict
+
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
+from rest_framework.parsers import MultiPartParser
 from rest_framework.response import Response
 from django_filters import rest_framework as filters
-from django.db.models import Count
+from django.http import StreamingHttpResponse
 from datetime import date, timedelta
 
+from .bulk import CONTENT_TYPES, decode_lines, export_rows, import_rows, read_rows
 from .models import JobApplication, ApplicationNote
+from .pagination import ApplicationPagination
+from .search import ApplicationOrderingFilter, ApplicationSearchFilter
+from .stats import dashboard_stats
 from .serializers import (
     JobApplicationListSerializer,
     JobApplicationDetailSerializer,
@@ -25,11 +32,21 @@ class JobApplicationFilter(filters.FilterSet):
 
 class JobApplicationViewSet(viewsets.ModelViewSet):
     queryset = JobApplication.objects.all()
+    pagination_class = ApplicationPagination
+    filter_backends = [filters.DjangoFilterBackend, ApplicationSearchFilter, ApplicationOrderingFilter]
     filterset_class = JobApplicationFilter
+    # Only used where the full-text index is unavailable
     search_fields = ['company_name', 'position_title', 'location']
     ordering_fields = ['date_applied', 'created_at', 'company_name', 'status']
     ordering = ['-date_applied']
 
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if self.action == 'retrieve':
+            # Linked emails are fetched by the serializer, newest first and capped
+            queryset = queryset.prefetch_related('application_notes')
+        return queryset
+
     def get_serializer_class(self):
         if self.action == 'list':
             return JobApplicationListSerializer
@@ -38,26 +55,7 @@ class JobApplicationViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def dashboard(self, request):
         """Get dashboard statistics."""
-        applications = JobApplication.objects.all()
-        status_counts = dict(
-            applications.values_list('status').annotate(count=Count('status'))
-        )
-
-        data = {
-            'total_applications': applications.count(),
-            'applied_count': status_counts.get('applied', 0),
-            'interviewing_count': sum([
-                status_counts.get('phone_screen', 0),
-                status_counts.get('interview', 0),
-                status_counts.get('technical', 0),
-                status_counts.get('onsite', 0),
-            ]),
-            'offers_count': sum([
-                status_counts.get('offered', 0),
-                status_counts.get('accepted', 0),
-            ]),
-            'status_counts': status_counts,
-        }
+        data = dashboard_stats()
         return Response(DashboardStatsSerializer(data).data)
 
     @action(detail=False, methods=['get'])
@@ -71,12 +69,47 @@ class JobApplicationViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def follow_ups(self, request):
         """Get applications needing follow-up."""
-        applications = self.queryset.filter(follow_up_date__isnull=False)
-        follow_ups = [app for app in applications if app.needs_follow_up]
-        follow_ups.sort(key=lambda x: (not x.is_overdue, x.follow_up_date))
+        follow_ups = JobApplication.objects.needing_follow_up()
         serializer = JobApplicationListSerializer(follow_ups, many=True)
         return Response(serializer.data)
 
+    @action(detail=False, methods=['get'], url_path=r'export/(?P<file_format>csv|ndjson)')
+    def export(self, request, file_format):
+        """Stream the (filtered) applications as CSV or NDJSON."""
+        queryset = self.filter_queryset(self.get_queryset())
+        response = StreamingHttpResponse(
+            export_rows(queryset, file_format),
+            content_type=CONTENT_TYPES[file_format],
+        )
+        response['Content-Disposition'] = f'attachment; filename="applications.{file_format}"'
+        return response
+
+    @action(
+        detail=False,
+        methods=['post'],
+        url_path=r'import/(?P<file_format>csv|ndjson)',
+        parser_classes=[MultiPartParser],
+    )
+    def bulk_import(self, request, file_format):
+        """Create applications from an uploaded CSV or NDJSON ``file``, reporting invalid rows."""
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({'error': 'No file uploaded'}, status=status.HTTP_400_BAD_REQUEST)
+
+        result = import_rows(read_rows(decode_lines(upload), file_format))
+        if result.error and result.created:
+            # Earlier batches are committed; a 4xx would read as "nothing written" and invite a duplicate retry
+            response_status = status.HTTP_207_MULTI_STATUS
+        elif result.error:
+            response_status = status.HTTP_400_BAD_REQUEST
+        elif result.created:
+            response_status = status.HTTP_201_CREATED
+        elif result.error_count:
+            response_status = status.HTTP_400_BAD_REQUEST
+        else:
+            response_status = status.HTTP_200_OK
+        return Response(asdict(result), status=response_status)
+
     @action(detail=True, methods=['post'])
     def add_note(self, request, pk=None):
         """Add a note to an application."""
@@ -0,0 +1,168 @@
+import codecs
+import csv
+import json
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from rest_framework import serializers
+
+from .models import JobApplication
+from .serializers import JobApplicationDetailSerializer
+from .signals import applications_import_finished, applications_imported
+
+FORMAT_CSV = 'csv'
+FORMAT_NDJSON = 'ndjson'
+CONTENT_TYPES = {
+    FORMAT_CSV: 'text/csv',
+    FORMAT_NDJSON: 'application/x-ndjson',
+}
+
+EXPORT_FIELDS = [
+    'id', 'company_name', 'position_title', 'status', 'date_applied', 'job_type',
+    'job_description', 'job_url', 'location', 'work_location_type', 'salary_min',
+    'salary_max', 'contact_name', 'contact_email', 'contact_phone', 'follow_up_date',
+    'reminder_days_before', 'notes', 'resume_version', 'cover_letter_sent',
+    'master_resume', 'created_at', 'updated_at',
+]
+# Rows fetched per query while exporting.
+EXPORT_CHUNK_SIZE = 2000
+# Rows written per transaction while importing.
+IMPORT_BATCH_SIZE = 5000
+# Invalid rows reported individually; the rest are only counted.
+IMPORT_MAX_ERRORS = 1000
+
+
+class ImportFileError(ValueError):
+    """The uploaded file cannot be read, e.g. it is not UTF-8."""
+
+
+class _Echo:
+    """File-like object whose ``write`` hands the line back, for streaming ``csv.writer`` output."""
+
+    def write(self, value):
+        return value
+
+
+def export_rows(queryset, file_format: str) -> Iterator[str]:
+    """Yield ``queryset`` as CSV (header first) or NDJSON lines, a chunk of rows per query."""
+    rows = queryset.values_list(*EXPORT_FIELDS).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+    if file_format == FORMAT_NDJSON:
+        for row in rows:
+            yield json.dumps(dict(zip(EXPORT_FIELDS, row)), cls=DjangoJSONEncoder) + '\n'
+        return
+
+    writer = csv.writer(_Echo())
+    yield writer.writerow(EXPORT_FIELDS)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+def decode_lines(lines: Iterable[bytes]) -> Iterator[str]:
+    """Decode an uploaded file line by line as UTF-8, dropping a leading byte order mark.
+
+    Raises ``ImportFileError`` naming the line and byte offset of the first
+    byte that is not UTF-8.
+    """
+    offset = 0
+    for line_number, line in enumerate(lines, start=1):
+        if line_number == 1 and line.startswith(codecs.BOM_UTF8):
+            line = line[len(codecs.BOM_UTF8):]
+            offset = len(codecs.BOM_UTF8)
+        try:
+            yield line.decode('utf-8')
+        except UnicodeDecodeError as exc:
+            raise ImportFileError(
+                f'File is not valid UTF-8: line {line_number}, byte {offset + exc.start}.'
+            ) from exc
+        offset += len(line)
+
+
+def read_rows(lines: Iterable[str], file_format: str) -> Iterator[dict]:
+    """Parse uploaded CSV or NDJSON lines into row dicts, one at a time.
+
+    Empty CSV cells are dropped so the model defaults apply. A line that is
+    not a JSON object comes through as ``None`` to be reported against its row.
+    """
+    if file_format == FORMAT_CSV:
+        for row in csv.DictReader(lines):
+            yield {key: value for key, value in row.items() if key and value not in ('', None)}
+        return
+
+    for line in lines:
+        if not line.strip():
+            continue
+        try:
+            row = json.loads(line)
+        except ValueError:
+            row = None
+        yield row if isinstance(row, dict) else None
+
+
+@dataclass
+class ImportResult:
+    created: int = 0
+    error_count: int = 0
+    errors: list[dict] = field(default_factory=list)
+    # Why the file stopped being read early, if it did
+    error: str = ''
+
+    def add_error(self, row_number: int, errors) -> None:
+        self.error_count += 1
+        if len(self.errors) < IMPORT_MAX_ERRORS:
+            self.errors.append({'row': row_number, 'errors': errors})
+
+
+def import_rows(
+    rows: Iterable[dict | None],
+    dry_run: bool = False,
+    batch_size: int = IMPORT_BATCH_SIZE,
+) -> ImportResult:
+    """Validate each row with the API's rules and insert the valid ones in batches.
+
+    Each batch is written in its own transaction with ``bulk_create``, so an
+    invalid row only costs itself. Row numbers in errors count data rows from 1.
+    If the file turns out to be unreadable, the rows before that point are
+    still imported and ``error`` says where reading stopped.
+    """
+    # One serializer checks every row: building its fields again per row costs more than the checks
+    serializer = JobApplicationDetailSerializer()
+    result = ImportResult()
+    created_ids = []
+    batch = []
+    try:
+        for row_number, row in enumerate(rows, start=1):
+            if row is None:
+                result.add_error(row_number, {'non_field_errors': ['Expected a JSON object.']})
+                continue
+            try:
+                batch.append(JobApplication(**serializer.run_validation(row)))
+            except serializers.ValidationError as exc:
+                result.add_error(row_number, _error_messages(exc.detail))
+                continue
+            if len(batch) >= batch_size:
+                result.created += _write_batch(batch, dry_run, created_ids)
+                batch = []
+    except ImportFileError as exc:
+        result.error = str(exc)
+    result.created += _write_batch(batch, dry_run, created_ids)
+    if created_ids:
+        applications_import_finished.send(sender=JobApplication, application_ids=created_ids)
+    return result
+
+
+def _error_messages(detail: dict) -> dict:
+    # Plain strings, so errors print cleanly from the management command too
+    return {name: [str(message) for message in messages] for name, messages in detail.items()}
+
+
+def _write_batch(batch: list[JobApplication], dry_run: bool, created_ids: list[int]) -> int:
+    if not batch or dry_run:
+        return len(batch)
+    with transaction.atomic():
+        created = JobApplication.objects.bulk_create(batch)
+        # bulk_create skips post_save, so listeners are told about the batch instead
+        applications_imported.send(sender=JobApplication, applications=created)
+    created_ids.extend(application.pk for application in created)
+    return len(created)
@@ -0,0 +1,70 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from applications.bulk import (
+    FORMAT_CSV,
+    FORMAT_NDJSON,
+    IMPORT_BATCH_SIZE,
+    decode_lines,
+    import_rows,
+    read_rows,
+)
+
+
+class Command(BaseCommand):
+    help = 'Import job applications from a CSV or NDJSON file, validating every row like the API does'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path',
+            type=str,
+            help='File to import; columns or keys are the application fields, as in an export',
+        )
+        parser.add_argument(
+            '--format',
+            choices=[FORMAT_CSV, FORMAT_NDJSON],
+            help='File format (default: from the file extension)',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=IMPORT_BATCH_SIZE,
+            help=f'Rows inserted per transaction (default: {IMPORT_BATCH_SIZE})',
+        )
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Validate the rows and report errors without saving anything',
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        file_format = options.get('format') or (FORMAT_NDJSON if path.endswith(('.ndjson', '.jsonl')) else FORMAT_CSV)
+
+        started = time.perf_counter()
+        try:
+            with open(path, 'rb') as lines:
+                result = import_rows(
+                    read_rows(decode_lines(lines), file_format),
+                    dry_run=options['dry_run'],
+                    batch_size=options['batch_size'],
+                )
+        except OSError as exc:
+            raise CommandError(f'Could not read {path}: {exc}') from exc
+        elapsed = time.perf_counter() - started
+
+        for error in result.errors:
+            self.stderr.write(f'Row {error["row"]}: {error["errors"]}')
+        if result.error_count > len(result.errors):
+            self.stderr.write(f'... and {result.error_count - len(result.errors)} more invalid row(s)')
+
+        verb = 'Validated' if options['dry_run'] else 'Imported'
+        if result.error:
+            raise CommandError(
+                f'{result.error} {verb} {result.created} application(s) from the rows before it; '
+                f'{result.error_count} row(s) skipped'
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {result.created} application(s) in {elapsed:.1f}s; {result.error_count} row(s) skipped'
+        ))
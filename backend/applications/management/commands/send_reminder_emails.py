@@ -32,21 +32,13 @@ class Command(BaseCommand):
             )
             return
 
-        # Get all applications that need follow-up
-        applications = JobApplication.objects.filter(follow_up_date__isnull=False)
-        follow_ups = []
-
-        for app in applications:
-            if app.needs_follow_up:
-                follow_ups.append(app)
+        # Applications that need follow-up, overdue first, then by follow-up date
+        follow_ups = list(JobApplication.objects.needing_follow_up())
 
         if not follow_ups:
             self.stdout.write(self.style.SUCCESS('No follow-up reminders to send.'))
             return
 
-        # Sort by overdue first, then by follow-up date
-        follow_ups.sort(key=lambda x: (not x.is_overdue, x.follow_up_date))
-
         overdue = [app for app in follow_ups if app.is_overdue]
         upcoming = [app for app in follow_ups if not app.is_overdue]
 
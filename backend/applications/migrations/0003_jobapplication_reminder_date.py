@@ -0,0 +1,24 @@
+# Generated by Django 5.2.8 on 2026-10-17 03:35
+
+import applications.models
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('applications', '0002_jobapplication_master_resume'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='jobapplication',
+            name='reminder_date',
+            field=models.GeneratedField(db_index=True, db_persist=True, expression=applications.models.ReminderDate(), output_field=models.DateField()),
+        ),
+        migrations.AlterField(
+            model_name='jobapplication',
+            name='status',
+            field=models.CharField(choices=[('applied', 'Applied'), ('phone_screen', 'Screening'), ('interview', 'Interview'), ('technical', 'Technical Interview'), ('onsite', 'On-site Interview'), ('offered', 'Offered'), ('accepted', 'Accepted'), ('rejected', 'Rejected'), ('withdrawn', 'Withdrawn')], default='applied', max_length=20),
+        ),
+    ]
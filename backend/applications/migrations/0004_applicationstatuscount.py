@@ -0,0 +1,68 @@
+# Generated by Django 5.2.8 on 2026-10-17 03:36
+
+from django.db import migrations, models
+
+# Triggers keep the per-status counts in the same transaction as every insert,
+# delete and status change, including bulk_create and queryset updates, which
+# bypass model signals. SQLite drops them whenever a column change remakes the
+# application table, so such migrations must recreate them.
+CREATE_STATUS_COUNTS = [
+    """
+    CREATE TRIGGER applications_statuscount_ai AFTER INSERT ON applications_jobapplication BEGIN
+        INSERT INTO applications_applicationstatuscount (status, count) VALUES (new.status, 1)
+        ON CONFLICT (status) DO UPDATE SET count = count + 1;
+    END
+    """,
+    """
+    CREATE TRIGGER applications_statuscount_ad AFTER DELETE ON applications_jobapplication BEGIN
+        UPDATE applications_applicationstatuscount SET count = count - 1 WHERE status = old.status;
+    END
+    """,
+    """
+    CREATE TRIGGER applications_statuscount_au AFTER UPDATE OF status ON applications_jobapplication
+    WHEN old.status IS NOT new.status BEGIN
+        UPDATE applications_applicationstatuscount SET count = count - 1 WHERE status = old.status;
+        INSERT INTO applications_applicationstatuscount (status, count) VALUES (new.status, 1)
+        ON CONFLICT (status) DO UPDATE SET count = count + 1;
+    END
+    """,
+    """
+    INSERT INTO applications_applicationstatuscount (status, count)
+    SELECT status, COUNT(*) FROM applications_jobapplication GROUP BY status
+    """,
+]
+
+DROP_STATUS_COUNTS = [
+    'DROP TRIGGER IF EXISTS applications_statuscount_au',
+    'DROP TRIGGER IF EXISTS applications_statuscount_ad',
+    'DROP TRIGGER IF EXISTS applications_statuscount_ai',
+    'DELETE FROM applications_applicationstatuscount',
+]
+
+
+def _run_on_sqlite(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('applications', '0003_jobapplication_reminder_date'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ApplicationStatusCount',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(max_length=20, unique=True)),
+                ('count', models.IntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(_run_on_sqlite(CREATE_STATUS_COUNTS), _run_on_sqlite(DROP_STATUS_COUNTS)),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 5.2.8 on 2026-10-17 03:37
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('applications', '0004_applicationstatuscount'),
+        ('masterResume', '0003_masterresume_base_font_size'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='jobapplication',
+            index=models.Index(fields=['-date_applied', '-created_at'], name='application_recent_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='jobapplication',
+            index=models.Index(fields=['status', '-date_applied', '-created_at'], name='application_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='jobapplication',
+            index=models.Index(fields=['job_type', '-date_applied', '-created_at'], name='application_job_type_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='jobapplication',
+            index=models.Index(fields=['work_location_type', '-date_applied', '-created_at'], name='application_work_loc_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='jobapplication',
+            index=models.Index(fields=['company_name'], name='application_company_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='jobapplication',
+            index=models.Index(fields=['-created_at'], name='application_created_idx'),
+        ),
+    ]
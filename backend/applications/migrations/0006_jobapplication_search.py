@@ -0,0 +1,70 @@
+# Generated by Django 5.2.8 on 2026-10-17 03:38
+
+import applications.models
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Standalone FTS5 index with one document per application: its searchable
+# fields plus its notes. Model signals keep it current; writes that bypass
+# them (bulk_create, queryset updates) call applications.search.index_applications.
+# Its rank column is bm25 weighted company_name, position_title, location,
+# job_description, notes.
+CREATE_SEARCH_INDEX = [
+    """
+    CREATE VIRTUAL TABLE applications_jobapplication_fts USING fts5(
+        company_name, position_title, location, job_description, notes,
+        tokenize='unicode61 remove_diacritics 2',
+        prefix='2 3'
+    )
+    """,
+    """
+    INSERT INTO applications_jobapplication_fts (applications_jobapplication_fts, rank)
+    VALUES ('rank', 'bm25(10.0, 8.0, 2.0, 1.0, 1.0)')
+    """,
+    """
+    INSERT INTO applications_jobapplication_fts
+        (rowid, company_name, position_title, location, job_description, notes)
+    SELECT a.id, a.company_name, a.position_title, a.location, a.job_description,
+        a.notes || ' ' || COALESCE((
+            SELECT group_concat(n.content, ' ') FROM applications_applicationnote AS n
+            WHERE n.application_id = a.id
+        ), '')
+    FROM applications_jobapplication AS a
+    """,
+]
+
+DROP_SEARCH_INDEX = [
+    'DROP TABLE IF EXISTS applications_jobapplication_fts',
+]
+
+
+def _run_on_sqlite(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('applications', '0005_jobapplication_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ApplicationSearchDocument',
+            fields=[
+                ('application', models.OneToOneField(db_column='rowid', on_delete=django.db.models.deletion.DO_NOTHING, primary_key=True, related_name='search_document', serialize=False, to='applications.jobapplication')),
+                ('document', applications.models.FullTextField(db_column='applications_jobapplication_fts')),
+                ('rank', models.FloatField()),
+            ],
+            options={
+                'db_table': 'applications_jobapplication_fts',
+                'managed': False,
+            },
+        ),
+        migrations.RunPython(_run_on_sqlite(CREATE_SEARCH_INDEX), _run_on_sqlite(DROP_SEARCH_INDEX)),
+    ]
@@ -1,8 +1,47 @@
 from django.db import models
+from django.db.models import BooleanField, ExpressionWrapper, Func, Lookup, Q
 from django.urls import reverse
 from datetime import date, timedelta
 
 
+class ReminderDate(Func):
+    """``follow_up_date - reminder_days_before`` days, as a date the database can index."""
+
+    template = '(%(expressions)s)'
+    arg_joiner = ' - '
+    output_field = models.DateField()
+
+    def __init__(self, follow_up_date='follow_up_date', days_before='reminder_days_before', **extra):
+        super().__init__(follow_up_date, days_before, **extra)
+
+    def as_sqlite(self, compiler, connection, **extra_context):
+        # Built-in date() keeps the expression usable in a generated column
+        return self.as_sql(
+            compiler,
+            connection,
+            template="date(%(expressions)s || ' days')",
+            arg_joiner=", '-' || ",
+            **extra_context,
+        )
+
+
+class JobApplicationQuerySet(models.QuerySet):
+    def with_follow_up_flags(self, today=None):
+        """Annotate ``follow_up_overdue``, which ``is_overdue`` then reads instead of the clock."""
+        today = today or date.today()
+        return self.annotate(follow_up_overdue=ExpressionWrapper(
+            Q(follow_up_date__lt=today),
+            output_field=BooleanField(),
+        ))
+
+    def needing_follow_up(self, today=None):
+        """Applications whose reminder window has opened, overdue first, then by follow-up date."""
+        today = today or date.today()
+        return self.filter(reminder_date__lte=today).with_follow_up_flags(today).order_by(
+            '-follow_up_overdue', 'follow_up_date',
+        )
+
+
 class JobApplication(models.Model):
     STATUS_CHOICES = [
         ('applied', 'Applied'),
@@ -59,6 +98,13 @@ class JobApplication(models.Model):
     # Follow-up
     follow_up_date = models.DateField(null=True, blank=True)
     reminder_days_before = models.PositiveIntegerField(default=1)
+    # Date when the reminder should start showing
+    reminder_date = models.GeneratedField(
+        expression=ReminderDate(),
+        output_field=models.DateField(),
+        db_persist=True,
+        db_index=True,
+    )
 
     # Additional info
     notes = models.TextField(blank=True)
@@ -79,8 +125,23 @@ class JobApplication(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = JobApplicationQuerySet.as_manager()
+
     class Meta:
         ordering = ['-date_applied', '-created_at']
+        # Each list filter leads an index ending in the default ordering, so a
+        # filtered page is read in order without sorting the matching rows.
+        indexes = [
+            models.Index(fields=['-date_applied', '-created_at'], name='application_recent_idx'),
+            models.Index(fields=['status', '-date_applied', '-created_at'], name='application_status_idx'),
+            models.Index(fields=['job_type', '-date_applied', '-created_at'], name='application_job_type_idx'),
+            models.Index(
+                fields=['work_location_type', '-date_applied', '-created_at'],
+                name='application_work_loc_idx',
+            ),
+            models.Index(fields=['company_name'], name='application_company_idx'),
+            models.Index(fields=['-created_at'], name='application_created_idx'),
+        ]
 
     def __str__(self):
         return f"{self.position_title} at {self.company_name}"
@@ -88,23 +149,19 @@ class JobApplication(models.Model):
     def get_absolute_url(self):
         return reverse('applications:application_detail', kwargs={'pk': self.pk})
 
-    @property
-    def reminder_date(self):
-        """Date when reminder should start showing."""
-        if self.follow_up_date:
-            return self.follow_up_date - timedelta(days=self.reminder_days_before)
-        return None
-
     @property
     def needs_follow_up(self):
         """Check if this application needs follow-up based on reminder settings."""
-        if self.follow_up_date and self.reminder_date:
-            return date.today() >= self.reminder_date
+        # Computed here rather than from reminder_date, which is only current once saved
+        if self.follow_up_date:
+            return date.today() >= self.follow_up_date - timedelta(days=self.reminder_days_before)
         return False
 
     @property
     def is_overdue(self):
         """Check if the follow-up date has passed."""
+        if 'follow_up_overdue' in self.__dict__:
+            return self.follow_up_overdue
         if self.follow_up_date:
             return date.today() > self.follow_up_date
         return False
@@ -121,6 +178,54 @@ class JobApplication(models.Model):
         return None
 
 
+class ApplicationStatusCount(models.Model):
+    """Number of applications in each status, kept current by database triggers."""
+
+    status = models.CharField(max_length=20, unique=True)
+    count = models.IntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.status}: {self.count}"
+
+
+class FullTextMatch(Lookup):
+    lookup_name = 'match'
+
+    def as_sql(self, compiler, connection):
+        lhs, lhs_params = self.process_lhs(compiler, connection)
+        rhs, rhs_params = self.process_rhs(compiler, connection)
+        return f'{lhs} MATCH {rhs}', lhs_params + rhs_params
+
+
+class FullTextField(models.TextField):
+    """An FTS5 table's hidden column named after the table, which ``__match`` queries."""
+
+
+FullTextField.register_lookup(FullTextMatch)
+
+
+class ApplicationSearchDocument(models.Model):
+    """Read-only view of the FTS5 index over applications and their notes.
+
+    The table is created in migration 0006 and written by ``applications.search``.
+    """
+
+    application = models.OneToOneField(
+        JobApplication,
+        primary_key=True,
+        db_column='rowid',
+        on_delete=models.DO_NOTHING,
+        related_name='search_document',
+    )
+    document = FullTextField(db_column='applications_jobapplication_fts')
+    # bm25 with the column weights configured on the table; lower is better
+    rank = models.FloatField()
+
+    class Meta:
+        managed = False
+        db_table = 'applications_jobapplication_fts'
+
+
 class ApplicationNote(models.Model):
     application = models.ForeignKey(
         JobApplication,
@@ -0,0 +1,20 @@
+from django.core.paginator import Paginator
+from django.utils.functional import cached_property
+from rest_framework.pagination import PageNumberPagination
+
+from .stats import status_counts, status_counts_maintained
+
+
+class ApplicationPaginator(Paginator):
+    """Counts an unfiltered application list from the status count table rather than its rows."""
+
+    @cached_property
+    def count(self):
+        query = getattr(self.object_list, 'query', None)
+        if query is not None and not query.where and not query.distinct and status_counts_maintained():
+            return sum(status_counts().values())
+        return super().count
+
+
+class ApplicationPagination(PageNumberPagination):
+    django_paginator_class = ApplicationPaginator
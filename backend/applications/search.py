@@ -0,0 +1,84 @@
+from django.db import connection, transaction
+from django.db.models import F
+from rest_framework.filters import OrderingFilter, SearchFilter
+
+from gmail_app.search import build_match_query
+
+from .models import ApplicationSearchDocument
+
+SEARCH_TABLE = ApplicationSearchDocument._meta.db_table
+# Applications reindexed per statement, well under SQLite's parameter limit.
+INDEX_BATCH_SIZE = 500
+
+# One document per application; ``notes`` holds its notes field and every ApplicationNote.
+_DOCUMENT_SELECT = """
+    SELECT a.id, a.company_name, a.position_title, a.location, a.job_description,
+        a.notes || ' ' || COALESCE((
+            SELECT group_concat(n.content, ' ') FROM applications_applicationnote AS n
+            WHERE n.application_id = a.id
+        ), '')
+    FROM applications_jobapplication AS a
+"""
+_INSERT_DOCUMENTS = (
+    f'INSERT INTO {SEARCH_TABLE} (rowid, company_name, position_title, location, job_description, notes)'
+)
+
+
+def search_enabled() -> bool:
+    return connection.vendor == 'sqlite'
+
+
+def index_applications(application_ids) -> None:
+    """Rewrite the search documents of these applications; IDs that no longer exist are dropped."""
+    if not search_enabled():
+        return
+    application_ids = list(application_ids)
+    with transaction.atomic(), connection.cursor() as db:
+        for start in range(0, len(application_ids), INDEX_BATCH_SIZE):
+            batch = application_ids[start:start + INDEX_BATCH_SIZE]
+            placeholders = ', '.join(['%s'] * len(batch))
+            db.execute(f'DELETE FROM {SEARCH_TABLE} WHERE rowid IN ({placeholders})', batch)
+            db.execute(f'{_INSERT_DOCUMENTS} {_DOCUMENT_SELECT} WHERE a.id IN ({placeholders})', batch)
+
+
+def rebuild_search_index() -> None:
+    """Rebuild every search document, e.g. after writes that bypassed the model signals."""
+    if not search_enabled():
+        return
+    with transaction.atomic(), connection.cursor() as db:
+        db.execute(f'DELETE FROM {SEARCH_TABLE}')
+        db.execute(f'{_INSERT_DOCUMENTS} {_DOCUMENT_SELECT}')
+
+
+def search_applications(queryset, query: str):
+    """Narrow ``queryset`` to applications matching ``query``, annotated with ``search_rank``.
+
+    Lower ranks are better matches. Every word must match, the last as a prefix,
+    so results can follow each keystroke.
+    """
+    match = build_match_query(query)
+    if not match:
+        return queryset.none()
+    # Joining the index lets SQLite walk the full-text matches and look each row up
+    return queryset.filter(search_document__document__match=match).annotate(
+        search_rank=F('search_document__rank'),
+    )
+
+
+class ApplicationSearchFilter(SearchFilter):
+    """``?search=`` backed by the full-text index, ranked best match first."""
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, '').strip()
+        if not query or not search_enabled():
+            return super().filter_queryset(request, queryset, view)
+        return search_applications(queryset, query).order_by('search_rank', '-id')
+
+
+class ApplicationOrderingFilter(OrderingFilter):
+    """Keeps search results in rank order unless ``?ordering=`` asks otherwise."""
+
+    def get_default_ordering(self, view):
+        if search_enabled() and view.request.query_params.get(SearchFilter.search_param, '').strip():
+            return None
+        return super().get_default_ordering(view)
@@ -1,6 +1,11 @@
 from rest_framework import serializers
+from rest_framework.reverse import reverse
+from gmail_app.serializers import EmailMessageSerializer
 from .models import JobApplication, ApplicationNote
 
+# Newest linked emails nested in an application's detail; the rest are paged from ``emails_url``.
+DETAIL_EMAIL_LIMIT = 20
+
 
 class ApplicationNoteSerializer(serializers.ModelSerializer):
     class Meta:
@@ -33,6 +38,9 @@ class JobApplicationDetailSerializer(serializers.ModelSerializer):
     job_type_display = serializers.CharField(source='get_job_type_display', read_only=True)
     work_location_type_display = serializers.CharField(source='get_work_location_type_display', read_only=True)
     application_notes = ApplicationNoteSerializer(many=True, read_only=True)
+    emails = serializers.SerializerMethodField()
+    emails_count = serializers.SerializerMethodField()
+    emails_url = serializers.SerializerMethodField()
     salary_range = serializers.CharField(read_only=True)
     needs_follow_up = serializers.BooleanField(read_only=True)
     is_overdue = serializers.BooleanField(read_only=True)
@@ -42,6 +50,17 @@ class JobApplicationDetailSerializer(serializers.ModelSerializer):
         fields = '__all__'
         read_only_fields = ['created_at', 'updated_at']
 
+    def get_emails(self, obj):
+        emails = obj.emails.defer('body_text').order_by('-received_at', '-id')[:DETAIL_EMAIL_LIMIT]
+        return EmailMessageSerializer(emails, many=True).data
+
+    def get_emails_count(self, obj):
+        return obj.emails.count()
+
+    def get_emails_url(self, obj):
+        url = reverse('api-gmail-emails', request=self.context.get('request'))
+        return f'{url}?application={obj.pk}'
+
     def validate(self, data):
         salary_min = data.get('salary_min')
         salary_max = data.get('salary_max')
@@ -0,0 +1,34 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+
+from .models import ApplicationNote, JobApplication
+from .search import index_applications
+
+# Sent after a bulk import inserts a batch, which bypasses post_save; ``applications`` is the batch.
+applications_imported = Signal()
+# Sent once when a bulk import is done, for work better done once than per batch;
+# ``application_ids`` lists every application it created.
+applications_import_finished = Signal()
+
+
+@receiver(post_save, sender=JobApplication)
+@receiver(post_delete, sender=JobApplication)
+def reindex_application(sender, instance, raw=False, **kwargs):
+    """Keep the application's search document in step with its fields."""
+    if raw:
+        return
+    index_applications([instance.pk])
+
+
+@receiver(post_save, sender=ApplicationNote)
+@receiver(post_delete, sender=ApplicationNote)
+def reindex_note_application(sender, instance, raw=False, **kwargs):
+    """Notes are searched as part of their application's document."""
+    if raw:
+        return
+    index_applications([instance.application_id])
+
+
+@receiver(applications_imported)
+def index_imported_applications(sender, applications, **kwargs):
+    index_applications([application.pk for application in applications])
@@ -0,0 +1,31 @@
+from django.db import connection
+from django.db.models import Count
+
+from .models import ApplicationStatusCount, JobApplication
+
+INTERVIEWING_STATUSES = ['phone_screen', 'interview', 'technical', 'onsite']
+OFFER_STATUSES = ['offered', 'accepted']
+
+
+def status_counts_maintained() -> bool:
+    """Whether ApplicationStatusCount is kept current; its triggers are SQLite only."""
+    return connection.vendor == 'sqlite'
+
+
+def status_counts() -> dict[str, int]:
+    """Applications per status, read from the trigger-maintained count table."""
+    if not status_counts_maintained():
+        return dict(JobApplication.objects.order_by().values_list('status').annotate(count=Count('id')))
+    return dict(ApplicationStatusCount.objects.filter(count__gt=0).values_list('status', 'count'))
+
+
+def dashboard_stats() -> dict:
+    """Totals shown on the dashboard, from a single read of the status counts."""
+    counts = status_counts()
+    return {
+        'total_applications': sum(counts.values()),
+        'applied_count': counts.get('applied', 0),
+        'interviewing_count': sum(counts.get(status, 0) for status in INTERVIEWING_STATUSES),
+        'offers_count': sum(counts.get(status, 0) for status in OFFER_STATUSES),
+        'status_counts': counts,
+    }
@@ -1,3 +1,315 @@
+import re
+from datetime import date, timedelta
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.db.models import Count
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from gmail_app.models import EmailMessage, GmailAccount
+
+from .models import ApplicationNote, JobApplication
+from .search import SEARCH_TABLE
+from .serializers import DETAIL_EMAIL_LIMIT
+from .stats import status_counts
+
+# Tables small enough by construction that scanning them is fine.
+BOUNDED_TABLES = {'applications_applicationstatuscount'}
+
+# Any plan step that walks a whole table or index, "USING INDEX" or not
+# (SQLite 3.36+ drops the older "TABLE" keyword).
+_SCAN_RE = re.compile(r'^SCAN (?:TABLE )?(?P<table>\w+)(?: AS \w+)?(?P<detail>.*)$')
+# An FTS5 MATCH constraint; the virtual table answers it from its own index.
+_FULL_TEXT_MATCH_RE = re.compile(r'^ VIRTUAL TABLE INDEX \d+:\S*M')
+_WALK_RE = re.compile(r'^ USING (?:COVERING )?INDEX (?P<index>\w+)$')
+
+
+@skipUnless(connection.vendor == 'sqlite', 'EXPLAIN QUERY PLAN output is SQLite specific')
+class QueryPlanTests(TestCase):
+    """Every query behind the application views must be answered from an index.
+
+    Each page is requested with the filter and ordering combinations the UI
+    and API offer, and every SELECT it ran is put through EXPLAIN QUERY PLAN.
+    No step may scan a table; the only exception is an unfiltered list walking
+    the index that matches its ordering, and then only to fill one page.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        today = date.today()
+        cls.application = JobApplication.objects.create(
+            company_name='Acme',
+            position_title='Engineer',
+            status='interview',
+            follow_up_date=today + timedelta(days=1),
+        )
+        JobApplication.objects.create(
+            company_name='Globex',
+            position_title='Analyst',
+            job_type='contract',
+            work_location_type='remote',
+            date_applied=today - timedelta(days=30),
+        )
+        ApplicationNote.objects.create(application=cls.application, content='Called the recruiter')
+
+    def plan(self, sql):
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+            return [row[-1] for row in cursor.fetchall()]
+
+    def scans(self, sql, steps, walk_index=None):
+        """Steps of ``steps`` that scan, less the ordered walk of ``walk_index`` under a LIMIT."""
+        scans = []
+        for step in steps:
+            match = _SCAN_RE.match(step)
+            if not match or match['table'] in BOUNDED_TABLES or _FULL_TEXT_MATCH_RE.match(match['detail']):
+                continue
+            walk = _WALK_RE.match(match['detail'])
+            if walk and walk['index'] == walk_index and ' LIMIT ' in sql:
+                continue
+            scans.append(step)
+        return scans
+
+    def assertIndexed(self, url, index=None, walk=False):
+        """Assert no query behind ``url`` scans, and that one of them uses ``index``.
+
+        With ``walk`` the list may be read by walking ``index`` in order.
+        """
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200, url)
+        selects = [query['sql'] for query in queries if query['sql'].lstrip().upper().startswith('SELECT')]
+        self.assertTrue(selects, url)
+        used = []
+        for sql in selects:
+            steps = self.plan(sql)
+            used += steps
+            with self.subTest(url=url, sql=sql):
+                self.assertEqual(self.scans(sql, steps, index if walk else None), [])
+        if index:
+            self.assertTrue(any(re.search(rf'\b{index}\b', step) for step in used), f'{url} did not use {index}')
+
+    def test_api_list_queries(self):
+        url = reverse('jobapplication-list')
+        week_ago = (date.today() - timedelta(days=7)).isoformat()
+        for params, index in [
+            (f'?date_from={week_ago}', 'application_recent_idx'),
+            (f'?date_to={week_ago}', 'application_recent_idx'),
+            ('?status=interview', 'application_status_idx'),
+            (f'?status=applied&date_from={week_ago}', 'application_status_idx'),
+            ('?job_type=contract', 'application_job_type_idx'),
+            ('?work_location_type=remote', 'application_work_loc_idx'),
+            ('?search=acme', SEARCH_TABLE),
+            ('?search=engineer&status=interview', SEARCH_TABLE),
+            ('?search=recruit&ordering=company_name', SEARCH_TABLE),
+        ]:
+            self.assertIndexed(url + params, index)
+
+    def test_api_list_ordered_walks(self):
+        url = reverse('jobapplication-list')
+        for params, index in [
+            ('', 'application_recent_idx'),
+            ('?ordering=date_applied', 'application_recent_idx'),
+            ('?ordering=company_name', 'application_company_idx'),
+            ('?ordering=-created_at', 'application_created_idx'),
+            ('?ordering=status', 'application_status_idx'),
+        ]:
+            self.assertIndexed(url + params, index, walk=True)
+        # The unfiltered count comes from the status count table
+        self.assertEqual(self.client.get(url).json()['count'], 2)
+
+    def test_api_actions(self):
+        for name in ['jobapplication-dashboard', 'jobapplication-recent', 'jobapplication-follow-ups']:
+            self.assertIndexed(reverse(name))
+        self.assertIndexed(reverse('jobapplication-detail', args=[self.application.pk]))
+        self.assertIndexed(f'/api/applications/{self.application.pk}/notes/')
+
+    def test_page_views(self):
+        url = reverse('applications:application_list')
+        week_ago = (date.today() - timedelta(days=7)).isoformat()
+        self.assertIndexed(url, 'application_recent_idx', walk=True)
+        for params, index in [
+            ('?status=interview', 'application_status_idx'),
+            ('?job_type=contract', 'application_job_type_idx'),
+            ('?work_location_type=remote', 'application_work_loc_idx'),
+            (f'?date_from={week_ago}&date_to={date.today().isoformat()}', 'application_recent_idx'),
+            ('?search=acme', SEARCH_TABLE),
+        ]:
+            self.assertIndexed(url + params, index)
+        self.assertIndexed(reverse('applications:dashboard'))
+        self.assertIndexed(reverse('applications:application_detail', args=[self.application.pk]))
+
+
+@skipUnless(connection.vendor == 'sqlite', 'Application search uses SQLite FTS5')
+class ApplicationSearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.application = JobApplication.objects.create(company_name='Acme', position_title='Engineer')
+        cls.note = ApplicationNote.objects.create(application=cls.application, content='Called the recruiter')
+        JobApplication.objects.create(company_name='Globex', position_title='Analyst')
+
+    def search(self, query):
+        response = self.client.get(reverse('jobapplication-list'), {'search': query})
+        return [row['company_name'] for row in response.json()['results']]
+
+    def indexed_ids(self, query):
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH %s', [query])
+            return [row[0] for row in cursor.fetchall()]
+
+    def test_search_matches_fields_and_notes(self):
+        self.assertEqual(self.search('recruit'), ['Acme'])
+        self.assertEqual(self.search('analy'), ['Globex'])
+
+        self.application.application_notes.all().delete()
+        self.assertEqual(self.search('recruit'), [])
+
+    def test_note_edit_updates_index(self):
+        self.note.content = 'Scheduled an onsite'
+        self.note.save()
+
+        self.assertEqual(self.indexed_ids('recruiter'), [])
+        self.assertEqual(self.indexed_ids('onsite'), [self.application.pk])
+        self.assertEqual(self.search('onsi'), ['Acme'])
+
+    def test_application_delete_removes_document(self):
+        application_id = self.application.pk
+        self.application.delete()
+
+        self.assertEqual(self.indexed_ids('acme'), [])
+        self.assertEqual(self.indexed_ids('recruiter'), [])
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT COUNT(*) FROM {SEARCH_TABLE} WHERE rowid = %s', [application_id])
+            self.assertEqual(cursor.fetchone()[0], 0)
+        self.assertEqual(self.search('acme'), [])
+
+
+@skipUnless(connection.vendor == 'sqlite', 'The status count triggers are SQLite only')
+class StatusCountTests(TestCase):
+    def assertCountsMatch(self):
+        expected = dict(JobApplication.objects.order_by().values_list('status').annotate(count=Count('id')))
+        self.assertEqual(status_counts(), expected)
+
+    def test_counts_follow_every_write(self):
+        application = JobApplication.objects.create(company_name='Acme', position_title='Engineer')
+        self.assertCountsMatch()
+
+        application.status = 'interview'
+        application.save()
+        self.assertCountsMatch()
+
+        JobApplication.objects.bulk_create([
+            JobApplication(company_name=f'Company {i}', position_title='Analyst', status=status)
+            for i, status in enumerate(['applied', 'interview', 'rejected', 'applied'])
+        ])
+        self.assertCountsMatch()
+
+        JobApplication.objects.filter(status='applied').update(status='offered')
+        self.assertCountsMatch()
+
+        application.delete()
+        JobApplication.objects.filter(status='rejected').delete()
+        self.assertCountsMatch()
+        self.assertEqual(status_counts(), {'interview': 1, 'offered': 2})
+
+
+class FollowUpTests(TestCase):
+    def test_reminder_date_matches_python_date_math(self):
+        cases = [(date(2026, 3, 1), 1), (date(2026, 1, 5), 10), (date(2024, 3, 1), 1), (date(2026, 6, 30), 0)]
+        for follow_up_date, days_before in cases:
+            JobApplication.objects.create(
+                company_name='Acme', position_title='Engineer',
+                follow_up_date=follow_up_date, reminder_days_before=days_before,
+            )
+        JobApplication.objects.create(company_name='Globex', position_title='Analyst')
+
+        rows = JobApplication.objects.order_by('id').values_list('follow_up_date', 'reminder_days_before', 'reminder_date')
+        for follow_up_date, days_before, reminder_date in rows:
+            expected = follow_up_date - timedelta(days=days_before) if follow_up_date else None
+            self.assertEqual(reminder_date, expected)
+
+        # The generated column follows writes that skip save()
+        JobApplication.objects.filter(reminder_days_before=10).update(reminder_days_before=40)
+        self.assertEqual(
+            JobApplication.objects.get(reminder_days_before=40).reminder_date, date(2025, 11, 26),
+        )
+
+    def test_needing_follow_up_agrees_with_the_model_properties(self):
+        today = date.today()
+        for offset, days_before in [(-3, 1), (0, 0), (1, 1), (2, 1), (5, 7), (30, 2)]:
+            JobApplication.objects.create(
+                company_name=f'Company {offset}', position_title='Engineer',
+                follow_up_date=today + timedelta(days=offset), reminder_days_before=days_before,
+            )
+        JobApplication.objects.create(company_name='Undated', position_title='Engineer')
+
+        due = list(JobApplication.objects.needing_follow_up(today))
+        expected = [application for application in JobApplication.objects.all() if application.needs_follow_up]
+        self.assertEqual({application.pk for application in due}, {application.pk for application in expected})
+        self.assertEqual(
+            [application.company_name for application in due],
+            ['Company -3', 'Company 0', 'Company 1', 'Company 5'],
+        )
+        self.assertEqual(
+            [application.is_overdue for application in due],
+            [JobApplication.objects.get(pk=application.pk).is_overdue for application in due],
+        )
+
+
+class ApplicationDetailTests(TestCase):
+    def test_linked_emails_are_capped(self):
+        application = JobApplication.objects.create(company_name='Acme', position_title='Engineer')
+        user = get_user_model().objects.create_user(username='me@example.com')
+        account = GmailAccount.objects.create(user=user, email='me@example.com')
+        EmailMessage.objects.bulk_create([
+            EmailMessage(account=account, gmail_message_id=f'm{i}', application=application)
+            for i in range(DETAIL_EMAIL_LIMIT + 5)
+        ])
+
+        data = self.client.get(reverse('jobapplication-detail', args=[application.pk])).json()
+        self.assertEqual(len(data['emails']), DETAIL_EMAIL_LIMIT)
+        self.assertEqual(data['emails'][0]['gmail_message_id'], f'm{DETAIL_EMAIL_LIMIT + 4}')
+        self.assertEqual(data['emails_count'], DETAIL_EMAIL_LIMIT + 5)
+        self.assertTrue(data['emails_url'].endswith(f'/api/gmail/emails/?application={application.pk}'))
+
+
+class ImportTests(TestCase):
+    def upload(self, content, file_format='csv'):
+        upload = SimpleUploadedFile(f'applications.{file_format}', content)
+        return self.client.post(f'/api/applications/import/{file_format}/', {'file': upload})
+
+    def test_import_reports_invalid_rows(self):
+        response = self.upload(
+            '\ufeffcompany_name,position_title,status\nAcme,Engineer,applied\nGlobex,,interview\n'.encode()
+        )
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['created'], 1)
+        self.assertEqual([error['row'] for error in response.json()['errors']], [2])
+
+    def test_rows_get_the_serializer_rules(self):
+        response = self.upload(
+            'company_name,position_title,status,salary_min,salary_max\n'
+            'Acme,Engineer,bogus,,\nGlobex,Analyst,applied,200,100\n'.encode()
+        )
+        self.assertEqual(response.status_code, 400)
+        errors = {error['row']: error['errors'] for error in response.json()['errors']}
+        self.assertEqual(errors[1], {'status': ['"bogus" is not a valid choice.']})
+        self.assertEqual(errors[2], {'salary_max': ['Maximum salary cannot be less than minimum salary.']})
+
+    def test_non_utf8_upload_is_rejected(self):
+        response = self.upload('company_name,position_title\nSociété,Analyst\n'.encode('latin-1'))
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json()['error'], 'File is not valid UTF-8: line 2, byte 32.')
+        self.assertEqual(response.json()['created'], 0)
+        self.assertFalse(JobApplication.objects.exists())
 
-# Create your tests here.
+    def test_unreadable_tail_after_saved_rows_is_a_partial_success(self):
+        response = self.upload('company_name,position_title\nAcme,Engineer\nSociété,Analyst\n'.encode('latin-1'))
+        self.assertEqual(response.status_code, 207)
+        self.assertEqual(response.json()['error'], 'File is not valid UTF-8: line 3, byte 46.')
+        self.assertEqual(response.json()['created'], 1)
+        self.assertEqual(JobApplication.objects.count(), 1)
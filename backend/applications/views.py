@@ -3,11 +3,14 @@ from django.views.generic import (
     ListView, DetailView, CreateView, UpdateView, DeleteView, TemplateView
 )
 from django.urls import reverse_lazy
-from django.db.models import Q, Count
+from django.db.models import Q
 from django.contrib import messages
 from datetime import date, timedelta
 
 from .models import JobApplication, ApplicationNote
+from .pagination import ApplicationPaginator
+from .search import search_applications, search_enabled
+from .stats import dashboard_stats
 from .forms import (
     JobApplicationForm, QuickApplicationForm,
     ApplicationNoteForm, ApplicationFilterForm
@@ -22,39 +25,18 @@ class DashboardView(TemplateView):
         today = date.today()
 
         # Statistics
-        applications = JobApplication.objects.all()
-        context['total_applications'] = applications.count()
-        status_counts = dict(
-            applications.values_list('status').annotate(count=Count('status'))
-        )
-        context['status_counts'] = status_counts
-        context['applied_count'] = status_counts.get('applied', 0)
-        context['interviewing_count'] = (
-            status_counts.get('phone_screen', 0) +
-            status_counts.get('interview', 0) +
-            status_counts.get('technical', 0) +
-            status_counts.get('onsite', 0)
-        )
-        context['offers_count'] = (
-            status_counts.get('offered', 0) +
-            status_counts.get('accepted', 0)
-        )
+        context.update(dashboard_stats())
 
         # Recent applications (last 7 days)
         week_ago = today - timedelta(days=7)
+        applications = JobApplication.objects.all()
         context['recent_applications'] = applications.filter(
             date_applied__gte=week_ago
         ).order_by('-date_applied')[:5]
 
         # Pending follow-ups
-        follow_ups = []
-        for app in applications.filter(follow_up_date__isnull=False):
-            if app.needs_follow_up:
-                follow_ups.append(app)
-        context['pending_followups'] = sorted(
-            follow_ups,
-            key=lambda x: (not x.is_overdue, x.follow_up_date)
-        )
+        follow_ups = list(applications.needing_follow_up(today))
+        context['pending_followups'] = follow_ups
         context['followup_count'] = len(follow_ups)
 
         # Quick add form
@@ -78,13 +60,16 @@ class ApplicationListView(ListView):
     template_name = 'applications/application_list.html'
     context_object_name = 'applications'
     paginate_by = 20
+    paginator_class = ApplicationPaginator
 
     def get_queryset(self):
         queryset = JobApplication.objects.all()
 
         # Search
         search = self.request.GET.get('search', '')
-        if search:
+        if search and search_enabled():
+            queryset = search_applications(queryset, search).order_by('search_rank', '-id')
+        elif search:
             queryset = queryset.filter(
                 Q(company_name__icontains=search) |
                 Q(position_title__icontains=search)
@@ -190,13 +175,7 @@ class FollowUpListView(ListView):
     context_object_name = 'applications'
 
     def get_queryset(self):
-        today = date.today()
-        applications = JobApplication.objects.filter(follow_up_date__isnull=False)
-        follow_ups = []
-        for app in applications:
-            if app.needs_follow_up:
-                follow_ups.append(app)
-        return sorted(follow_ups, key=lambda x: (not x.is_overdue, x.follow_up_date))
+        return JobApplication.objects.needing_follow_up()
 
 
 def delete_note(request, pk, note_pk):
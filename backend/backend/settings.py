@@ -159,6 +159,15 @@ GMAIL_OAUTH_SCOPES = [
     'https://www.googleapis.com/auth/userinfo.email',
 ]
 
+# Google endpoints; `manage.py fake_gmail_server` prints values that point them at a local stand-in
+GOOGLE_AUTH_URL = os.environ.get('GOOGLE_AUTH_URL', 'https://accounts.google.com/o/oauth2/v2/auth')
+GOOGLE_TOKEN_URL = os.environ.get('GOOGLE_TOKEN_URL', 'https://oauth2.googleapis.com/token')
+GOOGLE_USERINFO_URL = os.environ.get('GOOGLE_USERINFO_URL', 'https://www.googleapis.com/oauth2/v2/userinfo')
+GMAIL_API_BASE_URL = os.environ.get('GMAIL_API_BASE_URL', 'https://gmail.googleapis.com')
+
+# Downloaded Gmail attachments, stored once per distinct content under its SHA-256
+GMAIL_ATTACHMENT_ROOT = os.environ.get('GMAIL_ATTACHMENT_ROOT', str(BASE_DIR / 'gmail_attachments'))
+
 # Django REST Framework settings
 REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
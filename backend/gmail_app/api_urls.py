@@ -3,9 +3,22 @@ from . import api_views
 
 urlpatterns = [
     path('status/', api_views.gmail_status, name='api-gmail-status'),
+    path('backfill/', api_views.gmail_backfill, name='api-gmail-backfill'),
+    path('backfill/status/', api_views.gmail_backfill_status, name='api-gmail-backfill-status'),
+    path('sync-filter/', api_views.gmail_sync_filter, name='api-gmail-sync-filter'),
     path('auth/init/', api_views.gmail_auth_init, name='api-gmail-auth-init'),
     path('auth/callback/', api_views.gmail_auth_callback, name='api-gmail-auth-callback'),
     path('emails/', api_views.gmail_emails, name='api-gmail-emails'),
+    path('emails/search/', api_views.gmail_email_search, name='api-gmail-email-search'),
+    path('emails/<int:pk>/', api_views.gmail_email_detail, name='api-gmail-email-detail'),
+    path(
+        'emails/<int:pk>/attachments/<int:attachment_pk>/',
+        api_views.gmail_attachment_download,
+        name='api-gmail-attachment-download',
+    ),
     path('emails/fetch/', api_views.gmail_fetch_emails, name='api-gmail-fetch'),
+    path('threads/', api_views.gmail_threads, name='api-gmail-threads'),
+    path('threads/<int:pk>/', api_views.gmail_thread_detail, name='api-gmail-thread-detail'),
+    path('jobs/<int:pk>/', api_views.gmail_job_status, name='api-gmail-job-status'),
     path('disconnect/', api_views.gmail_disconnect, name='api-gmail-disconnect'),
 ]
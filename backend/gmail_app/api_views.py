@@ -1,42 +1,45 @@
 import secrets
 import json
-from datetime import datetime, timezone
+
+import requests
 
 from rest_framework import status
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from django.conf import settings
+from django.http import FileResponse
 from django.shortcuts import render
 from django.contrib.auth import get_user_model
 
+from .attachments import download_attachment
 from .gmail_client import (
     build_google_auth_url,
     compute_expiry,
     exchange_code_for_tokens,
     get_userinfo,
-    gmail_api_get,
-    parse_gmail_headers,
-    parse_rfc2822_datetime,
-    refresh_access_token,
 )
-from .models import GmailAccount, EmailMessage
-from .serializers import GmailAccountSerializer, EmailMessageSerializer
+from .filters import EmailMessageFilter
+from .jobs import enqueue_job
+from .models import GmailAccount, EmailAttachment, EmailMessage, EmailThread, MailboxBackfill, SyncJob
+from .serializers import (
+    EmailMessageDetailSerializer,
+    EmailMessageSerializer,
+    EmailSearchResultSerializer,
+    EmailThreadSerializer,
+    GmailAccountSerializer,
+    MailboxBackfillSerializer,
+    SyncFilterSerializer,
+    SyncJobSerializer,
+)
+from .pagination import InvalidCursorError, paginate_by_recency
+from .search import search_messages
+from .sync import hydrate_messages
+from .sync_filter import refresh_sync_filter
+from .tokens import ensure_access_token, invalidate_access_token
 
 User = get_user_model()
 
 
-def _ensure_access_token(account: GmailAccount) -> str:
-    """Refresh access token if expired."""
-    if account.token_expiry and account.token_expiry <= datetime.now(timezone.utc):
-        if not account.refresh_token:
-            raise RuntimeError('Refresh token missing.')
-        refreshed = refresh_access_token(account.refresh_token)
-        account.access_token = refreshed.get('access_token', account.access_token)
-        account.token_expiry = compute_expiry(refreshed.get('expires_in'))
-        account.save(update_fields=['access_token', 'token_expiry'])
-    return account.access_token
-
-
 @api_view(['GET'])
 def gmail_status(request):
     """Check if user has connected Gmail."""
@@ -54,6 +57,53 @@ def gmail_status(request):
     })
 
 
+@api_view(['GET'])
+def gmail_backfill_status(request):
+    """Report progress of the full-mailbox backfill."""
+    account_id = request.session.get('gmail_account_id')
+    if not account_id:
+        return Response({'error': 'Not authenticated'}, status=status.HTTP_401_UNAUTHORIZED)
+
+    backfill = MailboxBackfill.objects.filter(account_id=account_id).first()
+    if not backfill:
+        return Response({'status': MailboxBackfill.STATUS_PENDING, 'processed': 0, 'stored': 0})
+    return Response(MailboxBackfillSerializer(backfill).data)
+
+
+@api_view(['GET', 'PUT'])
+def gmail_sync_filter(request):
+    """Read or replace the filter that limits which Gmail messages are synced.
+
+    Saving a filter that compiles to a different search queues a backfill of
+    the messages it newly takes in.
+    """
+    account_id = request.session.get('gmail_account_id')
+    if not account_id:
+        return Response({'error': 'Not authenticated'}, status=status.HTTP_401_UNAUTHORIZED)
+
+    account = GmailAccount.objects.filter(id=account_id).first()
+    if not account:
+        return Response({'error': 'Account not found'}, status=status.HTTP_404_NOT_FOUND)
+
+    if request.method == 'PUT':
+        serializer = SyncFilterSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(
+                {'error': 'Invalid filter', 'fields': serializer.errors},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+        account.sync_filter = serializer.validated_data
+        account.save(update_fields=['sync_filter'])
+        refresh_sync_filter(account)
+
+    return Response({
+        'filter': SyncFilterSerializer(account.sync_filter).data,
+        'query': account.sync_query,
+        'label_ids': account.sync_label_ids,
+        'version': account.sync_filter_version,
+    })
+
+
 @api_view(['GET'])
 def gmail_auth_init(request):
     """Initialize Gmail OAuth flow - returns auth URL for popup."""
@@ -115,6 +165,7 @@ def gmail_auth_callback(request):
         account.token_expiry = compute_expiry(expires_in)
         account.scope = token_data.get('scope', account.scope)
         account.save(update_fields=['access_token', 'refresh_token', 'token_expiry', 'scope'])
+        invalidate_access_token(account.id)
 
         request.session['gmail_account_id'] = account.id
 
@@ -132,7 +183,17 @@ def gmail_auth_callback(request):
 
 @api_view(['POST'])
 def gmail_fetch_emails(request):
-    """Fetch emails from Gmail API."""
+    """Queue a Gmail sync; poll the returned job for progress."""
+    return _enqueue_for_session(request, SyncJob.KIND_SYNC)
+
+
+@api_view(['POST'])
+def gmail_backfill(request):
+    """Queue a full-mailbox backfill; poll the returned job or backfill status."""
+    return _enqueue_for_session(request, SyncJob.KIND_BACKFILL, restart=bool(request.data.get('restart')))
+
+
+def _enqueue_for_session(request, kind, restart=False):
     account_id = request.session.get('gmail_account_id')
     if not account_id:
         return Response({'error': 'Not authenticated'}, status=status.HTTP_401_UNAUTHORIZED)
@@ -141,65 +202,169 @@ def gmail_fetch_emails(request):
     if not account:
         return Response({'error': 'Account not found'}, status=status.HTTP_404_NOT_FOUND)
 
-    try:
-        access_token = _ensure_access_token(account)
-    except RuntimeError as e:
-        return Response({'error': str(e)}, status=status.HTTP_401_UNAUTHORIZED)
-
-    list_response = gmail_api_get(
-        'https://gmail.googleapis.com/gmail/v1/users/me/messages',
-        access_token,
-        params={'maxResults': 100},
-    )
+    if restart and not account.sync_jobs.filter(kind=kind, status__in=SyncJob.ACTIVE_STATUSES).exists():
+        MailboxBackfill.objects.filter(account=account).delete()
+    job = enqueue_job(account, kind)
+    return Response(SyncJobSerializer(job).data, status=status.HTTP_202_ACCEPTED)
 
-    messages = list_response.get('messages', [])
-    stored = 0
 
-    for message in messages:
-        message_id = message.get('id')
-        if not message_id:
-            continue
+@api_view(['GET'])
+def gmail_job_status(request, pk):
+    """Get the state and counts of a queued sync job."""
+    account_id = request.session.get('gmail_account_id')
+    if not account_id:
+        return Response({'error': 'Not authenticated'}, status=status.HTTP_401_UNAUTHORIZED)
 
-        # Skip if already exists
-        if EmailMessage.objects.filter(gmail_message_id=message_id).exists():
-            continue
+    job = SyncJob.objects.filter(account_id=account_id, pk=pk).first()
+    if not job:
+        return Response({'error': 'Job not found'}, status=status.HTTP_404_NOT_FOUND)
+    return Response(SyncJobSerializer(job).data)
 
-        detail = gmail_api_get(
-            f'https://gmail.googleapis.com/gmail/v1/users/me/messages/{message_id}',
-            access_token,
-            params={'format': 'full'},
-        )
 
-        payload = detail.get('payload', {})
-        headers = parse_gmail_headers(payload.get('headers', []))
-
-        EmailMessage.objects.create(
-            account=account,
-            gmail_message_id=message_id,
-            thread_id=detail.get('threadId', ''),
-            subject=headers.get('subject', ''),
-            sender=headers.get('from', ''),
-            snippet=detail.get('snippet', ''),
-            received_at=parse_rfc2822_datetime(headers.get('date')),
-            raw_payload=detail,
+@api_view(['GET'])
+def gmail_emails(request):
+    """Get stored emails, newest first; pass ``next_cursor`` back as ``cursor`` for older ones."""
+    account_id = request.session.get('gmail_account_id')
+    if not account_id:
+        return Response({'error': 'Not authenticated'}, status=status.HTTP_401_UNAUTHORIZED)
+
+    filterset = EmailMessageFilter(
+        request.query_params,
+        queryset=EmailMessage.objects.filter(account_id=account_id).defer('body_text'),
+    )
+    if not filterset.is_valid():
+        return Response(
+            {'error': 'Invalid filters', 'fields': filterset.errors},
+            status=status.HTTP_400_BAD_REQUEST
         )
-        stored += 1
 
-    return Response({'fetched': len(messages), 'stored': stored})
+    return _paginated(
+        request,
+        lambda cursor, limit: paginate_by_recency(filterset.qs, 'received_at', cursor, limit),
+        EmailMessageSerializer,
+    )
 
 
 @api_view(['GET'])
-def gmail_emails(request):
-    """Get stored emails."""
+def gmail_email_search(request):
+    """Search stored emails by relevance; pass ``next_cursor`` back as ``cursor`` for more."""
     account_id = request.session.get('gmail_account_id')
     if not account_id:
         return Response({'error': 'Not authenticated'}, status=status.HTTP_401_UNAUTHORIZED)
 
-    messages = EmailMessage.objects.filter(
-        account_id=account_id
-    ).order_by('-received_at')[:50]
+    query = request.query_params.get('q', '')
+    return _paginated(
+        request,
+        lambda cursor, limit: search_messages(account_id, query, cursor=cursor, limit=limit),
+        EmailSearchResultSerializer,
+    )
+
+
+def _paginated(request, get_page, serializer_class):
+    """Serialize ``get_page(cursor, limit)`` using the request's ``cursor`` and ``limit``."""
+    try:
+        limit = int(request.query_params.get('limit', 0))
+    except ValueError:
+        return Response({'error': 'limit must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        items, next_cursor = get_page(request.query_params.get('cursor'), limit)
+    except InvalidCursorError as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    return Response({
+        'results': serializer_class(items, many=True).data,
+        'next_cursor': next_cursor,
+    })
+
+
+@api_view(['GET'])
+def gmail_email_detail(request, pk):
+    """Get one stored email, downloading its full body on first open."""
+    account_id = request.session.get('gmail_account_id')
+    if not account_id:
+        return Response({'error': 'Not authenticated'}, status=status.HTTP_401_UNAUTHORIZED)
+
+    message = EmailMessage.objects.select_related('account', 'payload').filter(
+        account_id=account_id, pk=pk
+    ).first()
+    if not message:
+        return Response({'error': 'Email not found'}, status=status.HTTP_404_NOT_FOUND)
+
+    if not message.is_hydrated:
+        try:
+            access_token = ensure_access_token(message.account)
+        except RuntimeError as e:
+            return Response({'error': str(e)}, status=status.HTTP_401_UNAUTHORIZED)
+        hydrate_messages(message.account, access_token, [message])
+
+    return Response(EmailMessageDetailSerializer(message).data)
+
+
+@api_view(['GET'])
+def gmail_attachment_download(request, pk, attachment_pk):
+    """Stream an email attachment, downloading it from Gmail into the attachment store first if needed."""
+    account_id = request.session.get('gmail_account_id')
+    if not account_id:
+        return Response({'error': 'Not authenticated'}, status=status.HTTP_401_UNAUTHORIZED)
+
+    attachment = EmailAttachment.objects.select_related('message__account', 'message__payload').filter(
+        message__account_id=account_id, message_id=pk, pk=attachment_pk
+    ).first()
+    if not attachment:
+        return Response({'error': 'Attachment not found'}, status=status.HTTP_404_NOT_FOUND)
+
+    access_token = ''
+    if attachment.attachment_id:
+        try:
+            access_token = ensure_access_token(attachment.message.account)
+        except RuntimeError as e:
+            return Response({'error': str(e)}, status=status.HTTP_401_UNAUTHORIZED)
+    try:
+        path = download_attachment(attachment, access_token)
+    except (requests.RequestException, ValueError) as e:
+        return Response({'error': f'Could not download attachment: {e}'}, status=status.HTTP_502_BAD_GATEWAY)
+
+    return FileResponse(
+        open(path, 'rb'),
+        as_attachment=True,
+        filename=attachment.filename or 'attachment',
+        content_type=attachment.mime_type or 'application/octet-stream',
+    )
+
 
-    return Response(EmailMessageSerializer(messages, many=True).data)
+@api_view(['GET'])
+def gmail_threads(request):
+    """Get conversations, most recently active first; paged like ``gmail_emails``."""
+    account_id = request.session.get('gmail_account_id')
+    if not account_id:
+        return Response({'error': 'Not authenticated'}, status=status.HTTP_401_UNAUTHORIZED)
+
+    threads = EmailThread.objects.filter(account_id=account_id)
+    return _paginated(
+        request,
+        lambda cursor, limit: paginate_by_recency(threads, 'last_message_at', cursor, limit),
+        EmailThreadSerializer,
+    )
+
+
+@api_view(['GET'])
+def gmail_thread_detail(request, pk):
+    """Get one conversation with its messages, oldest first."""
+    account_id = request.session.get('gmail_account_id')
+    if not account_id:
+        return Response({'error': 'Not authenticated'}, status=status.HTTP_401_UNAUTHORIZED)
+
+    thread = EmailThread.objects.filter(account_id=account_id, pk=pk).first()
+    if not thread:
+        return Response({'error': 'Thread not found'}, status=status.HTTP_404_NOT_FOUND)
+
+    messages = EmailMessage.objects.filter(
+        account_id=account_id, thread_id=thread.thread_id
+    ).defer('body_text').order_by('received_at', 'id')
+    data = EmailThreadSerializer(thread).data
+    data['messages'] = EmailMessageSerializer(messages, many=True).data
+    return Response(data)
 
 
 @api_view(['POST'])
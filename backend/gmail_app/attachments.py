@@ -0,0 +1,104 @@
+import base64
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+from typing import Iterable
+
+from django.conf import settings
+from django.utils import timezone
+
+from .gmail_client import iter_attachment_parts, stream_attachment
+from .models import EmailAttachment
+
+# Rows per INSERT statement when recording attachment metadata.
+RECORD_BATCH_SIZE = 500
+
+
+def attachment_root() -> Path:
+    return Path(settings.GMAIL_ATTACHMENT_ROOT)
+
+
+def blob_path(sha256: str) -> Path:
+    """Where content with this digest is stored, fanned out so no directory grows too large."""
+    return attachment_root() / sha256[:2] / sha256[2:4] / sha256
+
+
+def write_blob(chunks: Iterable[bytes]) -> tuple[str, int]:
+    """Write ``chunks`` to the store under their SHA-256 and return ``(sha256, size)``.
+
+    Chunks are hashed while they are written to a temporary file, which is
+    then moved into place, or dropped if that content is already stored.
+    """
+    root = attachment_root()
+    root.mkdir(parents=True, exist_ok=True)
+    digest = hashlib.sha256()
+    size = 0
+    fd, temp_path = tempfile.mkstemp(dir=root, prefix='.incoming-')
+    try:
+        with os.fdopen(fd, 'wb') as temp_file:
+            for chunk in chunks:
+                digest.update(chunk)
+                temp_file.write(chunk)
+                size += len(chunk)
+        sha256 = digest.hexdigest()
+        path = blob_path(sha256)
+        if path.exists():
+            os.unlink(temp_path)
+        else:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.unlink(temp_path)
+        raise
+    return sha256, size
+
+
+def record_attachments(payloads: dict[int, dict]) -> None:
+    """Store metadata for the attachments in full payloads keyed by ``EmailMessage`` PK."""
+    rows = [
+        EmailAttachment(
+            message_id=message_pk,
+            part_id=part.part_id,
+            attachment_id=part.attachment_id,
+            filename=part.filename[:255],
+            mime_type=part.mime_type[:255],
+            size=part.size,
+        )
+        for message_pk, detail in payloads.items()
+        for part in iter_attachment_parts(detail.get('payload', {}))
+    ]
+    # Gmail hands out a new attachment ID each time a message is fetched, so refresh it
+    EmailAttachment.objects.bulk_create(
+        rows,
+        batch_size=RECORD_BATCH_SIZE,
+        update_conflicts=True,
+        unique_fields=['message', 'part_id'],
+        update_fields=['attachment_id', 'filename', 'mime_type'],
+    )
+
+
+def download_attachment(attachment: EmailAttachment, access_token: str) -> Path:
+    """Download an attachment into the store unless it is already there; returns its path."""
+    if attachment.is_downloaded and blob_path(attachment.sha256).exists():
+        return blob_path(attachment.sha256)
+
+    if attachment.attachment_id:
+        chunks = stream_attachment(
+            access_token, attachment.message.gmail_message_id, attachment.attachment_id,
+        )
+    else:
+        chunks = [_inline_data(attachment)]
+    attachment.sha256, attachment.size = write_blob(chunks)
+    attachment.downloaded_at = timezone.now()
+    attachment.save(update_fields=['sha256', 'size', 'downloaded_at'])
+    return blob_path(attachment.sha256)
+
+
+def _inline_data(attachment: EmailAttachment) -> bytes:
+    # Small attachments come inside the stored payload rather than by ID
+    for part in iter_attachment_parts(attachment.message.raw_payload.get('payload', {})):
+        if part.part_id == attachment.part_id:
+            return base64.urlsafe_b64decode(part.data + '=' * (-len(part.data) % 4))
+    raise ValueError(f'Attachment {attachment.pk} is no longer in its message payload.')
@@ -0,0 +1,217 @@
+import re
+
+from django.db.models import TextField, Value
+from django.db.models.functions import Coalesce, NullIf, Substr
+
+from .linking import link_messages
+from .models import EmailMessage, GmailAccount, JobApplicationEmail
+from .senders import (
+    company_from_domain,
+    is_ats_domain,
+    is_employer_domain,
+    parse_sender,
+    registrable_domain,
+)
+
+# Messages read and classified per query.
+CLASSIFY_BATCH_SIZE = 5000
+# Leading body text read per message; the status phrases sit near the top of the mail.
+CLASSIFY_TEXT_CHARS = 1000
+
+# One alternation per status, compiled into a single pattern so each message is
+# scanned once. Patterns are lower case and matched against lower-cased text,
+# which is much faster than IGNORECASE. ``context`` only marks job-search mail.
+STATUS_PATTERNS = {
+    JobApplicationEmail.STATUS_OFFER: (
+        r"offer\s+(?:letter|of\s+employment)|pleased\s+to\s+(?:offer|extend)"
+        r"|(?:job|employment|verbal|written)\s+offer|extend\s+(?:you\s+)?an\s+offer"
+    ),
+    JobApplicationEmail.STATUS_REJECTION: (
+        r"unfortunately|regret\s+to\s+inform|not\s+(?:be\s+)?mov(?:e|ing)\s+forward"
+        r"|(?:decided|chosen)\s+to\s+(?:move|proceed|pursue|go)\s+(?:forward\s+)?with\s+other"
+        r"|other\s+candidates|no\s+longer\s+(?:being\s+)?consider|position\s+has\s+been\s+filled"
+    ),
+    JobApplicationEmail.STATUS_INTERVIEW: (
+        r"interview|phone\s+screen|schedule\s+(?:a\s+)?(?:call|time|chat)"
+        r"|(?:coding|technical|online)\s+(?:challenge|assessment)|take[\s-]home|on-?site"
+    ),
+    JobApplicationEmail.STATUS_APPLIED: (
+        r"thanks?(?:\s+you)?\s+for\s+(?:your\s+)?(?:applying|application|interest\s+in)"
+        r"|application\s+(?:received|submitted|confirmation)|received\s+your\s+application"
+        r"|your\s+application\s+(?:to|for|with|has\s+been)|successfully\s+(?:applied|submitted)"
+    ),
+    'context': (
+        r"applica(?:tion|nt)s?|applying|applied|positions?|roles?|candida(?:te|cy)"
+        r"|recruit(?:er|ing|ment)|hiring|careers?|talent\s+acquisition"
+    ),
+}
+STATUS_PRIORITY = [
+    JobApplicationEmail.STATUS_OFFER,
+    JobApplicationEmail.STATUS_REJECTION,
+    JobApplicationEmail.STATUS_INTERVIEW,
+    JobApplicationEmail.STATUS_APPLIED,
+]
+STATUS_RE = re.compile(
+    '|'.join(rf'\b(?P<{name}>{pattern})' for name, pattern in STATUS_PATTERNS.items())
+)
+
+_NAME = r"[A-Z][\w&.'+-]*(?:\s+(?:[A-Z][\w&.'+-]*|&|of|and))*?"
+COMPANY_RE = re.compile(
+    rf"\b(?:at|with|to|from|join)\s+(?P<company>{_NAME})"
+    r"(?=\s*(?:[!.,:;|()–-]|$|\s+(?:for|is|has|and|team|about|regarding)\b))"
+)
+POSITION_RE = re.compile(
+    rf"\b(?:for|as)\s+(?:the\s+|an?\s+|our\s+)?(?P<before>{_NAME})\s+(?:position|role|opening|job)\b"
+    rf"|\b(?:position|role|job)\s*(?::|-|–|of)\s*(?P<after>{_NAME})(?=\s*(?:[!.,:;|()–-]|$|\s+at\b))"
+    rf"|\bapplication\s+(?:for|to)\s+(?:the\s+)?(?P<applied>{_NAME})\s+(?:at|with|-|–)\s"
+)
+_SENDER_NOISE_RE = re.compile(
+    r'\b(?:recruiting|recruitment|recruiter|talent(?:\s+acquisition)?|careers?|jobs?|hiring'
+    r'|team|hr|people|no-?reply|notifications?|via\s+\w+)\b',
+    re.IGNORECASE,
+)
+
+
+def classify_new_messages(account: GmailAccount, access_token: str | None = None) -> int:
+    """Classify and link the account's messages stored since the last run; returns rows created.
+
+    Messages are read in ID order in large batches and the account's
+    ``classified_through_id`` advances after each one, so every message is
+    examined once however often this runs. Each batch is also linked to
+    matching job applications. The start of the stored body text is read
+    where there is one, and the Gmail snippet otherwise.
+
+    With ``access_token``, messages synced in metadata format whose subject
+    and snippet already look like job mail have their bodies fetched first,
+    so only those candidates cost a download, and are classified on the body.
+    """
+    text = Coalesce(
+        NullIf(Substr('body_text', 1, CLASSIFY_TEXT_CHARS), Value('')), 'snippet',
+        output_field=TextField(),
+    )
+    created = 0
+    last_id = account.classified_through_id
+    while True:
+        batch = list(
+            EmailMessage.objects.filter(account=account, id__gt=last_id)
+            .order_by('id')
+            .values_list('id', 'subject', 'sender', text, 'sender_domain', 'payload_format')[:CLASSIFY_BATCH_SIZE]
+        )
+        if not batch:
+            break
+
+        results = {}
+        candidates = []
+        for message_id, subject, sender, body, _, payload_format in batch:
+            results[message_id] = classify_message(subject, sender, body)
+            if results[message_id] and payload_format != GmailAccount.SYNC_FORMAT_FULL:
+                candidates.append(message_id)
+        if access_token and candidates:
+            results.update(_classify_hydrated(account, access_token, candidates))
+
+        rows = []
+        links = []
+        for message_id, _, _, _, domain, _ in batch:
+            result = results[message_id]
+            if result:
+                rows.append((message_id, result['company_name'], result['position_title'], result['status']))
+            links.append((message_id, domain, result['company_name'] if result else ''))
+        created += insert_results(rows)
+        link_messages(links)
+
+        last_id = batch[-1][0]
+        GmailAccount.objects.filter(pk=account.pk).update(classified_through_id=last_id)
+        account.classified_through_id = last_id
+    return created
+
+
+def _classify_hydrated(account: GmailAccount, access_token: str, message_ids: list[int]) -> dict:
+    # Imported here: sync imports this module to classify what it stores
+    from .sync import hydrate_messages
+
+    messages = hydrate_messages(account, access_token, list(EmailMessage.objects.filter(pk__in=message_ids)))
+    return {
+        message.pk: classify_message(
+            message.subject, message.sender, message.body_text[:CLASSIFY_TEXT_CHARS] or message.snippet,
+        )
+        for message in messages
+        if message.is_hydrated
+    }
+
+
+def insert_results(rows: list[tuple[int, str, str, str]]) -> int:
+    """Insert ``(message_id, company, position, status)`` rows, skipping classified messages.
+
+    Returns the rows actually inserted, which leaves out those skipped as
+    already classified; the driver's row count is not reliable for ignored
+    conflicts, so the stored results are counted before and after.
+    """
+    if not rows:
+        return 0
+    stored = JobApplicationEmail.objects.filter(message_id__in=[row[0] for row in rows])
+    before = stored.count()
+    JobApplicationEmail.objects.bulk_create(
+        [
+            JobApplicationEmail(message_id=message_id, company_name=company, position_title=position, status=status)
+            for message_id, company, position, status in rows
+        ],
+        batch_size=CLASSIFY_BATCH_SIZE,
+        ignore_conflicts=True,
+    )
+    return stored.count() - before
+
+
+def reset_classification(account: GmailAccount) -> None:
+    """Forget earlier results so the next run reclassifies the whole mailbox."""
+    JobApplicationEmail.objects.filter(message__account=account).delete()
+    GmailAccount.objects.filter(pk=account.pk).update(classified_through_id=0)
+    account.classified_through_id = 0
+
+
+def classify_message(subject: str, sender: str, snippet: str) -> dict | None:
+    """Return ``JobApplicationEmail`` field values, or ``None`` for unrelated mail."""
+    text = f'{subject}\n{snippet}'.lower()
+    found = {match.lastgroup for match in STATUS_RE.finditer(text)}
+    display_name, domain = parse_sender(sender)
+    domain = registrable_domain(domain)
+    from_ats = is_ats_domain(domain)
+
+    job_status = next((name for name in STATUS_PRIORITY if name in found), None)
+    if job_status is None:
+        if not from_ats:
+            return None
+        job_status = JobApplicationEmail.STATUS_OTHER
+    elif not (from_ats or 'context' in found or job_status in (
+        JobApplicationEmail.STATUS_APPLIED, JobApplicationEmail.STATUS_OFFER,
+    )):
+        # A lone "unfortunately" or "interview" is not enough on its own
+        return None
+
+    return {
+        'status': job_status,
+        'company_name': extract_company(subject, snippet, display_name, domain)[:255],
+        'position_title': extract_position(subject, snippet)[:255],
+    }
+
+
+def extract_company(subject: str, snippet: str, display_name: str, domain: str) -> str:
+    if is_employer_domain(domain):
+        return company_from_domain(domain)
+    for text in (subject, snippet):
+        match = COMPANY_RE.search(text)
+        if match:
+            return _clean_name(match.group('company'))
+    name = _SENDER_NOISE_RE.sub(' ', display_name)
+    return ' '.join(name.replace('@', ' ').split()).strip(' -|,')
+
+
+def extract_position(subject: str, snippet: str) -> str:
+    for text in (subject, snippet):
+        match = POSITION_RE.search(text)
+        if match:
+            return _clean_name(match.group('before') or match.group('after') or match.group('applied'))
+    return ''
+
+
+def _clean_name(name: str) -> str:
+    return name.strip().rstrip(".'&+-").rstrip()
@@ -0,0 +1,406 @@
+"""Local stand-in for the Gmail and Google OAuth endpoints used by ``gmail_client``.
+
+It serves a synthetic mailbox, or replays recorded ``messages.get`` responses,
+with configurable latency and injected 5xx and 429 responses, so sync can be
+run and benchmarked without Google credentials. Start it with
+``manage.py fake_gmail_server`` and point the Google URL settings at it.
+"""
+import base64
+import copy
+import json
+import random
+import secrets
+import threading
+import time
+import urllib.parse
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from email.parser import BytesParser
+from email.utils import format_datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from .gmail_client import (
+    GMAIL_BATCH_PATH,
+    GMAIL_HISTORY_PATH,
+    GMAIL_MESSAGES_PATH,
+    GMAIL_PROFILE_PATH,
+)
+
+FAKE_ACCESS_TOKEN = 'fake-access-token'
+FAKE_AUTH_CODE = 'fake-auth-code'
+CONTROL_PREFIX = '/_fake'
+
+# Oldest history kept, in messages; older ``startHistoryId`` values get a 404 like Gmail's.
+HISTORY_RETENTION = 10_000
+# Every Nth synthetic message carries a PDF attachment.
+ATTACHMENT_EVERY = 10
+FIRST_MESSAGE_AT = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+COMPANIES = ['Acme', 'Globex', 'Initech', 'Umbrella', 'Hooli', 'Stark Industries', 'Wayne Enterprises']
+POSITIONS = ['Software Engineer', 'Data Analyst', 'Product Manager', 'Backend Developer']
+SUBJECTS = [
+    'Thank you for applying to {company}',
+    'Interview invitation: {position} at {company}',
+    'Update on your application to {company}',
+    'Your {company} offer letter',
+    'Weekly newsletter #{index}',
+    'Re: lunch on Friday?',
+    'Your receipt #{index}',
+]
+BODIES = [
+    'Thanks for your application for the {position} role at {company}. Our team will review it shortly.',
+    'We would like to schedule an interview for the {position} position. Please pick a time that suits you.',
+    'Unfortunately we have decided to move forward with other candidates for the {position} role.',
+    'We are pleased to offer you the {position} position at {company}. Your offer letter is attached.',
+    'Here is what happened this week. Read on for updates, events and more.',
+    'Are you free for lunch on Friday? Let me know.',
+    'Thanks for your purchase. Your order will ship soon.',
+]
+
+
+@dataclass
+class FaultConfig:
+    latency_ms: float = 0
+    error_rate: float = 0
+    throttle_rate: float = 0
+
+
+class FakeMailbox:
+    """Mailbox whose messages are built on demand from their index, oldest first.
+
+    With ``fixtures`` (recorded full-format ``messages.get`` responses) those are
+    replayed in turn instead, under new IDs once they run out. Message ``i`` is
+    added at history ID ``i + 1``.
+    """
+
+    def __init__(self, size: int, email: str = 'benchmark@example.com', fixtures: list[dict] | None = None):
+        self.size = size
+        self.email = email
+        self.fixtures = fixtures or []
+        self.fixture_indexes = {fixture['id']: index for index, fixture in enumerate(self.fixtures)}
+        self.lock = threading.Lock()
+
+    def add_messages(self, count: int) -> int:
+        with self.lock:
+            self.size += count
+            return self.size
+
+    @property
+    def history_id(self) -> str:
+        return str(self.size)
+
+    def message_id(self, index: int) -> str:
+        if index < len(self.fixtures):
+            return self.fixtures[index]['id']
+        return f'{index:016x}'
+
+    def index_of(self, message_id: str) -> int | None:
+        if message_id in self.fixture_indexes:
+            return self.fixture_indexes[message_id]
+        try:
+            index = int(message_id, 16)
+        except ValueError:
+            return None
+        return index if len(self.fixtures) <= index < self.size else None
+
+    def list_page(self, page_token: str | None, max_results: int) -> dict:
+        start = int(page_token or 0)
+        newest = self.size - 1 - start
+        indexes = range(newest, max(-1, newest - max_results), -1)
+        response = {
+            'messages': [{'id': self.message_id(i), 'threadId': self._thread_id(i)} for i in indexes],
+            'resultSizeEstimate': self.size,
+        }
+        if newest - max_results >= 0:
+            response['nextPageToken'] = str(start + max_results)
+        return response
+
+    def history_since(self, start_history_id: int) -> dict | None:
+        if start_history_id < self.size - HISTORY_RETENTION:
+            return None
+        return {
+            'history': [
+                {'id': str(i + 1), 'messagesAdded': [{'message': {'id': self.message_id(i)}}]}
+                for i in range(max(start_history_id, 0), self.size)
+            ],
+            'historyId': self.history_id,
+        }
+
+    def message(self, index: int, message_format: str, metadata_headers: list[str]) -> dict:
+        message = self._full_message(index)
+        if message_format == 'metadata':
+            wanted = {name.lower() for name in metadata_headers}
+            headers = message['payload'].get('headers', [])
+            message['payload'] = {
+                'headers': [h for h in headers if not wanted or h['name'].lower() in wanted],
+            }
+        return message
+
+    def attachment_data(self, index: int) -> bytes:
+        return (b'%PDF-1.4\n% synthetic attachment\n' * 64) + str(index % 7).encode()
+
+    def _thread_id(self, index: int) -> str:
+        if index < len(self.fixtures):
+            return self.fixtures[index].get('threadId', '')
+        return f't{index // 3:015x}'
+
+    def _full_message(self, index: int) -> dict:
+        if self.fixtures:
+            message = copy.deepcopy(self.fixtures[index % len(self.fixtures)])
+            message['id'] = self.message_id(index)
+            message['threadId'] = self._thread_id(index) or message['id']
+            message['historyId'] = str(index + 1)
+            return message
+
+        company = COMPANIES[index % len(COMPANIES)]
+        position = POSITIONS[index % len(POSITIONS)]
+        kind = index % len(SUBJECTS)
+        subject = SUBJECTS[kind].format(company=company, position=position, index=index)
+        body = BODIES[kind].format(company=company, position=position)
+        received = FIRST_MESSAGE_AT + timedelta(minutes=index)
+        domain = company.lower().replace(' ', '') + '.com'
+        parts = [
+            {'partId': '0', 'mimeType': 'text/plain', 'filename': '', 'body': _encoded_body(body.encode())},
+            {
+                'partId': '1',
+                'mimeType': 'text/html',
+                'filename': '',
+                'body': _encoded_body(f'<html><body><p>{body}</p></body></html>'.encode()),
+            },
+        ]
+        if index % ATTACHMENT_EVERY == 0:
+            parts.append({
+                'partId': '2',
+                'mimeType': 'application/pdf',
+                'filename': f'{company} letter.pdf',
+                'body': {'attachmentId': f'att-{index:x}', 'size': len(self.attachment_data(index))},
+            })
+        return {
+            'id': self.message_id(index),
+            'threadId': self._thread_id(index),
+            'labelIds': ['INBOX'],
+            'snippet': body[:120],
+            'historyId': str(index + 1),
+            'internalDate': str(int(received.timestamp() * 1000)),
+            'sizeEstimate': 2048,
+            'payload': {
+                'mimeType': 'multipart/mixed',
+                'headers': [
+                    {'name': 'Subject', 'value': subject},
+                    {'name': 'From', 'value': f'{company} Careers <careers@{domain}>'},
+                    {'name': 'To', 'value': self.email},
+                    {'name': 'Date', 'value': format_datetime(received)},
+                ],
+                'parts': parts,
+            },
+        }
+
+
+def _encoded_body(data: bytes) -> dict:
+    return {'size': len(data), 'data': base64.urlsafe_b64encode(data).decode().rstrip('=')}
+
+
+class FakeGmailServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], mailbox: FakeMailbox, faults: FaultConfig, seed: int | None = None):
+        super().__init__(address, FakeGmailHandler)
+        self.mailbox = mailbox
+        self.faults = faults
+        self.random = random.Random(seed)
+        self.random_lock = threading.Lock()
+        self.stats = {'requests': 0, 'batch_items': 0, 'throttled': 0, 'errors': 0}
+        self.stats_lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def setting_overrides(self) -> dict:
+        """Settings that point ``gmail_client`` at this server."""
+        return {
+            'GMAIL_API_BASE_URL': self.base_url,
+            'GOOGLE_AUTH_URL': f'{self.base_url}/o/oauth2/v2/auth',
+            'GOOGLE_TOKEN_URL': f'{self.base_url}/token',
+            'GOOGLE_USERINFO_URL': f'{self.base_url}/oauth2/v2/userinfo',
+        }
+
+    def count(self, key: str, amount: int = 1) -> None:
+        with self.stats_lock:
+            self.stats[key] += amount
+
+    def injected_fault(self) -> int | None:
+        """Status of an injected failure for one call, or ``None`` to answer normally."""
+        with self.random_lock:
+            roll = self.random.random()
+        if roll < self.faults.throttle_rate:
+            self.count('throttled')
+            return 429
+        if roll < self.faults.throttle_rate + self.faults.error_rate:
+            self.count('errors')
+            return 503
+        return None
+
+    def respond(self, method: str, target: str, body: bytes = b'', content_type: str = '') -> tuple[int, dict, bytes]:
+        """Answer one request: ``(status, headers, body)``."""
+        url = urllib.parse.urlsplit(target)
+        query = urllib.parse.parse_qs(url.query)
+        path = url.path
+
+        if path.startswith(CONTROL_PREFIX):
+            return self._control(method, path[len(CONTROL_PREFIX):], query)
+        if method == 'POST' and path == GMAIL_BATCH_PATH:
+            return self._batch(content_type, body)
+        fault = self.injected_fault()
+        if fault:
+            return _json_response(fault, {'error': {'code': fault, 'message': 'Injected failure'}})
+        if method == 'POST' and path == '/token':
+            return _json_response(200, {
+                'access_token': FAKE_ACCESS_TOKEN,
+                'refresh_token': 'fake-refresh-token',
+                'expires_in': 3600,
+                'scope': 'https://www.googleapis.com/auth/gmail.readonly',
+                'token_type': 'Bearer',
+            })
+        if method == 'GET' and path == '/o/oauth2/v2/auth':
+            redirect = query.get('redirect_uri', [''])[0]
+            params = urllib.parse.urlencode({'code': FAKE_AUTH_CODE, 'state': query.get('state', [''])[0]})
+            return 302, {'Location': f'{redirect}?{params}'}, b''
+        if method == 'GET' and path == '/oauth2/v2/userinfo':
+            return _json_response(200, {'email': self.mailbox.email, 'verified_email': True})
+        if method == 'GET':
+            return self._gmail_get(path, query)
+        return _json_response(404, {'error': {'code': 404, 'message': 'Not found'}})
+
+    def _gmail_get(self, path: str, query: dict) -> tuple[int, dict, bytes]:
+        mailbox = self.mailbox
+        if path == GMAIL_PROFILE_PATH:
+            return _json_response(200, {
+                'emailAddress': mailbox.email,
+                'messagesTotal': mailbox.size,
+                'threadsTotal': (mailbox.size + 2) // 3,
+                'historyId': mailbox.history_id,
+            })
+        if path == GMAIL_MESSAGES_PATH:
+            max_results = min(int(query.get('maxResults', ['100'])[0]), 500)
+            return _json_response(200, mailbox.list_page(query.get('pageToken', [None])[0], max_results))
+        if path == GMAIL_HISTORY_PATH:
+            history = mailbox.history_since(int(query.get('startHistoryId', ['0'])[0]))
+            if history is None:
+                return _json_response(404, {'error': {'code': 404, 'message': 'Requested entity was not found.'}})
+            return _json_response(200, history)
+        if path.startswith(GMAIL_MESSAGES_PATH + '/'):
+            segments = [urllib.parse.unquote(s) for s in path[len(GMAIL_MESSAGES_PATH) + 1:].split('/')]
+            index = mailbox.index_of(segments[0])
+            if index is None:
+                return _json_response(404, {'error': {'code': 404, 'message': 'Requested entity was not found.'}})
+            if len(segments) == 3 and segments[1] == 'attachments':
+                data = mailbox.attachment_data(index)
+                return _json_response(200, {'data': base64.urlsafe_b64encode(data).decode().rstrip('=')})
+            if len(segments) == 1:
+                message_format = query.get('format', ['full'])[0]
+                return _json_response(200, mailbox.message(index, message_format, query.get('metadataHeaders', [])))
+        return _json_response(404, {'error': {'code': 404, 'message': 'Not found'}})
+
+    def _batch(self, content_type: str, body: bytes) -> tuple[int, dict, bytes]:
+        # Like Gmail, a throttled batch may still answer some calls: faults are rolled per call
+        boundary = f'batch_{secrets.token_hex(12)}'
+        request = BytesParser().parsebytes(f'Content-Type: {content_type}\r\n\r\n'.encode('utf-8') + body)
+        parts = []
+        for part in request.get_payload() if request.is_multipart() else []:
+            request_line = (part.get_payload() or '').strip().split('\r\n')[0].split('\n')[0]
+            _, _, target = request_line.partition(' ')
+            target = target.rsplit(' HTTP/', 1)[0]
+            self.count('batch_items')
+            status, _, item_body = self.respond('GET', target)
+            content_id = part.get('Content-ID', '').strip('<> ')
+            parts.append(
+                f'--{boundary}\r\n'
+                'Content-Type: application/http\r\n'
+                f'Content-ID: <response-{content_id}>\r\n'
+                '\r\n'
+                f'HTTP/1.1 {status} {_reason(status)}\r\n'
+                'Content-Type: application/json; charset=UTF-8\r\n'
+                '\r\n'
+                f'{item_body.decode("utf-8")}\r\n'
+            )
+        payload = (''.join(parts) + f'--{boundary}--\r\n').encode('utf-8')
+        return 200, {'Content-Type': f'multipart/mixed; boundary={boundary}'}, payload
+
+    def _control(self, method: str, path: str, query: dict) -> tuple[int, dict, bytes]:
+        if method == 'POST' and path == '/messages':
+            size = self.mailbox.add_messages(int(query.get('count', ['1'])[0]))
+            return _json_response(200, {'messagesTotal': size, 'historyId': self.mailbox.history_id})
+        if method == 'GET' and path == '/stats':
+            with self.stats_lock:
+                return _json_response(200, dict(self.stats, messagesTotal=self.mailbox.size))
+        return _json_response(404, {'error': {'code': 404, 'message': 'Not found'}})
+
+
+class FakeGmailHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server: FakeGmailServer
+
+    def do_GET(self):
+        self._handle('GET')
+
+    def do_POST(self):
+        self._handle('POST')
+
+    def _handle(self, method: str) -> None:
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length) if length else b''
+        server = self.server
+        if not self.path.startswith(CONTROL_PREFIX):
+            server.count('requests')
+            if server.faults.latency_ms:
+                time.sleep(server.faults.latency_ms / 1000)
+        status, headers, payload = server.respond(method, self.path, body, self.headers.get('Content-Type', ''))
+        self.send_response(status)
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def _json_response(status: int, data: dict) -> tuple[int, dict, bytes]:
+    return status, {'Content-Type': 'application/json; charset=UTF-8'}, json.dumps(data).encode('utf-8')
+
+
+def _reason(status: int) -> str:
+    return {200: 'OK', 404: 'Not Found', 429: 'Too Many Requests', 503: 'Service Unavailable'}.get(status, '')
+
+
+def load_fixtures(path: str) -> list[dict]:
+    """Read recorded ``messages.get`` responses: a JSON list, or one message object per line."""
+    with open(path, encoding='utf-8') as fixture_file:
+        text = fixture_file.read().strip()
+    if text.startswith('['):
+        return json.loads(text)
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+
+def build_server(
+    host: str = '127.0.0.1',
+    port: int = 0,
+    messages: int = 1000,
+    faults: FaultConfig | None = None,
+    fixtures_path: str | None = None,
+    seed: int | None = None,
+) -> FakeGmailServer:
+    fixtures = load_fixtures(fixtures_path) if fixtures_path else None
+    mailbox = FakeMailbox(max(messages, len(fixtures or [])), fixtures=fixtures)
+    return FakeGmailServer((host, port), mailbox, faults or FaultConfig(), seed=seed)
+
+
+def serve(ready=None, **kwargs) -> None:
+    """Run a server until the process is stopped, first putting its setting overrides on ``ready``."""
+    server = build_server(**kwargs)
+    if ready is not None:
+        ready.put(server.setting_overrides())
+    server.serve_forever()
@@ -0,0 +1,212 @@
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from .gmail_client import GMAIL_BATCH_SIZE, RETRYABLE_STATUSES, gmail_api_batch_get, message_get_path
+from .models import GmailAccount
+
+logger = logging.getLogger(__name__)
+
+# Gmail meters each user in quota units; see the per-method costs in the API docs.
+QUOTA_UNITS_PER_SECOND = 250
+MESSAGES_GET_UNITS = 5
+MESSAGES_LIST_UNITS = 5
+HISTORY_LIST_UNITS = 2
+PROFILE_UNITS = 1
+
+MAX_RETRIES = 5
+BACKOFF_BASE_SECONDS = 0.5
+BACKOFF_MAX_SECONDS = 32
+
+
+class TokenBucket:
+    """Blocking token bucket refilled at ``rate`` units per second.
+
+    ``clock`` and ``sleep`` default to the real ones and can be swapped in tests.
+    """
+
+    def __init__(self, rate: float, capacity: float | None = None, clock=time.monotonic, sleep=time.sleep):
+        self.rate = rate
+        self.capacity = capacity or rate
+        self.tokens = self.capacity
+        self.clock = clock
+        self.sleep = sleep
+        self.updated = clock()
+        self.lock = threading.Lock()
+
+    def acquire(self, units: float) -> None:
+        units = min(units, self.capacity)
+        while True:
+            with self.lock:
+                now = self.clock()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= units:
+                    self.tokens -= units
+                    return
+                wait = (units - self.tokens) / self.rate
+            self.sleep(wait)
+
+    def drain(self) -> None:
+        """Empty the bucket, e.g. after Gmail reports the quota is exhausted."""
+        with self.lock:
+            self.tokens = 0
+            self.updated = self.clock()
+
+
+class AdaptiveLimiter:
+    """Caps in-flight requests, halving the cap when throttled and regrowing it on success."""
+
+    def __init__(self, max_limit: int):
+        self.max_limit = max(1, max_limit)
+        self.limit = self.max_limit
+        self.in_flight = 0
+        self.successes = 0
+        self.condition = threading.Condition()
+
+    def __enter__(self):
+        with self.condition:
+            while self.in_flight >= self.limit:
+                self.condition.wait()
+            self.in_flight += 1
+        return self
+
+    def __exit__(self, *exc_info):
+        with self.condition:
+            self.in_flight -= 1
+            self.condition.notify()
+
+    def record_success(self) -> None:
+        with self.condition:
+            self.successes += 1
+            if self.limit < self.max_limit and self.successes >= self.limit:
+                self.limit += 1
+                self.successes = 0
+                self.condition.notify()
+
+    def record_throttle(self) -> None:
+        with self.condition:
+            self.limit = max(1, self.limit // 2)
+            self.successes = 0
+
+
+_quota_buckets: dict[int, TokenBucket] = {}
+_quota_buckets_lock = threading.Lock()
+
+
+def get_quota_bucket(account_id: int) -> TokenBucket:
+    """Return the process-wide quota bucket shared by every sync of one account."""
+    with _quota_buckets_lock:
+        bucket = _quota_buckets.get(account_id)
+        if bucket is None:
+            bucket = _quota_buckets[account_id] = TokenBucket(QUOTA_UNITS_PER_SECOND)
+        return bucket
+
+
+def set_quota_rate(account_id: int, units_per_second: float) -> None:
+    """Replace an account's quota bucket, e.g. to benchmark against a server without Gmail's limits."""
+    with _quota_buckets_lock:
+        _quota_buckets[account_id] = TokenBucket(units_per_second)
+
+
+def backoff_delay(attempt: int) -> float:
+    """Exponential backoff with full jitter."""
+    return random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt))
+
+
+def is_retryable(exc: Exception) -> bool:
+    if isinstance(exc, requests.HTTPError):
+        return exc.response is not None and exc.response.status_code in RETRYABLE_STATUSES
+    return isinstance(exc, (requests.ConnectionError, requests.Timeout))
+
+
+class GmailFetchEngine:
+    """Runs Gmail calls for one account concurrently, within its quota.
+
+    Throttled and 5xx responses are retried with backoff instead of aborting the
+    sync; messages that still fail are reported back to the caller.
+    """
+
+    def __init__(self, account: GmailAccount, access_token: str):
+        self.access_token = access_token
+        self.bucket = get_quota_bucket(account.pk)
+        self.limiter = AdaptiveLimiter(account.sync_concurrency)
+
+    def call(self, func, *args, units: int, **kwargs):
+        """Call a ``gmail_client`` function, retrying throttled or failed attempts."""
+        for attempt in range(MAX_RETRIES + 1):
+            self.bucket.acquire(units)
+            try:
+                with self.limiter:
+                    result = func(*args, **kwargs)
+            except Exception as exc:
+                if not is_retryable(exc) or attempt == MAX_RETRIES:
+                    raise
+                self._throttled()
+                time.sleep(backoff_delay(attempt))
+                continue
+            self.limiter.record_success()
+            return result
+
+    def fetch_messages(
+        self,
+        message_ids: list[str],
+        params: dict | None = None,
+        batch_size: int = GMAIL_BATCH_SIZE,
+    ) -> tuple[dict[str, dict], list[str]]:
+        """Fetch ``messages.get`` for many IDs as concurrent batch requests.
+
+        Returns ``({message_id: detail}, failed_ids)``. Messages Gmail answers with
+        a permanent error, such as 404 after a delete, are dropped silently.
+        """
+        chunks = [message_ids[i:i + batch_size] for i in range(0, len(message_ids), batch_size)]
+        details: dict[str, dict] = {}
+        failed: list[str] = []
+        if not chunks:
+            return details, failed
+
+        with ThreadPoolExecutor(max_workers=min(self.limiter.max_limit, len(chunks))) as pool:
+            for chunk_details, chunk_failed in pool.map(lambda c: self._fetch_chunk(c, params), chunks):
+                details.update(chunk_details)
+                failed.extend(chunk_failed)
+        return details, failed
+
+    def _fetch_chunk(self, message_ids: list[str], params: dict | None) -> tuple[dict, list]:
+        details = {}
+        pending = message_ids
+        for attempt in range(MAX_RETRIES + 1):
+            paths = [message_get_path(message_id, params) for message_id in pending]
+            try:
+                results = self.call(
+                    gmail_api_batch_get, paths, self.access_token,
+                    units=MESSAGES_GET_UNITS * len(pending),
+                )
+            except Exception as exc:
+                if not is_retryable(exc):
+                    raise
+                logger.warning('Gmail batch of %d messages failed after retries: %s', len(pending), exc)
+                return details, pending
+
+            retry = []
+            for message_id, (status, body) in zip(pending, results):
+                if 200 <= status < 300:
+                    details[message_id] = body
+                elif status in RETRYABLE_STATUSES or status == 0:
+                    retry.append(message_id)
+            if not retry:
+                return details, []
+            if attempt < MAX_RETRIES:
+                self._throttled()
+                time.sleep(backoff_delay(attempt))
+            pending = retry
+
+        logger.warning('Gave up on %d Gmail messages after %d attempts', len(pending), MAX_RETRIES + 1)
+        return details, pending
+
+    def _throttled(self) -> None:
+        self.limiter.record_throttle()
+        self.bucket.drain()
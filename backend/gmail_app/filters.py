@@ -0,0 +1,22 @@
+from django_filters import rest_framework as filters
+
+from .models import EmailMessage, JobApplicationEmail
+
+
+class EmailMessageFilter(filters.FilterSet):
+    sender = filters.CharFilter(field_name='sender', lookup_expr='icontains')
+    domain = filters.CharFilter(method='filter_domain')
+    received_after = filters.IsoDateTimeFilter(field_name='received_at', lookup_expr='gte')
+    received_before = filters.IsoDateTimeFilter(field_name='received_at', lookup_expr='lt')
+    status = filters.ChoiceFilter(
+        field_name='job_application__status',
+        choices=JobApplicationEmail.STATUS_CHOICES,
+    )
+    application = filters.NumberFilter(field_name='application_id')
+
+    class Meta:
+        model = EmailMessage
+        fields = []
+
+    def filter_domain(self, queryset, name, value):
+        return queryset.filter(sender_domain=value.strip().lower())
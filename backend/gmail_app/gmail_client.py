@@ -1,15 +1,81 @@
+import base64
+import html
 import json
+import re
+import secrets
+import threading
 import urllib.parse
-import urllib.request
 from datetime import datetime, timedelta, timezone
+from email.parser import BytesParser
+from typing import Iterable, Iterator, NamedTuple
 
+import requests
 from django.conf import settings
+from requests.adapters import HTTPAdapter
 
 
-GOOGLE_TOKEN_URL = 'https://oauth2.googleapis.com/token'
-GOOGLE_AUTH_URL = 'https://accounts.google.com/o/oauth2/v2/auth'
-GOOGLE_USERINFO_URL = 'https://www.googleapis.com/oauth2/v2/userinfo'
-GMAIL_MESSAGES_URL = 'https://gmail.googleapis.com/gmail/v1/users/me/messages'
+# Paths under settings.GMAIL_API_BASE_URL; the OAuth endpoint URLs are settings too.
+GMAIL_MESSAGES_PATH = '/gmail/v1/users/me/messages'
+GMAIL_HISTORY_PATH = '/gmail/v1/users/me/history'
+GMAIL_PROFILE_PATH = '/gmail/v1/users/me/profile'
+GMAIL_BATCH_PATH = '/batch/gmail/v1'
+
+# Gmail rejects batches above 100 calls and throttles large ones, so default lower.
+GMAIL_BATCH_LIMIT = 100
+GMAIL_BATCH_SIZE = 50
+# Statuses worth retrying; a batch part that never got an answer is reported as status 0.
+RETRYABLE_STATUSES = {429, 500, 502, 503, 504}
+
+MESSAGE_FORMAT_FULL = 'full'
+MESSAGE_FORMAT_METADATA = 'metadata'
+# Headers and response fields kept by metadata syncs; everything list views need.
+METADATA_HEADERS = ['Subject', 'From', 'To', 'Date']
+METADATA_FIELDS = 'id,threadId,labelIds,snippet,historyId,internalDate,sizeEstimate,payload/headers'
+
+# Longest body text kept per message; enough for any real email, bounded for the search index.
+BODY_TEXT_MAX_CHARS = 100_000
+
+# Bytes read from the network per step when streaming an attachment.
+ATTACHMENT_CHUNK_SIZE = 64 * 1024
+
+# (connect, read) timeouts in seconds, so a hung Google endpoint cannot block a worker.
+GOOGLE_API_TIMEOUT = (5, 30)
+# Keep-alive connections kept per host; sized for concurrent sync workers.
+HTTP_POOL_SIZE = 32
+
+_session: requests.Session | None = None
+_session_lock = threading.Lock()
+
+
+def get_http_session() -> requests.Session:
+    """Process-wide session that keeps connections to Google hosts alive."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=HTTP_POOL_SIZE)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                # Google only gzips responses when the user agent also mentions gzip
+                session.headers.update({
+                    'Accept-Encoding': 'gzip',
+                    'User-Agent': 'job-finder/1.0 (gzip)',
+                })
+                _session = session
+    return _session
+
+
+def google_request(method: str, url: str, **kwargs) -> requests.Response:
+    """Send a request through the shared session, raising ``requests.HTTPError`` on 4xx/5xx."""
+    kwargs.setdefault('timeout', GOOGLE_API_TIMEOUT)
+    response = get_http_session().request(method, url, **kwargs)
+    response.raise_for_status()
+    return response
+
+
+def gmail_url(path: str) -> str:
+    return settings.GMAIL_API_BASE_URL.rstrip('/') + path
 
 
 def build_google_auth_url(state: str) -> str:
@@ -22,7 +88,7 @@ def build_google_auth_url(state: str) -> str:
         'prompt': 'consent',
         'state': state,
     }
-    return f'{GOOGLE_AUTH_URL}?{urllib.parse.urlencode(query)}'
+    return f'{settings.GOOGLE_AUTH_URL}?{urllib.parse.urlencode(query)}'
 
 
 def exchange_code_for_tokens(code: str) -> dict:
@@ -33,10 +99,7 @@ def exchange_code_for_tokens(code: str) -> dict:
         'redirect_uri': settings.GOOGLE_REDIRECT_URI,
         'grant_type': 'authorization_code',
     }
-    data = urllib.parse.urlencode(payload).encode('utf-8')
-    request = urllib.request.Request(GOOGLE_TOKEN_URL, data=data, method='POST')
-    with urllib.request.urlopen(request) as response:
-        return json.loads(response.read().decode('utf-8'))
+    return google_request('POST', settings.GOOGLE_TOKEN_URL, data=payload).json()
 
 
 def refresh_access_token(refresh_token: str) -> dict:
@@ -46,30 +109,298 @@ def refresh_access_token(refresh_token: str) -> dict:
         'refresh_token': refresh_token,
         'grant_type': 'refresh_token',
     }
-    data = urllib.parse.urlencode(payload).encode('utf-8')
-    request = urllib.request.Request(GOOGLE_TOKEN_URL, data=data, method='POST')
-    with urllib.request.urlopen(request) as response:
-        return json.loads(response.read().decode('utf-8'))
+    return google_request('POST', settings.GOOGLE_TOKEN_URL, data=payload).json()
 
 
 def get_userinfo(access_token: str) -> dict:
-    request = urllib.request.Request(
-        GOOGLE_USERINFO_URL,
+    return google_request(
+        'GET',
+        settings.GOOGLE_USERINFO_URL,
         headers={'Authorization': f'Bearer {access_token}'},
-    )
-    with urllib.request.urlopen(request) as response:
-        return json.loads(response.read().decode('utf-8'))
+    ).json()
 
 
 def gmail_api_get(url: str, access_token: str, params: dict | None = None) -> dict:
-    if params:
-        url = f'{url}?{urllib.parse.urlencode(params, doseq=True)}'
-    request = urllib.request.Request(
+    return google_request(
+        'GET',
         url,
+        params=params,
         headers={'Authorization': f'Bearer {access_token}'},
+    ).json()
+
+
+class HistoryExpiredError(RuntimeError):
+    """Raised when Gmail no longer has history for the requested ``startHistoryId``."""
+
+
+def stream_attachment(
+    access_token: str,
+    message_id: str,
+    attachment_id: str,
+    chunk_size: int = ATTACHMENT_CHUNK_SIZE,
+) -> Iterator[bytes]:
+    """Yield the decoded bytes of an attachment as ``messages.attachments.get`` downloads them.
+
+    Only the ``data`` field is requested and decoded as it arrives, so memory
+    use stays around ``chunk_size`` however large the attachment is.
+    """
+    url = (
+        f'{gmail_url(GMAIL_MESSAGES_PATH)}/{urllib.parse.quote(message_id)}'
+        f'/attachments/{urllib.parse.quote(attachment_id)}'
+    )
+    response = google_request(
+        'GET',
+        url,
+        params={'fields': 'data'},
+        headers={'Authorization': f'Bearer {access_token}'},
+        stream=True,
+    )
+    with response:
+        yield from decode_data_stream(response.iter_content(chunk_size))
+
+
+_DATA_FIELD_RE = re.compile(rb'"data"\s*:\s*"')
+
+
+def decode_data_stream(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    """Decode the base64url ``data`` string of a ``{"data": "..."}`` JSON body given in pieces."""
+    buffer = b''
+    started = False
+    for chunk in chunks:
+        buffer += chunk
+        if not started:
+            match = _DATA_FIELD_RE.search(buffer)
+            if not match:
+                continue
+            buffer = buffer[match.end():]
+            started = True
+        end = buffer.find(b'"')
+        if end >= 0:
+            data = buffer[:end]
+            yield base64.urlsafe_b64decode(data + b'=' * (-len(data) % 4))
+            return
+        # base64 decodes in 4-character groups; keep any partial group for the next chunk
+        usable = len(buffer) - len(buffer) % 4
+        if usable:
+            yield base64.urlsafe_b64decode(buffer[:usable])
+            buffer = buffer[usable:]
+    raise ValueError('Attachment response ended before its data did.')
+
+
+def get_profile(access_token: str) -> dict:
+    return gmail_api_get(gmail_url(GMAIL_PROFILE_PATH), access_token)
+
+
+def list_messages_page(
+    access_token: str,
+    page_token: str | None = None,
+    max_results: int = 100,
+    query: str = '',
+    label_ids: list[str] | None = None,
+) -> tuple[list[str], str | None]:
+    """Return one page of message IDs (newest first) and the next page token.
+
+    ``query`` (Gmail search syntax) and ``label_ids`` narrow the listing on Gmail's side.
+    """
+    params = {'maxResults': max_results}
+    if page_token:
+        params['pageToken'] = page_token
+    if query:
+        params['q'] = query
+    if label_ids:
+        params['labelIds'] = label_ids
+    response = gmail_api_get(gmail_url(GMAIL_MESSAGES_PATH), access_token, params=params)
+    message_ids = [m['id'] for m in response.get('messages', []) if m.get('id')]
+    return message_ids, response.get('nextPageToken')
+
+
+def list_message_ids(
+    access_token: str,
+    limit: int,
+    query: str = '',
+    label_ids: list[str] | None = None,
+) -> list[str]:
+    """List up to ``limit`` of the newest message IDs, following ``nextPageToken``."""
+    message_ids: list[str] = []
+    page_token = None
+    while len(message_ids) < limit:
+        page, page_token = list_messages_page(
+            access_token,
+            page_token,
+            max_results=min(500, limit - len(message_ids)),
+            query=query,
+            label_ids=label_ids,
+        )
+        message_ids.extend(page)
+        if not page_token:
+            break
+    return message_ids[:limit]
+
+
+def list_history_changes(access_token: str, start_history_id: str) -> tuple[list[str], str]:
+    """Return IDs of messages added or relabelled since ``start_history_id``.
+
+    Also returns the mailbox's current history ID, to be stored for the next sync.
+    Raises ``HistoryExpiredError`` when Gmail has discarded that history.
+    """
+    message_ids: dict[str, None] = {}
+    latest_history_id = start_history_id
+    page_token = None
+    while True:
+        params = {
+            'startHistoryId': start_history_id,
+            'historyTypes': ['messageAdded', 'labelAdded', 'labelRemoved'],
+            'maxResults': 500,
+        }
+        if page_token:
+            params['pageToken'] = page_token
+        try:
+            response = gmail_api_get(gmail_url(GMAIL_HISTORY_PATH), access_token, params=params)
+        except requests.HTTPError as exc:
+            if exc.response is not None and exc.response.status_code == 404:
+                raise HistoryExpiredError(f'History {start_history_id} is no longer available.') from exc
+            raise
+
+        for record in response.get('history', []):
+            for key in ('messagesAdded', 'labelsAdded', 'labelsRemoved'):
+                for change in record.get(key, []):
+                    message_id = change.get('message', {}).get('id')
+                    if message_id:
+                        message_ids[message_id] = None
+        latest_history_id = response.get('historyId', latest_history_id)
+        page_token = response.get('nextPageToken')
+        if not page_token:
+            break
+    return list(message_ids), latest_history_id
+
+
+def gmail_api_batch_get(paths: list[str], access_token: str) -> list[tuple[int, dict]]:
+    """Send GET requests for ``paths`` as one multipart/mixed batch call.
+
+    Returns a ``(status, body)`` tuple per path, in the same order as ``paths``.
+    """
+    if len(paths) > GMAIL_BATCH_LIMIT:
+        raise ValueError(f'Gmail batches are limited to {GMAIL_BATCH_LIMIT} calls.')
+    if not paths:
+        return []
+
+    boundary = f'batch_{secrets.token_hex(12)}'
+    parts = []
+    for index, path in enumerate(paths):
+        parts.append(
+            f'--{boundary}\r\n'
+            'Content-Type: application/http\r\n'
+            f'Content-ID: <item{index}>\r\n'
+            '\r\n'
+            f'GET {path}\r\n'
+            '\r\n'
+        )
+    body = ''.join(parts) + f'--{boundary}--\r\n'
+
+    response = google_request(
+        'POST',
+        gmail_url(GMAIL_BATCH_PATH),
+        data=body.encode('utf-8'),
+        headers={
+            'Authorization': f'Bearer {access_token}',
+            'Content-Type': f'multipart/mixed; boundary={boundary}',
+        },
+    )
+    content_type = response.headers.get('Content-Type', '')
+    raw = response.content
+
+    results: list[tuple[int, dict]] = [(0, {}) for _ in paths]
+    for content_id, status, payload in parse_batch_response(content_type, raw):
+        index = _batch_item_index(content_id)
+        if index is not None and 0 <= index < len(paths):
+            results[index] = (status, payload)
+    return results
+
+
+def parse_batch_response(content_type: str, raw: bytes) -> list[tuple[str, int, dict]]:
+    """Split a multipart/mixed batch response into ``(content_id, status, body)``."""
+    message = BytesParser().parsebytes(
+        f'Content-Type: {content_type}\r\n\r\n'.encode('utf-8') + raw
     )
-    with urllib.request.urlopen(request) as response:
-        return json.loads(response.read().decode('utf-8'))
+    if not message.is_multipart():
+        return []
+
+    parsed = []
+    for part in message.get_payload():
+        content_id = part.get('Content-ID', '')
+        http_response = part.get_payload(decode=True) or b''
+        status, body = _parse_http_response(http_response)
+        parsed.append((content_id, status, body))
+    return parsed
+
+
+def _parse_http_response(raw: bytes) -> tuple[int, dict]:
+    head, _, body = raw.replace(b'\r\n', b'\n').partition(b'\n\n')
+    status_line = head.split(b'\n', 1)[0].decode('latin-1')
+    try:
+        status = int(status_line.split()[1])
+    except (IndexError, ValueError):
+        return 0, {}
+    try:
+        return status, json.loads(body.decode('utf-8')) if body.strip() else {}
+    except ValueError:
+        return status, {}
+
+
+def _batch_item_index(content_id: str) -> int | None:
+    # Gmail echoes our ``<itemN>`` IDs back as ``<response-itemN>``.
+    value = content_id.strip('<> ')
+    if not value.startswith('response-item'):
+        return None
+    try:
+        return int(value[len('response-item'):])
+    except ValueError:
+        return None
+
+
+def message_get_params(message_format: str) -> dict:
+    """Query parameters for ``messages.get`` in the given format."""
+    if message_format == MESSAGE_FORMAT_METADATA:
+        return {
+            'format': MESSAGE_FORMAT_METADATA,
+            'metadataHeaders': METADATA_HEADERS,
+            'fields': METADATA_FIELDS,
+        }
+    return {'format': MESSAGE_FORMAT_FULL}
+
+
+def message_get_path(message_id: str, params: dict | None = None) -> str:
+    """Path of a ``messages.get`` call, relative to the API host, for use in batches."""
+    query = f'?{urllib.parse.urlencode(params, doseq=True)}' if params else ''
+    return f'{GMAIL_MESSAGES_PATH}/{urllib.parse.quote(message_id)}{query}'
+
+
+def batch_get_messages(
+    message_ids: list[str],
+    access_token: str,
+    params: dict | None = None,
+    batch_size: int = GMAIL_BATCH_SIZE,
+) -> tuple[dict[str, dict], list[str]]:
+    """Fetch ``messages.get`` for many IDs using batch requests.
+
+    Returns ``({message_id: detail}, failed_ids)``. ``failed_ids`` are the
+    messages Gmail throttled, failed on or left unanswered, for the caller to
+    retry; those answered with a permanent error, such as 404 after a delete,
+    are dropped.
+    """
+    batch_size = max(1, min(batch_size, GMAIL_BATCH_LIMIT))
+
+    details = {}
+    failed = []
+    for start in range(0, len(message_ids), batch_size):
+        chunk = message_ids[start:start + batch_size]
+        paths = [message_get_path(message_id, params) for message_id in chunk]
+        for message_id, (status, body) in zip(chunk, gmail_api_batch_get(paths, access_token)):
+            if 200 <= status < 300:
+                details[message_id] = body
+            elif status in RETRYABLE_STATUSES or status == 0:
+                failed.append(message_id)
+    return details, failed
 
 
 def parse_gmail_headers(headers: list[dict]) -> dict:
@@ -82,6 +413,122 @@ def parse_gmail_headers(headers: list[dict]) -> dict:
     return parsed
 
 
+class TextPart(NamedTuple):
+    """A ``text/plain`` or ``text/html`` body part, still base64url-encoded until ``text()``."""
+
+    mime_type: str
+    data: str
+    charset: str
+
+    def text(self) -> str:
+        raw = base64.urlsafe_b64decode(self.data + '=' * (-len(self.data) % 4))
+        try:
+            return raw.decode(self.charset, errors='replace')
+        except LookupError:
+            return raw.decode('utf-8', errors='replace')
+
+
+_CHARSET_RE = re.compile(r'charset\s*=\s*"?([\w.:-]+)', re.IGNORECASE)
+
+
+def _iter_leaf_parts(payload: dict) -> Iterator[dict]:
+    """Yield the non-multipart parts of a Gmail payload in document order."""
+    stack = [payload]
+    while stack:
+        part = stack.pop()
+        children = part.get('parts')
+        if children:
+            stack.extend(reversed(children))
+        else:
+            yield part
+
+
+def iter_text_parts(payload: dict) -> Iterator[TextPart]:
+    """Yield the inline text parts of a Gmail payload in document order.
+
+    The MIME tree is walked once without decoding anything; attachments and
+    parts whose data must be fetched separately are skipped.
+    """
+    for part in _iter_leaf_parts(payload):
+        mime_type = part.get('mimeType', '').lower()
+        data = part.get('body', {}).get('data')
+        if mime_type not in ('text/plain', 'text/html') or not data or part.get('filename'):
+            continue
+        headers = parse_gmail_headers(part.get('headers', []))
+        match = _CHARSET_RE.search(headers.get('content-type', ''))
+        yield TextPart(mime_type, data, match.group(1) if match else 'utf-8')
+
+
+class AttachmentPart(NamedTuple):
+    """A named part of a Gmail payload; ``data`` is only set when Gmail inlined it."""
+
+    part_id: str
+    filename: str
+    mime_type: str
+    size: int
+    attachment_id: str
+    data: str
+
+
+def iter_attachment_parts(payload: dict) -> Iterator[AttachmentPart]:
+    """Yield the parts of a Gmail payload that carry a filename."""
+    for part in _iter_leaf_parts(payload):
+        body = part.get('body', {})
+        if not part.get('filename') or not (body.get('attachmentId') or body.get('data')):
+            continue
+        yield AttachmentPart(
+            part_id=part.get('partId', ''),
+            filename=part['filename'],
+            mime_type=part.get('mimeType', ''),
+            size=body.get('size', 0),
+            attachment_id=body.get('attachmentId', ''),
+            data=body.get('data', ''),
+        )
+
+
+def extract_body_text(payload: dict) -> str:
+    """Normalized text of a message, preferring its plain-text parts over converted HTML.
+
+    HTML parts are only decoded when the message has no plain-text part.
+    """
+    plain = []
+    html_parts = []
+    for part in iter_text_parts(payload):
+        (plain if part.mime_type == 'text/plain' else html_parts).append(part)
+    if plain:
+        text = '\n\n'.join(part.text() for part in plain)
+    else:
+        text = '\n\n'.join(html_to_text(part.text()) for part in html_parts)
+    return normalize_text(text)[:BODY_TEXT_MAX_CHARS]
+
+
+_HTML_HIDDEN_RE = re.compile(r'<!--.*?-->|<(script|style|head|title)\b.*?</\1\s*>', re.IGNORECASE | re.DOTALL)
+_HTML_BREAK_RE = re.compile(r'<(?:br|hr|/?(?:p|div|tr|li|ul|ol|table|blockquote|h[1-6]))\b[^>]*>', re.IGNORECASE)
+_HTML_TAG_RE = re.compile(r'<[^>]*>')
+
+
+def html_to_text(markup: str) -> str:
+    """Convert an HTML body to text with a few regex passes rather than a full parser."""
+    if '<' in markup:
+        markup = _HTML_HIDDEN_RE.sub(' ', markup)
+        markup = _HTML_BREAK_RE.sub('\n', markup)
+        markup = _HTML_TAG_RE.sub(' ', markup)
+    if '&' in markup:
+        markup = html.unescape(markup)
+    return markup
+
+
+_SPACE_RE = re.compile(r'[^\S\n]+')
+_BLANK_LINES_RE = re.compile(r'\n\s*\n\s*')
+
+
+def normalize_text(text: str) -> str:
+    """Collapse runs of spaces and blank lines, keeping paragraph breaks."""
+    text = _SPACE_RE.sub(' ', text.replace('\r', ''))
+    text = '\n'.join(line.strip() for line in text.split('\n'))
+    return _BLANK_LINES_RE.sub('\n\n', text).strip()
+
+
 def parse_rfc2822_datetime(raw_value: str | None) -> datetime | None:
     if not raw_value:
         return None
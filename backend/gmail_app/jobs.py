@@ -0,0 +1,185 @@
+import logging
+import threading
+import time
+from datetime import timedelta
+
+from django.db import connection
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import MailboxBackfill, SyncJob
+from .scheduler import record_sync_result
+from .sync import backfill_account, sync_account
+from .tokens import ensure_access_token
+
+logger = logging.getLogger(__name__)
+
+HEARTBEAT_INTERVAL_SECONDS = 15
+# A running job whose worker has not heartbeated for this long is reclaimed.
+STALE_JOB_AFTER = timedelta(minutes=2)
+RETRY_BASE_DELAY = timedelta(seconds=30)
+# Backfill pages walked between access token checks.
+BACKFILL_PAGES_PER_STEP = 10
+# Steps a backfill runs before going to the back of the queue, so one huge
+# mailbox cannot hold a worker while other accounts wait.
+BACKFILL_STEPS_PER_TURN = 5
+
+
+def enqueue_job(account, kind: str = SyncJob.KIND_SYNC) -> SyncJob:
+    """Queue a job for ``account``, reusing one of the same kind that is still active."""
+    active = SyncJob.objects.filter(account=account, kind=kind, status__in=SyncJob.ACTIVE_STATUSES).first()
+    if active:
+        return active
+    return SyncJob.objects.create(account=account, kind=kind)
+
+
+def claim_next_job(worker_id: str) -> SyncJob | None:
+    """Atomically take the oldest runnable job, or a running one whose worker died.
+
+    Claims are conditional updates, so concurrent workers never run the same job.
+    """
+    now = timezone.now()
+    stale_before = now - STALE_JOB_AFTER
+    runnable = (
+        Q(status=SyncJob.STATUS_QUEUED, run_after__lte=now)
+        | Q(status=SyncJob.STATUS_RUNNING, heartbeat_at__lt=stale_before)
+    )
+    candidates = SyncJob.objects.filter(runnable).order_by('run_after', 'id').values_list('pk', 'status')[:10]
+
+    for pk, job_status in candidates:
+        claim = SyncJob.objects.filter(pk=pk, status=job_status)
+        if job_status == SyncJob.STATUS_RUNNING:
+            claim = claim.filter(heartbeat_at__lt=stale_before)
+        claimed = claim.update(
+            status=SyncJob.STATUS_RUNNING,
+            worker_id=worker_id,
+            heartbeat_at=now,
+            started_at=now,
+            attempts=F('attempts') + 1,
+        )
+        if not claimed:
+            continue
+
+        job = SyncJob.objects.select_related('account').get(pk=pk)
+        if job.attempts > job.max_attempts:
+            # Reclaimed from a worker that kept dying mid-run
+            _finish(job, SyncJob.STATUS_FAILED, error=job.error or 'Worker lost too many times.')
+            continue
+        return job
+    return None
+
+
+def work(worker_id: str, once: bool = False, poll_interval: float = 5.0, on_job=None) -> None:
+    """Claim and run jobs until stopped, or until the queue is empty with ``once``."""
+    while True:
+        job = claim_next_job(worker_id)
+        if job is None:
+            if once:
+                return
+            time.sleep(poll_interval)
+            continue
+        run_job(job)
+        if on_job:
+            on_job(job)
+
+
+def run_job(job: SyncJob) -> SyncJob:
+    """Execute a claimed job, heartbeating while it runs and requeueing it on failure."""
+    heartbeat = _Heartbeat(job.pk)
+    heartbeat.start()
+    try:
+        if job.kind == SyncJob.KIND_BACKFILL:
+            finished = _run_backfill(job)
+        elif job.kind == SyncJob.KIND_FILTER_REFRESH:
+            finished = _run_filter_refresh(job)
+        else:
+            finished = _run_sync(job)
+    except Exception as exc:
+        logger.exception('Sync job %s failed', job.pk)
+        if job.attempts < job.max_attempts:
+            job.status = SyncJob.STATUS_QUEUED
+            job.run_after = timezone.now() + RETRY_BASE_DELAY * 2 ** (job.attempts - 1)
+            job.error = str(exc)
+            job.save(update_fields=['status', 'run_after', 'error'])
+        else:
+            _finish(job, SyncJob.STATUS_FAILED, error=str(exc))
+    else:
+        if finished:
+            _finish(job, SyncJob.STATUS_SUCCEEDED)
+        else:
+            # Yielding its turn is not a failed attempt
+            job.status = SyncJob.STATUS_QUEUED
+            job.run_after = timezone.now()
+            job.attempts -= 1
+            job.save(update_fields=['status', 'run_after', 'attempts'])
+    finally:
+        heartbeat.stop()
+    return job
+
+
+def _run_sync(job: SyncJob) -> bool:
+    access_token = ensure_access_token(job.account)
+    result = sync_account(job.account, access_token)
+    job.fetched = result['fetched']
+    job.stored = result['stored']
+    job.updated = result['updated']
+    job.failed = result['failed']
+    job.save(update_fields=['fetched', 'stored', 'updated', 'failed'])
+    record_sync_result(job.account, result['stored'])
+    return True
+
+
+def _run_backfill(job: SyncJob) -> bool:
+    """Run one turn of a backfill; returns whether the mailbox is fully walked."""
+    processed = None
+    for _ in range(BACKFILL_STEPS_PER_TURN):
+        access_token = ensure_access_token(job.account)
+        backfill = backfill_account(job.account, access_token, max_pages=BACKFILL_PAGES_PER_STEP)
+        job.fetched = backfill.processed
+        job.stored = backfill.stored
+        job.save(update_fields=['fetched', 'stored'])
+        if backfill.status == MailboxBackfill.STATUS_COMPLETE:
+            return True
+        if backfill.processed == processed:
+            # The checkpoint did not move: Gmail keeps failing on this page, so retry later
+            raise RuntimeError('Backfill stalled on messages Gmail could not return.')
+        processed = backfill.processed
+    return False
+
+
+def _run_filter_refresh(job: SyncJob) -> bool:
+    # sync_filter queues backfills through this module, so it is imported late
+    from .sync_filter import refresh_sync_filter
+
+    refresh_sync_filter(job.account)
+    return True
+
+
+def _finish(job: SyncJob, job_status: str, error: str = '') -> None:
+    job.status = job_status
+    job.error = error
+    job.finished_at = timezone.now()
+    job.save(update_fields=['status', 'error', 'finished_at'])
+
+
+class _Heartbeat:
+    """Background thread that keeps ``heartbeat_at`` fresh for a running job."""
+
+    def __init__(self, job_pk: int):
+        self.job_pk = job_pk
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self) -> None:
+        self.thread.start()
+
+    def stop(self) -> None:
+        self.stopped.set()
+        self.thread.join()
+
+    def _run(self) -> None:
+        try:
+            while not self.stopped.wait(HEARTBEAT_INTERVAL_SECONDS):
+                SyncJob.objects.filter(pk=self.job_pk).update(heartbeat_at=timezone.now())
+        finally:
+            connection.close()
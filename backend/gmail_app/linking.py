@@ -0,0 +1,154 @@
+from collections import defaultdict
+from itertools import islice
+
+from django.db.models import Q
+
+from .models import ApplicationMatchKey, EmailMessage, JobApplicationEmail
+from .senders import application_match_keys, company_key, domain_company_key, is_employer_domain
+
+# Match keys or sender domains looked up per query, keeping the OR of domain
+# ranges well inside SQLite's limits.
+LINK_KEY_BATCH_SIZE = 200
+# Applications whose match keys are compared per query.
+INDEX_BATCH_SIZE = 500
+
+
+def message_match_keys(domain: str, company_name: str) -> list[str]:
+    """Keys to look a message up by, most specific first."""
+    keys = [domain, domain_company_key(domain)] if is_employer_domain(domain) else []
+    keys.append(company_key(company_name))
+    return [key for key in keys if key]
+
+
+def link_messages(messages: list[tuple[int, str, str]]) -> int:
+    """Link ``(message_id, sender_domain, company_name)`` rows to job applications.
+
+    Every key in the batch is resolved with one indexed query, so linking costs
+    a dictionary lookup per message. When several applications share a key the
+    most recent one wins. Returns the number of messages linked.
+    """
+    candidates = {message_id: message_match_keys(domain, company) for message_id, domain, company in messages}
+    keys = {key for message_keys in candidates.values() for key in message_keys}
+    if not keys:
+        return 0
+
+    application_for_key = dict(
+        ApplicationMatchKey.objects.filter(key__in=keys)
+        .order_by('application__date_applied', 'application_id')
+        .values_list('key', 'application_id')
+    )
+    linked = defaultdict(list)
+    for message_id, message_keys in candidates.items():
+        for key in message_keys:
+            if key in application_for_key:
+                linked[application_for_key[key]].append(message_id)
+                break
+
+    for application_id, message_ids in linked.items():
+        EmailMessage.objects.filter(id__in=message_ids).update(application_id=application_id)
+    return sum(len(message_ids) for message_ids in linked.values())
+
+
+def index_applications(applications) -> bool:
+    """Bring the match keys of ``applications`` up to date.
+
+    Only applications whose keys changed are touched, and mail that was not
+    linked yet is then linked through their new keys, once for all of them.
+    Returns whether any sender domain key was added or removed, which is what
+    sync filters follow.
+    """
+    added = {}
+    domains_changed = False
+    applications = iter(applications)
+    while batch := list(islice(applications, INDEX_BATCH_SIZE)):
+        batch_added, batch_domains_changed = _update_match_keys(batch)
+        added.update(batch_added)
+        domains_changed = domains_changed or batch_domains_changed
+    if added:
+        link_unlinked_messages(added)
+    return domains_changed
+
+
+def _update_match_keys(applications) -> tuple[dict[str, int], bool]:
+    wanted = {
+        application.pk: application_match_keys(application.company_name, application.contact_email)
+        for application in applications
+    }
+    current = defaultdict(set)
+    for application_id, key in ApplicationMatchKey.objects.filter(
+        application_id__in=wanted
+    ).values_list('application_id', 'key'):
+        current[application_id].add(key)
+
+    added = {}
+    domains_changed = False
+    for application_id, keys in wanted.items():
+        stale = current[application_id] - keys
+        if any('.' in key for key in keys ^ current[application_id]):
+            domains_changed = True
+        if stale:
+            ApplicationMatchKey.objects.filter(application_id=application_id, key__in=stale).delete()
+        for key in keys - current[application_id]:
+            added[key] = application_id
+
+    if added:
+        ApplicationMatchKey.objects.bulk_create(
+            [ApplicationMatchKey(application_id=application_id, key=key) for key, application_id in added.items()],
+            ignore_conflicts=True,
+        )
+    return added, domains_changed
+
+
+def link_unlinked_messages(application_for_key: dict[str, int]) -> None:
+    """Link messages without an application that match one of the given keys.
+
+    Sender domains are read through the ``sender_domain`` index. For a few
+    keys, only the domains they can match are looked up: domain keys exactly,
+    and company keys as the first label of a domain (``acme`` covers
+    ``acme.com`` and ``acme.co.uk``). For more, such as after an import, one
+    walk over the distinct domains is cheaper than a range lookup per key.
+    """
+    if len(application_for_key) <= LINK_KEY_BATCH_SIZE:
+        candidates = Q(sender_domain__in=[key for key in application_for_key if '.' in key])
+        for key in application_for_key:
+            if '.' not in key:
+                # Every domain starting with "key." sorts between "key." and "key/"
+                candidates |= Q(sender_domain__gte=f'{key}.', sender_domain__lt=f'{key}/')
+        domains = EmailMessage.objects.filter(candidates)
+    else:
+        domains = EmailMessage.objects.all()
+    application_for_domain = {}
+    for domain in domains.values_list('sender_domain', flat=True).distinct():
+        for key in message_match_keys(domain, ''):
+            if key in application_for_key:
+                application_for_domain[domain] = application_for_key[key]
+                break
+
+    application_for_message = {}
+    matched = list(application_for_domain)
+    for start in range(0, len(matched), LINK_KEY_BATCH_SIZE):
+        # Linked rows are skipped here rather than in SQL, which would steer
+        # SQLite onto the application index and past every unlinked message
+        messages = EmailMessage.objects.filter(
+            sender_domain__in=matched[start:start + LINK_KEY_BATCH_SIZE],
+        ).values_list('id', 'sender_domain', 'application_id')
+        for message_id, domain, application_id in messages:
+            if application_id is None:
+                application_for_message[message_id] = application_for_domain[domain]
+
+    classified = JobApplicationEmail.objects.filter(message__application__isnull=True)
+    for message_id, company in classified.values_list('message_id', 'company_name'):
+        application_id = application_for_key.get(company_key(company))
+        if application_id:
+            # A sender domain match is more specific than the classified company name
+            application_for_message.setdefault(message_id, application_id)
+
+    linked = defaultdict(list)
+    for message_id, application_id in application_for_message.items():
+        linked[application_id].append(message_id)
+    for application_id, message_ids in linked.items():
+        for start in range(0, len(message_ids), LINK_KEY_BATCH_SIZE):
+            EmailMessage.objects.filter(
+                id__in=message_ids[start:start + LINK_KEY_BATCH_SIZE],
+                application__isnull=True,
+            ).update(application_id=application_id)
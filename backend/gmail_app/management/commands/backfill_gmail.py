@@ -0,0 +1,90 @@
+from django.core.management.base import BaseCommand
+
+from gmail_app.models import GmailAccount, MailboxBackfill
+from gmail_app.sync import backfill_account
+from gmail_app.tokens import ensure_access_token
+
+# Steps in a row that may leave the checkpoint where it was before giving up on
+# an account: Gmail keeps failing on the same page.
+MAX_STALLED_STEPS = 3
+
+
+class Command(BaseCommand):
+    help = 'Import every message in connected Gmail mailboxes, resuming from the last checkpoint'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--email',
+            type=str,
+            help='Only backfill the Gmail account with this address',
+        )
+        parser.add_argument(
+            '--pages-per-step',
+            type=int,
+            default=10,
+            help='Pages to walk between access token checks (default: 10)',
+        )
+        parser.add_argument(
+            '--max-pages',
+            type=int,
+            help='Stop each account after walking this many pages; the next run resumes from there',
+        )
+        parser.add_argument(
+            '--restart',
+            action='store_true',
+            help='Discard the saved checkpoint and start again from the newest message',
+        )
+
+    def handle(self, *args, **options):
+        accounts = GmailAccount.objects.all()
+        if options.get('email'):
+            accounts = accounts.filter(email=options['email'])
+
+        if not accounts.exists():
+            self.stdout.write(self.style.WARNING('No Gmail accounts to backfill.'))
+            return
+
+        for account in accounts:
+            restart = options.get('restart', False)
+            pages_left = options.get('max_pages')
+            checkpoint = None
+            stalled_steps = 0
+            while pages_left is None or pages_left > 0:
+                try:
+                    access_token = ensure_access_token(account)
+                except RuntimeError as e:
+                    self.stderr.write(self.style.ERROR(f'{account.email}: {e}'))
+                    break
+
+                step_pages = options['pages_per_step']
+                if pages_left is not None:
+                    step_pages = min(step_pages, pages_left)
+                    pages_left -= step_pages
+                backfill = backfill_account(
+                    account,
+                    access_token,
+                    max_pages=step_pages,
+                    restart=restart,
+                )
+                restart = False
+                total = backfill.messages_total or '?'
+                self.stdout.write(
+                    f'{account.email}: {backfill.processed}/{total} processed, {backfill.stored} stored'
+                )
+                if backfill.status == MailboxBackfill.STATUS_COMPLETE:
+                    self.stdout.write(self.style.SUCCESS(f'{account.email}: backfill complete'))
+                    break
+
+                if (backfill.page_token, backfill.processed) == checkpoint:
+                    stalled_steps += 1
+                    if stalled_steps >= MAX_STALLED_STEPS:
+                        self.stderr.write(self.style.ERROR(
+                            f'{account.email}: backfill stalled on messages Gmail could not return; '
+                            'run again later to retry'
+                        ))
+                        break
+                else:
+                    stalled_steps = 0
+                checkpoint = (backfill.page_token, backfill.processed)
+            else:
+                self.stdout.write(f'{account.email}: stopped after --max-pages; run again to resume')
@@ -0,0 +1,238 @@
+import math
+import multiprocessing
+import secrets
+import time
+from datetime import timedelta
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from gmail_app.fake_gmail import CONTROL_PREFIX, FAKE_ACCESS_TOKEN, FaultConfig, serve
+from gmail_app.fetch_engine import PROFILE_UNITS, GmailFetchEngine, set_quota_rate
+from gmail_app.gmail_client import get_profile, google_request
+from gmail_app.models import GmailAccount
+from gmail_app.sync import backfill_account, sync_account
+
+User = get_user_model()
+
+# Seconds to wait for a spawned fake server to start listening.
+SERVER_START_TIMEOUT = 10
+
+
+class QueryCounter:
+    """``connection.execute_wrapper`` hook counting the queries it lets through."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class Command(BaseCommand):
+    help = (
+        'Benchmark Gmail sync against a fake Gmail server: backfill a mailbox, then run '
+        'incremental syncs, reporting messages per second, queries per message and p95 latency. '
+        'A temporary user and account are created in the configured database and removed afterwards.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--server',
+            type=str,
+            help='Base URL of a running fake_gmail_server; by default one is started for the run',
+        )
+        parser.add_argument(
+            '--messages',
+            type=int,
+            default=2000,
+            help='Messages in the started server\'s mailbox (default: 2000)',
+        )
+        parser.add_argument(
+            '--fixtures',
+            type=str,
+            help='Recorded messages.get responses for the started server to replay',
+        )
+        parser.add_argument(
+            '--latency-ms',
+            type=float,
+            default=20,
+            help='Delay the started server adds to every request (default: 20)',
+        )
+        parser.add_argument(
+            '--error-rate',
+            type=float,
+            default=0,
+            help='Fraction of calls the started server answers with 503 (default: 0)',
+        )
+        parser.add_argument(
+            '--throttle-rate',
+            type=float,
+            default=0,
+            help='Fraction of calls the started server answers with 429 (default: 0)',
+        )
+        parser.add_argument(
+            '--rounds',
+            type=int,
+            default=20,
+            help='Incremental syncs to time after the backfill (default: 20)',
+        )
+        parser.add_argument(
+            '--new-per-round',
+            type=int,
+            default=25,
+            help='Messages delivered to the mailbox before each incremental sync (default: 25)',
+        )
+        parser.add_argument(
+            '--format',
+            choices=[GmailAccount.SYNC_FORMAT_METADATA, GmailAccount.SYNC_FORMAT_FULL],
+            default=GmailAccount.SYNC_FORMAT_METADATA,
+            help='Sync format of the benchmark account (default: metadata)',
+        )
+        parser.add_argument(
+            '--concurrency',
+            type=int,
+            default=4,
+            help='Concurrent Gmail requests (default: 4)',
+        )
+        parser.add_argument(
+            '--quota',
+            type=float,
+            default=0,
+            help='Quota units per second to allow; 0 keeps Gmail\'s per-user limit',
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            help='Seed for injected failures, for repeatable runs',
+        )
+
+    def handle(self, *args, **options):
+        process = None
+        if options.get('server'):
+            base_url = options['server'].rstrip('/')
+            overrides = {
+                'GMAIL_API_BASE_URL': base_url,
+                'GOOGLE_TOKEN_URL': f'{base_url}/token',
+                'GOOGLE_USERINFO_URL': f'{base_url}/oauth2/v2/userinfo',
+            }
+        else:
+            process, overrides = self._start_server(options)
+            base_url = overrides['GMAIL_API_BASE_URL']
+
+        try:
+            with override_settings(**overrides):
+                self._run(base_url, options)
+        finally:
+            if process is not None:
+                process.terminate()
+                process.join()
+
+    def _start_server(self, options):
+        ready = multiprocessing.Queue()
+        process = multiprocessing.Process(
+            target=serve,
+            kwargs={
+                'ready': ready,
+                'messages': options['messages'],
+                'fixtures_path': options.get('fixtures'),
+                'faults': FaultConfig(
+                    latency_ms=options['latency_ms'],
+                    error_rate=options['error_rate'],
+                    throttle_rate=options['throttle_rate'],
+                ),
+                'seed': options.get('seed'),
+            },
+            daemon=True,
+        )
+        process.start()
+        try:
+            return process, ready.get(timeout=SERVER_START_TIMEOUT)
+        except Exception as exc:
+            process.terminate()
+            raise CommandError('The fake Gmail server did not start.') from exc
+
+    def _run(self, base_url, options):
+        email = f'benchmark-{secrets.token_hex(4)}@example.com'
+        user = User.objects.create(username=email, email=email)
+        account = GmailAccount.objects.create(
+            user=user,
+            email=email,
+            access_token=FAKE_ACCESS_TOKEN,
+            token_expiry=timezone.now() + timedelta(days=1),
+            sync_format=options['format'],
+            sync_concurrency=options['concurrency'],
+        )
+        if options['quota']:
+            set_quota_rate(account.pk, options['quota'])
+
+        try:
+            queries = QueryCounter()
+            with connection.execute_wrapper(queries):
+                # Start history at the backfill so the timed syncs are incremental, not full resyncs
+                # Through the engine, so injected faults are retried like every other Gmail call
+                profile = GmailFetchEngine(account, FAKE_ACCESS_TOKEN).call(
+                    get_profile, FAKE_ACCESS_TOKEN, units=PROFILE_UNITS,
+                )
+                account.history_id = profile.get('historyId', '')
+                account.save(update_fields=['history_id'])
+
+                started = time.perf_counter()
+                backfill = backfill_account(account, FAKE_ACCESS_TOKEN)
+                backfill_seconds = time.perf_counter() - started
+                backfill_queries = queries.count
+
+                latencies = []
+                synced = 0
+                for _ in range(options['rounds']):
+                    google_request('POST', f'{base_url}{CONTROL_PREFIX}/messages', params={
+                        'count': options['new_per_round'],
+                    })
+                    started = time.perf_counter()
+                    result = sync_account(account, FAKE_ACCESS_TOKEN)
+                    latencies.append(time.perf_counter() - started)
+                    synced += result['stored']
+                sync_queries = queries.count - backfill_queries
+
+            server_stats = google_request('GET', f'{base_url}{CONTROL_PREFIX}/stats').json()
+        finally:
+            user.delete()
+
+        self.stdout.write(
+            f'Backfill: {backfill.stored} messages in {backfill_seconds:.2f}s '
+            f'({_rate(backfill.stored, backfill_seconds)} msg/s), '
+            f'{backfill_queries} queries ({_ratio(backfill_queries, backfill.stored)} per message)'
+        )
+        if latencies:
+            self.stdout.write(
+                f'Incremental sync: {len(latencies)} rounds, {synced} messages '
+                f'({_rate(synced, sum(latencies))} msg/s), {sync_queries} queries '
+                f'({_ratio(sync_queries, synced)} per message); latency '
+                f'p50 {_percentile(latencies, 50) * 1000:.0f}ms, '
+                f'p95 {_percentile(latencies, 95) * 1000:.0f}ms, '
+                f'max {max(latencies) * 1000:.0f}ms'
+            )
+        self.stdout.write(
+            f'Fake server: {server_stats["requests"]} requests, {server_stats["batch_items"]} batched calls, '
+            f'{server_stats["throttled"]} throttled, {server_stats["errors"]} errors'
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Overall: {_ratio(queries.count, backfill.stored + synced)} queries per message'
+        ))
+
+
+def _percentile(values: list[float], percent: float) -> float:
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(percent / 100 * len(ordered)) - 1)]
+
+
+def _rate(count: int, seconds: float) -> str:
+    return f'{count / seconds:.1f}' if seconds else '-'
+
+
+def _ratio(count: int, total: int) -> str:
+    return f'{count / total:.2f}' if total else '-'
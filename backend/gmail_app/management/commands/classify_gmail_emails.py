@@ -0,0 +1,41 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from gmail_app.classifier import classify_new_messages, reset_classification
+from gmail_app.models import GmailAccount
+
+
+class Command(BaseCommand):
+    help = 'Detect job application emails among stored Gmail messages'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--email',
+            type=str,
+            help='Only classify messages of the Gmail account with this address',
+        )
+        parser.add_argument(
+            '--reclassify',
+            action='store_true',
+            help='Discard earlier results and classify every stored message again',
+        )
+
+    def handle(self, *args, **options):
+        accounts = GmailAccount.objects.all()
+        if options.get('email'):
+            accounts = accounts.filter(email=options['email'])
+
+        if not accounts.exists():
+            self.stdout.write(self.style.WARNING('No Gmail accounts to classify.'))
+            return
+
+        for account in accounts:
+            if options.get('reclassify'):
+                reset_classification(account)
+            started = time.monotonic()
+            created = classify_new_messages(account)
+            self.stdout.write(self.style.SUCCESS(
+                f'{account.email}: {created} job application emails found '
+                f'in {time.monotonic() - started:.1f}s'
+            ))
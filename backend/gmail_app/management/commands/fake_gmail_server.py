@@ -0,0 +1,81 @@
+from django.core.management.base import BaseCommand
+
+from gmail_app.fake_gmail import FaultConfig, build_server
+
+
+class Command(BaseCommand):
+    help = 'Serve a fake Gmail API and Google OAuth endpoints with a synthetic or recorded mailbox'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--host',
+            type=str,
+            default='127.0.0.1',
+            help='Address to bind (default: 127.0.0.1)',
+        )
+        parser.add_argument(
+            '--port',
+            type=int,
+            default=8765,
+            help='Port to listen on (default: 8765)',
+        )
+        parser.add_argument(
+            '--messages',
+            type=int,
+            default=1000,
+            help='Messages in the synthetic mailbox (default: 1000)',
+        )
+        parser.add_argument(
+            '--fixtures',
+            type=str,
+            help='JSON file of recorded full-format messages.get responses to replay instead',
+        )
+        parser.add_argument(
+            '--latency-ms',
+            type=float,
+            default=0,
+            help='Delay in milliseconds added to every request (default: 0)',
+        )
+        parser.add_argument(
+            '--error-rate',
+            type=float,
+            default=0,
+            help='Fraction of calls answered with 503 (default: 0)',
+        )
+        parser.add_argument(
+            '--throttle-rate',
+            type=float,
+            default=0,
+            help='Fraction of calls answered with 429 (default: 0)',
+        )
+        parser.add_argument(
+            '--seed',
+            type=int,
+            help='Seed for injected failures, for repeatable runs',
+        )
+
+    def handle(self, *args, **options):
+        server = build_server(
+            host=options['host'],
+            port=options['port'],
+            messages=options['messages'],
+            faults=FaultConfig(
+                latency_ms=options['latency_ms'],
+                error_rate=options['error_rate'],
+                throttle_rate=options['throttle_rate'],
+            ),
+            fixtures_path=options.get('fixtures'),
+            seed=options.get('seed'),
+        )
+        self.stdout.write(self.style.SUCCESS(
+            f'Fake Gmail serving {server.mailbox.size} messages at {server.base_url}'
+        ))
+        self.stdout.write('Point the backend at it with:')
+        for name, value in server.setting_overrides().items():
+            self.stdout.write(f'  {name}={value}')
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
@@ -0,0 +1,72 @@
+import multiprocessing
+import os
+import socket
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from gmail_app.jobs import work
+from gmail_app.scheduler import schedule_due_accounts
+
+
+def _worker_process(worker_id, poll_interval):
+    try:
+        work(worker_id, poll_interval=poll_interval)
+    except KeyboardInterrupt:
+        pass
+
+
+class Command(BaseCommand):
+    help = 'Keep every connected Gmail account synced, using a pool of worker processes'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=2,
+            help='Worker processes to start; use 0 if run_sync_worker runs separately (default: 2)',
+        )
+        parser.add_argument(
+            '--tick',
+            type=float,
+            default=30.0,
+            help='Seconds between checks for accounts that are due a sync (default: 30)',
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=5.0,
+            help='Seconds workers wait between polls when the queue is empty (default: 5)',
+        )
+
+    def handle(self, *args, **options):
+        # Children must open their own DB connections rather than share ours
+        connections.close_all()
+        context = multiprocessing.get_context('fork')
+        prefix = f'{socket.gethostname()}:{os.getpid()}'
+        processes = [
+            context.Process(
+                target=_worker_process,
+                args=(f'{prefix}/{index}', options['poll_interval']),
+                daemon=True,
+            )
+            for index in range(options['workers'])
+        ]
+        for process in processes:
+            process.start()
+        self.stdout.write(f'Sync scheduler started with {len(processes)} worker process(es)')
+
+        try:
+            while True:
+                jobs = schedule_due_accounts()
+                if jobs:
+                    self.stdout.write(f'Queued {len(jobs)} sync job(s)')
+                time.sleep(options['tick'])
+        except KeyboardInterrupt:
+            self.stdout.write('Sync scheduler stopping')
+        finally:
+            for process in processes:
+                process.terminate()
+            for process in processes:
+                process.join()
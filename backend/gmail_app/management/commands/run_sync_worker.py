@@ -0,0 +1,49 @@
+import os
+import socket
+
+from django.core.management.base import BaseCommand
+
+from gmail_app.jobs import work
+
+
+class Command(BaseCommand):
+    help = 'Claim and run queued Gmail sync jobs until stopped'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--once',
+            action='store_true',
+            help='Exit once the queue is empty instead of polling for new jobs',
+        )
+        parser.add_argument(
+            '--poll-interval',
+            type=float,
+            default=5.0,
+            help='Seconds to wait between polls when the queue is empty (default: 5)',
+        )
+        parser.add_argument(
+            '--worker-id',
+            type=str,
+            default=f'{socket.gethostname()}:{os.getpid()}',
+            help='Identifier recorded on claimed jobs (default: hostname:pid)',
+        )
+
+    def handle(self, *args, **options):
+        worker_id = options['worker_id']
+        self.stdout.write(f'Sync worker {worker_id} started')
+        try:
+            work(
+                worker_id,
+                once=options['once'],
+                poll_interval=options['poll_interval'],
+                on_job=self._report,
+            )
+        except KeyboardInterrupt:
+            self.stdout.write('Sync worker stopped')
+
+    def _report(self, job):
+        style = self.style.SUCCESS if job.status == job.STATUS_SUCCEEDED else self.style.WARNING
+        self.stdout.write(style(
+            f'{job}: {job.stored} stored, {job.updated} updated, {job.failed} failed'
+            + (f' - {job.error}' if job.error else '')
+        ))
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-17 02:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gmail_app', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='gmailaccount',
+            name='history_id',
+            field=models.CharField(blank=True, max_length=32),
+        ),
+    ]
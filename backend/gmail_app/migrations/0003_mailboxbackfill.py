@@ -0,0 +1,29 @@
+# Generated by Django 5.2.8 on 2026-10-17 02:59
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gmail_app', '0002_gmailaccount_history_id'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MailboxBackfill',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('complete', 'Complete')], default='pending', max_length=16)),
+                ('page_token', models.TextField(blank=True)),
+                ('processed', models.PositiveIntegerField(default=0)),
+                ('stored', models.PositiveIntegerField(default=0)),
+                ('messages_total', models.PositiveIntegerField(blank=True, null=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('completed_at', models.DateTimeField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('account', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='backfill', to='gmail_app.gmailaccount')),
+            ],
+        ),
+    ]
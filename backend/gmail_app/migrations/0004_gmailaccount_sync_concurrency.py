@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-17 03:01
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gmail_app', '0003_mailboxbackfill'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='gmailaccount',
+            name='sync_concurrency',
+            field=models.PositiveSmallIntegerField(default=4, help_text='Maximum concurrent Gmail requests while syncing this account'),
+        ),
+    ]
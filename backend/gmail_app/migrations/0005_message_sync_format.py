@@ -0,0 +1,23 @@
+# Generated by Django 5.2.8 on 2026-10-17 03:03
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gmail_app', '0004_gmailaccount_sync_concurrency'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='emailmessage',
+            name='payload_format',
+            field=models.CharField(choices=[('metadata', 'Metadata only'), ('full', 'Full message')], default='full', max_length=16),
+        ),
+        migrations.AddField(
+            model_name='gmailaccount',
+            name='sync_format',
+            field=models.CharField(choices=[('metadata', 'Metadata only'), ('full', 'Full message')], default='metadata', help_text='Metadata syncs fetch message bodies only when a message is opened', max_length=16),
+        ),
+    ]
@@ -0,0 +1,52 @@
+# Generated by Django 5.2.8 on 2026-10-17 03:04
+
+import json
+import zlib
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def move_payloads(apps, schema_editor):
+    EmailMessage = apps.get_model('gmail_app', 'EmailMessage')
+    EmailPayload = apps.get_model('gmail_app', 'EmailPayload')
+    batch = []
+    for message_id, content in EmailMessage.objects.values_list('id', 'raw_payload').iterator(chunk_size=500):
+        raw = json.dumps(content or {}, separators=(',', ':')).encode('utf-8')
+        batch.append(EmailPayload(message_id=message_id, data=zlib.compress(raw), size=len(raw)))
+        if len(batch) >= 500:
+            EmailPayload.objects.bulk_create(batch)
+            batch = []
+    EmailPayload.objects.bulk_create(batch)
+
+
+def restore_payloads(apps, schema_editor):
+    EmailMessage = apps.get_model('gmail_app', 'EmailMessage')
+    EmailPayload = apps.get_model('gmail_app', 'EmailPayload')
+    for payload in EmailPayload.objects.iterator(chunk_size=500):
+        content = json.loads(zlib.decompress(payload.data).decode('utf-8'))
+        EmailMessage.objects.filter(id=payload.message_id).update(raw_payload=content)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gmail_app', '0005_message_sync_format'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmailPayload',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('data', models.BinaryField()),
+                ('size', models.PositiveIntegerField(default=0, help_text='Uncompressed size in bytes')),
+                ('message', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='payload', to='gmail_app.emailmessage')),
+            ],
+        ),
+        migrations.RunPython(move_payloads, restore_payloads),
+        migrations.RemoveField(
+            model_name='emailmessage',
+            name='raw_payload',
+        ),
+    ]
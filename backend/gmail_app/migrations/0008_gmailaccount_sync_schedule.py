@@ -0,0 +1,28 @@
+# Generated by Django 5.2.8 on 2026-10-17 03:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gmail_app', '0007_syncjob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='gmailaccount',
+            name='last_synced_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='gmailaccount',
+            name='next_sync_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='gmailaccount',
+            name='sync_interval_seconds',
+            field=models.PositiveIntegerField(default=300, help_text='Current polling interval; adapted to how much new mail each sync finds'),
+        ),
+    ]
@@ -0,0 +1,63 @@
+from django.db import migrations
+
+# External-content FTS5 index over EmailMessage. The triggers keep it in step
+# with every insert, upsert and delete, including bulk_create, which bypasses
+# model signals.
+CREATE_SEARCH_INDEX = [
+    """
+    CREATE VIRTUAL TABLE gmail_app_emailmessage_fts USING fts5(
+        subject, sender, snippet,
+        content='gmail_app_emailmessage', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )
+    """,
+    """
+    CREATE TRIGGER gmail_app_emailmessage_fts_ai AFTER INSERT ON gmail_app_emailmessage BEGIN
+        INSERT INTO gmail_app_emailmessage_fts (rowid, subject, sender, snippet)
+        VALUES (new.id, new.subject, new.sender, new.snippet);
+    END
+    """,
+    """
+    CREATE TRIGGER gmail_app_emailmessage_fts_ad AFTER DELETE ON gmail_app_emailmessage BEGIN
+        INSERT INTO gmail_app_emailmessage_fts (gmail_app_emailmessage_fts, rowid, subject, sender, snippet)
+        VALUES ('delete', old.id, old.subject, old.sender, old.snippet);
+    END
+    """,
+    """
+    CREATE TRIGGER gmail_app_emailmessage_fts_au
+    AFTER UPDATE OF subject, sender, snippet ON gmail_app_emailmessage BEGIN
+        INSERT INTO gmail_app_emailmessage_fts (gmail_app_emailmessage_fts, rowid, subject, sender, snippet)
+        VALUES ('delete', old.id, old.subject, old.sender, old.snippet);
+        INSERT INTO gmail_app_emailmessage_fts (rowid, subject, sender, snippet)
+        VALUES (new.id, new.subject, new.sender, new.snippet);
+    END
+    """,
+    "INSERT INTO gmail_app_emailmessage_fts (gmail_app_emailmessage_fts) VALUES ('rebuild')",
+]
+
+DROP_SEARCH_INDEX = [
+    'DROP TRIGGER IF EXISTS gmail_app_emailmessage_fts_au',
+    'DROP TRIGGER IF EXISTS gmail_app_emailmessage_fts_ad',
+    'DROP TRIGGER IF EXISTS gmail_app_emailmessage_fts_ai',
+    'DROP TABLE IF EXISTS gmail_app_emailmessage_fts',
+]
+
+
+def _run_on_sqlite(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gmail_app', '0008_gmailaccount_sync_schedule'),
+    ]
+
+    operations = [
+        migrations.RunPython(_run_on_sqlite(CREATE_SEARCH_INDEX), _run_on_sqlite(DROP_SEARCH_INDEX)),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-17 03:11
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gmail_app', '0009_emailmessage_search'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='gmailaccount',
+            name='classified_through_id',
+            field=models.PositiveBigIntegerField(default=0, help_text='Highest message ID already run through the job-email classifier'),
+        ),
+    ]
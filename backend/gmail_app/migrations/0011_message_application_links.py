@@ -0,0 +1,162 @@
+# Generated by Django 5.2.8 on 2026-10-17 03:16
+
+import re
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Frozen copy of the gmail_app.senders helpers this migration was written
+# against, so later changes to the app cannot alter what it does.
+ATS_DOMAINS = {
+    'greenhouse.io', 'greenhouse-mail.io', 'lever.co', 'hire.lever.co', 'myworkday.com',
+    'myworkdayjobs.com', 'workday.com', 'smartrecruiters.com', 'ashbyhq.com', 'icims.com',
+    'jobvite.com', 'taleo.net', 'successfactors.com', 'bamboohr.com', 'workablemail.com',
+    'recruitee.com', 'breezy.hr', 'jazzhr.com', 'applytojob.com',
+}
+FREE_MAIL_DOMAINS = {
+    'gmail.com', 'googlemail.com', 'outlook.com', 'hotmail.com', 'live.com', 'yahoo.com',
+    'icloud.com', 'me.com', 'aol.com', 'proton.me', 'protonmail.com', 'linkedin.com',
+    'indeed.com', 'indeedemail.com', 'glassdoor.com', 'ziprecruiter.com',
+}
+SENDER_RE = re.compile(r'^\s*"?(?P<name>[^"<]*?)"?\s*<[^@>]+@(?P<domain>[^>]+)>|^[^@\s]+@(?P<bare>\S+)$')
+SECOND_LEVEL_SUFFIXES = {'co', 'com', 'org', 'net', 'ac', 'gov'}
+LEGAL_SUFFIXES = {
+    'inc', 'incorporated', 'llc', 'llp', 'ltd', 'limited', 'corp', 'corporation',
+    'co', 'company', 'gmbh', 'plc', 'sa', 'ag', 'bv', 'pty',
+}
+WORD_RE = re.compile(r'[a-z0-9]+')
+
+
+def registrable_domain(domain):
+    labels = domain.strip().lower().rstrip('.').split('.')
+    if len(labels) < 2:
+        return ''
+    keep = 3 if len(labels) >= 3 and len(labels[-1]) == 2 and labels[-2] in SECOND_LEVEL_SUFFIXES else 2
+    return '.'.join(labels[-keep:])
+
+
+def sender_domain(sender):
+    match = SENDER_RE.match(sender or '')
+    if not match:
+        return ''
+    return registrable_domain((match.group('domain') or match.group('bare') or '').strip().lower())
+
+
+def is_employer_domain(domain):
+    labels = domain.split('.')
+    is_ats = any('.'.join(labels[i:]) in ATS_DOMAINS for i in range(len(labels) - 1))
+    return bool(domain) and domain not in FREE_MAIL_DOMAINS and not is_ats
+
+
+def company_key(name):
+    words = WORD_RE.findall(name.lower().replace('&', ' and '))
+    if words and words[0] == 'the':
+        words = words[1:]
+    while len(words) > 1 and words[-1] in LEGAL_SUFFIXES:
+        words.pop()
+    key = ''.join(words)
+    return key if len(key) > 1 else ''
+
+
+def application_match_keys(company_name, contact_email):
+    keys = {company_key(company_name)}
+    domain = registrable_domain(contact_email.rpartition('@')[2]) if '@' in contact_email else ''
+    if is_employer_domain(domain):
+        keys.add(domain)
+        keys.add(company_key(domain.split('.')[0]))
+    keys.discard('')
+    return keys
+
+# Adding sender_domain makes SQLite rebuild the message table, which drops the
+# full-text triggers from 0009, so they are created again afterwards.
+RESTORE_SEARCH_TRIGGERS = [
+    'DROP TRIGGER IF EXISTS gmail_app_emailmessage_fts_ai',
+    'DROP TRIGGER IF EXISTS gmail_app_emailmessage_fts_ad',
+    'DROP TRIGGER IF EXISTS gmail_app_emailmessage_fts_au',
+    """
+    CREATE TRIGGER gmail_app_emailmessage_fts_ai AFTER INSERT ON gmail_app_emailmessage BEGIN
+        INSERT INTO gmail_app_emailmessage_fts (rowid, subject, sender, snippet)
+        VALUES (new.id, new.subject, new.sender, new.snippet);
+    END
+    """,
+    """
+    CREATE TRIGGER gmail_app_emailmessage_fts_ad AFTER DELETE ON gmail_app_emailmessage BEGIN
+        INSERT INTO gmail_app_emailmessage_fts (gmail_app_emailmessage_fts, rowid, subject, sender, snippet)
+        VALUES ('delete', old.id, old.subject, old.sender, old.snippet);
+    END
+    """,
+    """
+    CREATE TRIGGER gmail_app_emailmessage_fts_au
+    AFTER UPDATE OF subject, sender, snippet ON gmail_app_emailmessage BEGIN
+        INSERT INTO gmail_app_emailmessage_fts (gmail_app_emailmessage_fts, rowid, subject, sender, snippet)
+        VALUES ('delete', old.id, old.subject, old.sender, old.snippet);
+        INSERT INTO gmail_app_emailmessage_fts (rowid, subject, sender, snippet)
+        VALUES (new.id, new.subject, new.sender, new.snippet);
+    END
+    """,
+    "INSERT INTO gmail_app_emailmessage_fts (gmail_app_emailmessage_fts) VALUES ('rebuild')",
+]
+
+
+def _run_on_sqlite(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+def populate_links(apps, schema_editor):
+    EmailMessage = apps.get_model('gmail_app', 'EmailMessage')
+    ApplicationMatchKey = apps.get_model('gmail_app', 'ApplicationMatchKey')
+    GmailAccount = apps.get_model('gmail_app', 'GmailAccount')
+    JobApplication = apps.get_model('applications', 'JobApplication')
+
+    messages = []
+    for message in EmailMessage.objects.only('id', 'sender').iterator(chunk_size=2000):
+        message.sender_domain = sender_domain(message.sender)[:255]
+        messages.append(message)
+    EmailMessage.objects.bulk_update(messages, ['sender_domain'], batch_size=500)
+
+    ApplicationMatchKey.objects.bulk_create([
+        ApplicationMatchKey(application_id=application.id, key=key)
+        for application in JobApplication.objects.only('id', 'company_name', 'contact_email')
+        for key in application_match_keys(application.company_name, application.contact_email)
+    ])
+    # Stored mail is linked as the next sync runs the classifier over it again
+    GmailAccount.objects.update(classified_through_id=0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('applications', '0002_jobapplication_master_resume'),
+        ('gmail_app', '0010_gmailaccount_classified_through'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='emailmessage',
+            name='application',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='emails', to='applications.jobapplication'),
+        ),
+        migrations.AddField(
+            model_name='emailmessage',
+            name='sender_domain',
+            field=models.CharField(blank=True, db_index=True, max_length=255),
+        ),
+        migrations.RunPython(_run_on_sqlite(RESTORE_SEARCH_TRIGGERS), migrations.RunPython.noop),
+        migrations.CreateModel(
+            name='ApplicationMatchKey',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('key', models.CharField(db_index=True, max_length=255)),
+                ('application', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='match_keys', to='applications.jobapplication')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('application', 'key'), name='gmail_match_key_unique')],
+            },
+        ),
+        migrations.RunPython(populate_links, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,88 @@
+# Generated by Django 5.2.8 on 2026-10-17 03:18
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Frozen copy of gmail_app.threads.summarize_threads as of this migration.
+MAX_THREAD_PARTICIPANTS = 20
+
+
+def summarize_threads(messages):
+    summaries = {}
+    for thread_id, received_at, sender, subject, snippet in messages:
+        summary = summaries.get(thread_id)
+        if summary is None:
+            summary = summaries[thread_id] = {
+                'subject': subject,
+                'message_count': 0,
+                'first_message_at': received_at,
+                'participants': [],
+            }
+        summary['message_count'] += 1
+        summary['first_message_at'] = summary['first_message_at'] or received_at
+        summary['last_message_at'] = received_at
+        summary['latest_snippet'] = snippet
+        participants = summary['participants']
+        if sender and sender not in participants and len(participants) < MAX_THREAD_PARTICIPANTS:
+            participants.append(sender)
+    return summaries
+
+
+def build_threads(apps, schema_editor):
+    EmailMessage = apps.get_model('gmail_app', 'EmailMessage')
+    EmailThread = apps.get_model('gmail_app', 'EmailThread')
+    for account_id in EmailMessage.objects.values_list('account_id', flat=True).distinct():
+        messages = (
+            EmailMessage.objects.filter(account_id=account_id).exclude(thread_id='')
+            .order_by('thread_id', 'received_at', 'id')
+            .values_list('thread_id', 'received_at', 'sender', 'subject', 'snippet')
+        )
+        EmailThread.objects.bulk_create(
+            [
+                EmailThread(account_id=account_id, thread_id=thread_id, **summary)
+                for thread_id, summary in summarize_threads(messages.iterator(chunk_size=2000)).items()
+            ],
+            batch_size=500,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gmail_app', '0011_message_application_links'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmailThread',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('thread_id', models.CharField(max_length=128)),
+                ('subject', models.CharField(blank=True, max_length=255)),
+                ('message_count', models.PositiveIntegerField(default=0)),
+                ('first_message_at', models.DateTimeField(blank=True, null=True)),
+                ('last_message_at', models.DateTimeField(blank=True, null=True)),
+                ('participants', models.JSONField(blank=True, default=list)),
+                ('latest_snippet', models.TextField(blank=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='emailmessage',
+            index=models.Index(fields=['account', 'thread_id'], name='gmail_message_thread_idx'),
+        ),
+        migrations.AddField(
+            model_name='emailthread',
+            name='account',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='threads', to='gmail_app.gmailaccount'),
+        ),
+        migrations.AddIndex(
+            model_name='emailthread',
+            index=models.Index(fields=['account', '-last_message_at'], name='gmail_thread_recent_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='emailthread',
+            constraint=models.UniqueConstraint(fields=('account', 'thread_id'), name='gmail_thread_unique'),
+        ),
+        migrations.RunPython(build_threads, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.8 on 2026-10-17 03:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gmail_app', '0012_emailthread'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='emailmessage',
+            index=models.Index(fields=['account', 'received_at', 'id'], name='gmail_message_recent_idx'),
+        ),
+    ]
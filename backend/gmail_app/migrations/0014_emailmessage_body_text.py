@@ -0,0 +1,159 @@
+# Generated by Django 5.2.8 on 2026-10-17 03:23
+
+import base64
+import html
+import json
+import re
+import zlib
+
+from django.db import migrations, models
+
+# Frozen copy of gmail_app.gmail_client.extract_body_text and its helpers as of
+# this migration.
+BODY_TEXT_MAX_CHARS = 100_000
+CHARSET_RE = re.compile(r'charset\s*=\s*"?([\w.:-]+)', re.IGNORECASE)
+HTML_HIDDEN_RE = re.compile(r'<!--.*?-->|<(script|style|head|title)\b.*?</\1\s*>', re.IGNORECASE | re.DOTALL)
+HTML_BREAK_RE = re.compile(r'<(?:br|hr|/?(?:p|div|tr|li|ul|ol|table|blockquote|h[1-6]))\b[^>]*>', re.IGNORECASE)
+HTML_TAG_RE = re.compile(r'<[^>]*>')
+SPACE_RE = re.compile(r'[^\S\n]+')
+BLANK_LINES_RE = re.compile(r'\n\s*\n\s*')
+
+
+def iter_text_parts(payload):
+    """Yield ``(mime_type, text)`` for the inline text parts of a payload, in document order."""
+    stack = [payload]
+    while stack:
+        part = stack.pop()
+        children = part.get('parts')
+        if children:
+            stack.extend(reversed(children))
+            continue
+        mime_type = part.get('mimeType', '').lower()
+        data = part.get('body', {}).get('data')
+        if mime_type not in ('text/plain', 'text/html') or not data or part.get('filename'):
+            continue
+        content_type = ''
+        for header in part.get('headers', []):
+            if header.get('name', '').lower() == 'content-type':
+                content_type = header.get('value', '')
+        match = CHARSET_RE.search(content_type)
+        raw = base64.urlsafe_b64decode(data + '=' * (-len(data) % 4))
+        try:
+            text = raw.decode(match.group(1) if match else 'utf-8', errors='replace')
+        except LookupError:
+            text = raw.decode('utf-8', errors='replace')
+        yield mime_type, text
+
+
+def html_to_text(markup):
+    if '<' in markup:
+        markup = HTML_HIDDEN_RE.sub(' ', markup)
+        markup = HTML_BREAK_RE.sub('\n', markup)
+        markup = HTML_TAG_RE.sub(' ', markup)
+    if '&' in markup:
+        markup = html.unescape(markup)
+    return markup
+
+
+def extract_body_text(payload):
+    plain = []
+    html_parts = []
+    for mime_type, text in iter_text_parts(payload):
+        (plain if mime_type == 'text/plain' else html_parts).append(text)
+    text = '\n\n'.join(plain) if plain else '\n\n'.join(html_to_text(part) for part in html_parts)
+    text = SPACE_RE.sub(' ', text.replace('\r', ''))
+    text = '\n'.join(line.strip() for line in text.split('\n'))
+    return BLANK_LINES_RE.sub('\n\n', text).strip()[:BODY_TEXT_MAX_CHARS]
+
+
+def search_index_sql(columns):
+    """Statements creating the FTS5 index of 0009 over ``columns``, with its triggers."""
+    names = ', '.join(columns)
+    new_values = ', '.join(f'new.{column}' for column in columns)
+    old_values = ', '.join(f'old.{column}' for column in columns)
+    return [
+        f"""
+        CREATE VIRTUAL TABLE gmail_app_emailmessage_fts USING fts5(
+            {names},
+            content='gmail_app_emailmessage', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 2'
+        )
+        """,
+        f"""
+        CREATE TRIGGER gmail_app_emailmessage_fts_ai AFTER INSERT ON gmail_app_emailmessage BEGIN
+            INSERT INTO gmail_app_emailmessage_fts (rowid, {names}) VALUES (new.id, {new_values});
+        END
+        """,
+        f"""
+        CREATE TRIGGER gmail_app_emailmessage_fts_ad AFTER DELETE ON gmail_app_emailmessage BEGIN
+            INSERT INTO gmail_app_emailmessage_fts (gmail_app_emailmessage_fts, rowid, {names})
+            VALUES ('delete', old.id, {old_values});
+        END
+        """,
+        f"""
+        CREATE TRIGGER gmail_app_emailmessage_fts_au
+        AFTER UPDATE OF {names} ON gmail_app_emailmessage BEGIN
+            INSERT INTO gmail_app_emailmessage_fts (gmail_app_emailmessage_fts, rowid, {names})
+            VALUES ('delete', old.id, {old_values});
+            INSERT INTO gmail_app_emailmessage_fts (rowid, {names}) VALUES (new.id, {new_values});
+        END
+        """,
+        "INSERT INTO gmail_app_emailmessage_fts (gmail_app_emailmessage_fts) VALUES ('rebuild')",
+    ]
+
+
+DROP_SEARCH_INDEX = [
+    'DROP TRIGGER IF EXISTS gmail_app_emailmessage_fts_au',
+    'DROP TRIGGER IF EXISTS gmail_app_emailmessage_fts_ad',
+    'DROP TRIGGER IF EXISTS gmail_app_emailmessage_fts_ai',
+    'DROP TABLE IF EXISTS gmail_app_emailmessage_fts',
+]
+
+
+def _run_on_sqlite(statements):
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+def populate_body_text(apps, schema_editor):
+    EmailMessage = apps.get_model('gmail_app', 'EmailMessage')
+    EmailPayload = apps.get_model('gmail_app', 'EmailPayload')
+
+    messages = []
+    payloads = EmailPayload.objects.filter(message__payload_format='full').only('message_id', 'data')
+    for payload in payloads.iterator(chunk_size=500):
+        detail = json.loads(zlib.decompress(payload.data).decode('utf-8'))
+        body_text = extract_body_text(detail.get('payload', {}))
+        if body_text:
+            messages.append(EmailMessage(id=payload.message_id, body_text=body_text))
+        if len(messages) >= 500:
+            EmailMessage.objects.bulk_update(messages, ['body_text'])
+            messages = []
+    EmailMessage.objects.bulk_update(messages, ['body_text'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gmail_app', '0013_message_recent_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='emailmessage',
+            name='body_text',
+            field=models.TextField(blank=True, help_text='Normalized body text, extracted once when the full message is stored'),
+        ),
+        migrations.RunPython(populate_body_text, migrations.RunPython.noop),
+        # Rebuild the search index with the body as a fourth column. SQLite drops
+        # triggers whenever a column change remakes the message table (as 0011
+        # did), so they are always recreated here rather than altered.
+        migrations.RunPython(
+            _run_on_sqlite(DROP_SEARCH_INDEX + search_index_sql(['subject', 'sender', 'snippet', 'body_text'])),
+            _run_on_sqlite(DROP_SEARCH_INDEX + search_index_sql(['subject', 'sender', 'snippet'])),
+        ),
+    ]
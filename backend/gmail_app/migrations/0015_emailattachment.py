@@ -0,0 +1,79 @@
+# Generated by Django 5.2.8 on 2026-10-17 03:26
+
+import json
+import zlib
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def iter_attachment_parts(payload):
+    """Yield the leaf parts of a payload that carry a filename (frozen from gmail_app.gmail_client)."""
+    stack = [payload]
+    while stack:
+        part = stack.pop()
+        children = part.get('parts')
+        if children:
+            stack.extend(reversed(children))
+            continue
+        body = part.get('body', {})
+        if part.get('filename') and (body.get('attachmentId') or body.get('data')):
+            yield part
+
+
+BATCH_SIZE = 500
+
+
+def record_stored_attachments(apps, schema_editor):
+    EmailAttachment = apps.get_model('gmail_app', 'EmailAttachment')
+    EmailPayload = apps.get_model('gmail_app', 'EmailPayload')
+
+    # Written a batch at a time so a large mailbox never holds every attachment row in memory
+    rows = []
+    payloads = EmailPayload.objects.filter(message__payload_format='full').only('message_id', 'data')
+    for payload in payloads.iterator(chunk_size=BATCH_SIZE):
+        detail = json.loads(zlib.decompress(payload.data).decode('utf-8'))
+        rows.extend(
+            EmailAttachment(
+                message_id=payload.message_id,
+                part_id=part.get('partId', ''),
+                attachment_id=part['body'].get('attachmentId', ''),
+                filename=part['filename'][:255],
+                mime_type=part.get('mimeType', '')[:255],
+                size=part['body'].get('size', 0),
+            )
+            for part in iter_attachment_parts(detail.get('payload', {}))
+        )
+        if len(rows) >= BATCH_SIZE:
+            EmailAttachment.objects.bulk_create(rows, ignore_conflicts=True)
+            rows = []
+    if rows:
+        EmailAttachment.objects.bulk_create(rows, ignore_conflicts=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gmail_app', '0014_emailmessage_body_text'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EmailAttachment',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('part_id', models.CharField(max_length=64)),
+                ('attachment_id', models.TextField(blank=True, help_text='Gmail ID for messages.attachments.get')),
+                ('filename', models.CharField(blank=True, max_length=255)),
+                ('mime_type', models.CharField(blank=True, max_length=255)),
+                ('size', models.PositiveBigIntegerField(default=0)),
+                ('sha256', models.CharField(blank=True, db_index=True, max_length=64)),
+                ('downloaded_at', models.DateTimeField(blank=True, null=True)),
+                ('message', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='attachments', to='gmail_app.emailmessage')),
+            ],
+            options={
+                'constraints': [models.UniqueConstraint(fields=('message', 'part_id'), name='gmail_attachment_unique')],
+            },
+        ),
+        migrations.RunPython(record_stored_attachments, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 5.2.8 on 2026-10-17 03:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gmail_app', '0015_emailattachment'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='gmailaccount',
+            name='sync_filter',
+            field=models.JSONField(blank=True, default=dict, help_text='Which mail to sync; compiled into sync_query and sync_label_ids'),
+        ),
+        migrations.AddField(
+            model_name='gmailaccount',
+            name='sync_filter_version',
+            field=models.PositiveIntegerField(default=0, help_text='Incremented whenever the compiled filter changes'),
+        ),
+        migrations.AddField(
+            model_name='gmailaccount',
+            name='sync_label_ids',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddField(
+            model_name='gmailaccount',
+            name='sync_query',
+            field=models.TextField(blank=True, help_text='Gmail search expression messages are listed with'),
+        ),
+        migrations.AddField(
+            model_name='mailboxbackfill',
+            name='filter_version',
+            field=models.PositiveIntegerField(default=0, help_text='Account filter version this walk was started for'),
+        ),
+        migrations.AddField(
+            model_name='mailboxbackfill',
+            name='label_ids',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddField(
+            model_name='mailboxbackfill',
+            name='query',
+            field=models.TextField(blank=True, help_text='Gmail search expression this walk lists messages with'),
+        ),
+    ]
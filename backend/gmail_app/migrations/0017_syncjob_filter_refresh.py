@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-17 04:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('gmail_app', '0016_sync_filter'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='syncjob',
+            name='kind',
+            field=models.CharField(choices=[('sync', 'Sync'), ('backfill', 'Backfill'), ('filter_refresh', 'Filter refresh')], default='sync', max_length=16),
+        ),
+    ]
@@ -1,8 +1,20 @@
+import json
+import zlib
+
 from django.conf import settings
 from django.db import models
+from django.utils import timezone
 
 
 class GmailAccount(models.Model):
+    SYNC_FORMAT_METADATA = 'metadata'
+    SYNC_FORMAT_FULL = 'full'
+
+    SYNC_FORMAT_CHOICES = [
+        (SYNC_FORMAT_METADATA, 'Metadata only'),
+        (SYNC_FORMAT_FULL, 'Full message'),
+    ]
+
     user = models.OneToOneField(
         settings.AUTH_USER_MODEL,
         on_delete=models.CASCADE,
@@ -13,6 +25,38 @@ class GmailAccount(models.Model):
     refresh_token = models.TextField(blank=True)
     token_expiry = models.DateTimeField(null=True, blank=True)
     scope = models.TextField(blank=True)
+    history_id = models.CharField(max_length=32, blank=True)
+    sync_concurrency = models.PositiveSmallIntegerField(
+        default=4,
+        help_text='Maximum concurrent Gmail requests while syncing this account',
+    )
+    sync_format = models.CharField(
+        max_length=16,
+        choices=SYNC_FORMAT_CHOICES,
+        default=SYNC_FORMAT_METADATA,
+        help_text='Metadata syncs fetch message bodies only when a message is opened',
+    )
+    sync_interval_seconds = models.PositiveIntegerField(
+        default=300,
+        help_text='Current polling interval; adapted to how much new mail each sync finds',
+    )
+    last_synced_at = models.DateTimeField(null=True, blank=True)
+    next_sync_at = models.DateTimeField(null=True, blank=True, db_index=True)
+    classified_through_id = models.PositiveBigIntegerField(
+        default=0,
+        help_text='Highest message ID already run through the job-email classifier',
+    )
+    sync_filter = models.JSONField(
+        default=dict,
+        blank=True,
+        help_text='Which mail to sync; compiled into sync_query and sync_label_ids',
+    )
+    sync_query = models.TextField(blank=True, help_text='Gmail search expression messages are listed with')
+    sync_label_ids = models.JSONField(default=list, blank=True)
+    sync_filter_version = models.PositiveIntegerField(
+        default=0,
+        help_text='Incremented whenever the compiled filter changes',
+    )
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
@@ -30,14 +74,248 @@ class EmailMessage(models.Model):
     thread_id = models.CharField(max_length=128, blank=True)
     subject = models.CharField(max_length=255, blank=True)
     sender = models.CharField(max_length=255, blank=True)
+    sender_domain = models.CharField(max_length=255, blank=True, db_index=True)
     snippet = models.TextField(blank=True)
+    body_text = models.TextField(
+        blank=True,
+        help_text='Normalized body text, extracted once when the full message is stored',
+    )
     received_at = models.DateTimeField(null=True, blank=True)
-    raw_payload = models.JSONField(default=dict, blank=True)
+    application = models.ForeignKey(
+        'applications.JobApplication',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='emails',
+    )
+    payload_format = models.CharField(
+        max_length=16,
+        choices=GmailAccount.SYNC_FORMAT_CHOICES,
+        default=GmailAccount.SYNC_FORMAT_FULL,
+    )
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['account', 'thread_id'], name='gmail_message_thread_idx'),
+            # Keyset pagination walks (received_at, id) newest first within an account
+            models.Index(fields=['account', 'received_at', 'id'], name='gmail_message_recent_idx'),
+        ]
+
     def __str__(self) -> str:
         return f'{self.subject or "No subject"} ({self.gmail_message_id})'
 
+    @property
+    def is_hydrated(self) -> bool:
+        return self.payload_format == GmailAccount.SYNC_FORMAT_FULL
+
+    @property
+    def raw_payload(self) -> dict:
+        """Gmail API payload, loaded from the compressed ``EmailPayload`` row."""
+        try:
+            return self.payload.content
+        except EmailPayload.DoesNotExist:
+            return {}
+
+
+class EmailThread(models.Model):
+    """Conversation summary kept current by sync, so listing threads never groups messages."""
+
+    account = models.ForeignKey(
+        GmailAccount,
+        on_delete=models.CASCADE,
+        related_name='threads',
+    )
+    thread_id = models.CharField(max_length=128)
+    subject = models.CharField(max_length=255, blank=True)
+    message_count = models.PositiveIntegerField(default=0)
+    first_message_at = models.DateTimeField(null=True, blank=True)
+    last_message_at = models.DateTimeField(null=True, blank=True)
+    participants = models.JSONField(default=list, blank=True)
+    latest_snippet = models.TextField(blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['account', 'thread_id'], name='gmail_thread_unique'),
+        ]
+        indexes = [
+            models.Index(fields=['account', '-last_message_at'], name='gmail_thread_recent_idx'),
+        ]
+
+    def __str__(self) -> str:
+        return f'{self.subject or "No subject"} ({self.message_count} messages)'
+
+
+class EmailPayload(models.Model):
+    """zlib-compressed Gmail payload, stored apart so message list queries never read it."""
+
+    message = models.OneToOneField(
+        EmailMessage,
+        on_delete=models.CASCADE,
+        related_name='payload',
+    )
+    data = models.BinaryField()
+    size = models.PositiveIntegerField(default=0, help_text='Uncompressed size in bytes')
+
+    def __str__(self) -> str:
+        return f'Payload for message {self.message_id} ({self.size} bytes)'
+
+    @classmethod
+    def from_content(cls, message_id: int, content: dict) -> 'EmailPayload':
+        raw = json.dumps(content, separators=(',', ':')).encode('utf-8')
+        return cls(message_id=message_id, data=zlib.compress(raw), size=len(raw))
+
+    @property
+    def content(self) -> dict:
+        return json.loads(zlib.decompress(self.data).decode('utf-8'))
+
+
+class EmailAttachment(models.Model):
+    """A message's attachment; once downloaded its content sits in the attachment store under ``sha256``."""
+
+    message = models.ForeignKey(
+        EmailMessage,
+        on_delete=models.CASCADE,
+        related_name='attachments',
+    )
+    part_id = models.CharField(max_length=64)
+    attachment_id = models.TextField(blank=True, help_text='Gmail ID for messages.attachments.get')
+    filename = models.CharField(max_length=255, blank=True)
+    mime_type = models.CharField(max_length=255, blank=True)
+    size = models.PositiveBigIntegerField(default=0)
+    sha256 = models.CharField(max_length=64, blank=True, db_index=True)
+    downloaded_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['message', 'part_id'], name='gmail_attachment_unique'),
+        ]
+
+    def __str__(self) -> str:
+        return f'{self.filename or "Attachment"} ({self.size} bytes)'
+
+    @property
+    def is_downloaded(self) -> bool:
+        return bool(self.sha256)
+
+
+class MailboxBackfill(models.Model):
+    """Resumable checkpoint for walking an account's whole mailbox, newest first."""
+
+    STATUS_PENDING = 'pending'
+    STATUS_RUNNING = 'running'
+    STATUS_COMPLETE = 'complete'
+
+    STATUS_CHOICES = [
+        (STATUS_PENDING, 'Pending'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_COMPLETE, 'Complete'),
+    ]
+
+    account = models.OneToOneField(
+        GmailAccount,
+        on_delete=models.CASCADE,
+        related_name='backfill',
+    )
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=STATUS_PENDING)
+    page_token = models.TextField(blank=True)
+    processed = models.PositiveIntegerField(default=0)
+    stored = models.PositiveIntegerField(default=0)
+    messages_total = models.PositiveIntegerField(null=True, blank=True)
+    query = models.TextField(blank=True, help_text='Gmail search expression this walk lists messages with')
+    label_ids = models.JSONField(default=list, blank=True)
+    filter_version = models.PositiveIntegerField(
+        default=0,
+        help_text='Account filter version this walk was started for',
+    )
+    started_at = models.DateTimeField(null=True, blank=True)
+    completed_at = models.DateTimeField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self) -> str:
+        return f'{self.account} backfill ({self.status}, {self.processed} processed)'
+
+
+class SyncJob(models.Model):
+    """A queued Gmail sync, backfill or filter refresh, executed by the ``run_sync_worker`` command."""
+
+    KIND_SYNC = 'sync'
+    KIND_BACKFILL = 'backfill'
+    KIND_FILTER_REFRESH = 'filter_refresh'
+
+    KIND_CHOICES = [
+        (KIND_SYNC, 'Sync'),
+        (KIND_BACKFILL, 'Backfill'),
+        (KIND_FILTER_REFRESH, 'Filter refresh'),
+    ]
+
+    STATUS_QUEUED = 'queued'
+    STATUS_RUNNING = 'running'
+    STATUS_SUCCEEDED = 'succeeded'
+    STATUS_FAILED = 'failed'
+
+    STATUS_CHOICES = [
+        (STATUS_QUEUED, 'Queued'),
+        (STATUS_RUNNING, 'Running'),
+        (STATUS_SUCCEEDED, 'Succeeded'),
+        (STATUS_FAILED, 'Failed'),
+    ]
+
+    ACTIVE_STATUSES = [STATUS_QUEUED, STATUS_RUNNING]
+
+    account = models.ForeignKey(
+        GmailAccount,
+        on_delete=models.CASCADE,
+        related_name='sync_jobs',
+    )
+    kind = models.CharField(max_length=16, choices=KIND_CHOICES, default=KIND_SYNC)
+    status = models.CharField(max_length=16, choices=STATUS_CHOICES, default=STATUS_QUEUED)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=3)
+    run_after = models.DateTimeField(default=timezone.now)
+    worker_id = models.CharField(max_length=128, blank=True)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    fetched = models.PositiveIntegerField(default=0)
+    stored = models.PositiveIntegerField(default=0)
+    updated = models.PositiveIntegerField(default=0)
+    failed = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['status', 'run_after'], name='gmail_syncjob_queue_idx'),
+        ]
+
+    def __str__(self) -> str:
+        return f'{self.get_kind_display()} job {self.pk} for {self.account} ({self.status})'
+
+
+class ApplicationMatchKey(models.Model):
+    """Normalized sender domain or company name that identifies a job application.
+
+    Rows are kept current by signals on ``JobApplication`` so new messages are
+    linked with one indexed lookup per batch instead of scanning applications.
+    """
+
+    application = models.ForeignKey(
+        'applications.JobApplication',
+        on_delete=models.CASCADE,
+        related_name='match_keys',
+    )
+    key = models.CharField(max_length=255, db_index=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['application', 'key'], name='gmail_match_key_unique'),
+        ]
+
+    def __str__(self) -> str:
+        return f'{self.key} -> {self.application_id}'
+
 
 class JobApplicationEmail(models.Model):
     STATUS_APPLIED = 'applied'
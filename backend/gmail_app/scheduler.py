@@ -0,0 +1,62 @@
+from datetime import timedelta
+
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .models import GmailAccount, SyncJob
+
+# Bounds for the adaptive per-account polling interval.
+MIN_SYNC_INTERVAL_SECONDS = 60
+MAX_SYNC_INTERVAL_SECONDS = 60 * 60
+# Busy mailboxes poll twice as often; quiet ones back off gradually.
+BUSY_INTERVAL_FACTOR = 0.5
+QUIET_INTERVAL_FACTOR = 1.5
+
+
+def schedule_due_accounts() -> list[SyncJob]:
+    """Queue one sync job for every account whose next sync is due.
+
+    The most overdue accounts are queued first, and an account that already has
+    an active sync job is not queued again, so every account gets one turn per
+    round however large its mailbox.
+    """
+    now = timezone.now()
+    due = list(
+        GmailAccount.objects.filter(Q(next_sync_at__isnull=True) | Q(next_sync_at__lte=now))
+        .order_by(F('next_sync_at').asc(nulls_first=True), 'id')
+        .only('id', 'sync_interval_seconds')
+    )
+    if not due:
+        return []
+
+    busy_ids = set(
+        SyncJob.objects.filter(
+            account_id__in=[account.id for account in due],
+            kind=SyncJob.KIND_SYNC,
+            status__in=SyncJob.ACTIVE_STATUSES,
+        ).values_list('account_id', flat=True)
+    )
+    jobs = SyncJob.objects.bulk_create([
+        SyncJob(account_id=account.id, kind=SyncJob.KIND_SYNC, run_after=now)
+        for account in due
+        if account.id not in busy_ids
+    ])
+
+    # Provisional; record_sync_result sets the real next run when the job finishes
+    for account in due:
+        account.next_sync_at = now + timedelta(seconds=account.sync_interval_seconds)
+    GmailAccount.objects.bulk_update(due, ['next_sync_at'])
+    return jobs
+
+
+def record_sync_result(account: GmailAccount, stored: int) -> None:
+    """Adapt the account's polling interval to the mail velocity seen by a sync."""
+    factor = BUSY_INTERVAL_FACTOR if stored else QUIET_INTERVAL_FACTOR
+    interval = int(account.sync_interval_seconds * factor)
+    interval = max(MIN_SYNC_INTERVAL_SECONDS, min(MAX_SYNC_INTERVAL_SECONDS, interval))
+
+    now = timezone.now()
+    account.sync_interval_seconds = interval
+    account.last_synced_at = now
+    account.next_sync_at = now + timedelta(seconds=interval)
+    account.save(update_fields=['sync_interval_seconds', 'last_synced_at', 'next_sync_at'])
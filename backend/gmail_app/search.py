@@ -0,0 +1,123 @@
+import html
+import re
+
+from django.db import connection
+from django.db.models import Q
+
+from .models import EmailMessage
+from .pagination import InvalidCursorError, clamp_page_size, decode_cursor, encode_cursor, paginate_by_recency
+
+SEARCH_TABLE = 'gmail_app_emailmessage_fts'
+# bm25 column weights: subject, sender, snippet, body_text
+SEARCH_WEIGHTS = (10.0, 4.0, 2.0, 1.0)
+SEARCH_PAGE_SIZE = 20
+SEARCH_MAX_PAGE_SIZE = 100
+SNIPPET_TOKENS = 24
+
+# Control characters never appear in mail text, so they can mark matches
+# through html.escape and be swapped for tags afterwards.
+_MATCH_START = '\x02'
+_MATCH_END = '\x03'
+_TERM_RE = re.compile(r'\w+')
+# Fields the non-SQLite fallback looks for each word in
+_FALLBACK_FIELDS = ('subject', 'sender', 'snippet', 'body_text')
+
+
+def search_enabled() -> bool:
+    return connection.vendor == 'sqlite'
+
+
+def build_match_query(query: str) -> str:
+    """Turn free text into an FTS5 query: every word must match, the last as a prefix."""
+    terms = _TERM_RE.findall(query)
+    if not terms:
+        return ''
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += '*'
+    return ' '.join(quoted)
+
+
+def search_messages(
+    account_id: int,
+    query: str,
+    cursor: str | None = None,
+    limit: int = SEARCH_PAGE_SIZE,
+) -> tuple[list[EmailMessage], str | None]:
+    """Return one page of the account's messages ranked by relevance, and the next cursor.
+
+    Pages are keyed on ``(rank, id)`` rather than offsets, so deep pages cost the
+    same as the first. Each message carries ``subject_highlight`` and
+    ``snippet_highlight`` with matches wrapped in ``<mark>`` and the rest escaped;
+    the latter is cut from the body text when only the body matched.
+
+    Databases without FTS5 fall back to substring matching, newest first.
+    """
+    match = build_match_query(query)
+    if not match:
+        return [], None
+    limit = clamp_page_size(limit, SEARCH_PAGE_SIZE, SEARCH_MAX_PAGE_SIZE)
+    if not search_enabled():
+        return _search_messages_fallback(account_id, query, cursor, limit)
+
+    score = f'bm25({SEARCH_TABLE}, {", ".join(str(w) for w in SEARCH_WEIGHTS)})'
+    sql = [
+        f'SELECT m.id, {score},',
+        f'  highlight({SEARCH_TABLE}, 0, %s, %s),',
+        f"  snippet({SEARCH_TABLE}, 2, %s, %s, '…', {SNIPPET_TOKENS}),",
+        f"  snippet({SEARCH_TABLE}, 3, %s, %s, '…', {SNIPPET_TOKENS})",
+        # CROSS JOIN pins the join order: walk the full-text matches, then look up each row
+        f'FROM {SEARCH_TABLE} CROSS JOIN gmail_app_emailmessage AS m ON m.id = {SEARCH_TABLE}.rowid',
+        f'WHERE {SEARCH_TABLE} MATCH %s AND m.account_id = %s',
+    ]
+    params = [_MATCH_START, _MATCH_END] * 3 + [match, account_id]
+    if cursor:
+        last_score, last_id = _decode_search_cursor(cursor)
+        sql.append(f'AND ({score} > %s OR ({score} = %s AND m.id > %s))')
+        params += [last_score, last_score, last_id]
+    sql.append(f'ORDER BY {score}, m.id LIMIT %s')
+    params.append(limit + 1)
+
+    with connection.cursor() as db:
+        db.execute('\n'.join(sql), params)
+        rows = db.fetchall()
+
+    next_cursor = encode_cursor([rows[limit - 1][1], rows[limit - 1][0]]) if len(rows) > limit else None
+    rows = rows[:limit]
+    messages = EmailMessage.objects.defer('body_text').in_bulk([row[0] for row in rows])
+    results = []
+    for message_id, _, subject, snippet, body in rows:
+        message = messages.get(message_id)
+        if message is None:
+            continue
+        if _MATCH_START not in snippet and _MATCH_START in body:
+            snippet = body
+        message.subject_highlight = _render_highlight(subject)
+        message.snippet_highlight = _render_highlight(snippet)
+        results.append(message)
+    return results, next_cursor
+
+
+def _search_messages_fallback(account_id: int, query: str, cursor: str | None, limit: int):
+    messages = EmailMessage.objects.filter(account_id=account_id).defer('body_text')
+    for term in _TERM_RE.findall(query):
+        matches_term = Q()
+        for field in _FALLBACK_FIELDS:
+            matches_term |= Q(**{f'{field}__icontains': term})
+        messages = messages.filter(matches_term)
+    page, next_cursor = paginate_by_recency(messages, 'received_at', cursor, limit)
+    for message in page:
+        message.subject_highlight = html.escape(message.subject)
+        message.snippet_highlight = html.escape(message.snippet)
+    return page, next_cursor
+
+
+def _decode_search_cursor(cursor: str) -> tuple[float, int]:
+    score, message_id = decode_cursor(cursor, 2)
+    if not isinstance(score, (int, float)) or not isinstance(message_id, int):
+        raise InvalidCursorError('Invalid cursor.')
+    return float(score), message_id
+
+
+def _render_highlight(text: str | None) -> str:
+    escaped = html.escape(text or '')
+    return escaped.replace(_MATCH_START, '<mark>').replace(_MATCH_END, '</mark>')
@@ -0,0 +1,94 @@
+import re
+
+# Applicant tracking systems send on behalf of the hiring company.
+ATS_DOMAINS = {
+    'greenhouse.io', 'greenhouse-mail.io', 'lever.co', 'hire.lever.co', 'myworkday.com',
+    'myworkdayjobs.com', 'workday.com', 'smartrecruiters.com', 'ashbyhq.com', 'icims.com',
+    'jobvite.com', 'taleo.net', 'successfactors.com', 'bamboohr.com', 'workablemail.com',
+    'recruitee.com', 'breezy.hr', 'jazzhr.com', 'applytojob.com',
+}
+# Shared mail and job-board domains say nothing about the employer.
+FREE_MAIL_DOMAINS = {
+    'gmail.com', 'googlemail.com', 'outlook.com', 'hotmail.com', 'live.com', 'yahoo.com',
+    'icloud.com', 'me.com', 'aol.com', 'proton.me', 'protonmail.com', 'linkedin.com',
+    'indeed.com', 'indeedemail.com', 'glassdoor.com', 'ziprecruiter.com',
+}
+
+SENDER_RE = re.compile(r'^\s*"?(?P<name>[^"<]*?)"?\s*<[^@>]+@(?P<domain>[^>]+)>|^[^@\s]+@(?P<bare>\S+)$')
+_SECOND_LEVEL_SUFFIXES = {'co', 'com', 'org', 'net', 'ac', 'gov'}
+_LEGAL_SUFFIXES = {
+    'inc', 'incorporated', 'llc', 'llp', 'ltd', 'limited', 'corp', 'corporation',
+    'co', 'company', 'gmbh', 'plc', 'sa', 'ag', 'bv', 'pty',
+}
+_WORD_RE = re.compile(r'[a-z0-9]+')
+
+
+def parse_sender(sender: str) -> tuple[str, str]:
+    """Split a From header into ``(display name, lower-cased domain)``."""
+    match = SENDER_RE.match(sender or '')
+    if not match:
+        return sender or '', ''
+    domain = (match.group('domain') or match.group('bare') or '').strip().lower()
+    return (match.group('name') or '').strip(), domain
+
+
+def sender_domain(sender: str) -> str:
+    """Registrable domain of a From header: ``Jo <jo@mail.acme.co.uk>`` -> ``acme.co.uk``."""
+    return registrable_domain(parse_sender(sender)[1])
+
+
+def registrable_domain(domain: str) -> str:
+    labels = domain.strip().lower().rstrip('.').split('.')
+    if len(labels) < 2:
+        return ''
+    keep = 3 if len(labels) >= 3 and len(labels[-1]) == 2 and labels[-2] in _SECOND_LEVEL_SUFFIXES else 2
+    return '.'.join(labels[-keep:])
+
+
+def is_ats_domain(domain: str) -> bool:
+    labels = domain.split('.')
+    return any('.'.join(labels[i:]) in ATS_DOMAINS for i in range(len(labels) - 1))
+
+
+def is_employer_domain(domain: str) -> bool:
+    """Whether mail from ``domain`` identifies the company itself."""
+    return bool(domain) and domain not in FREE_MAIL_DOMAINS and not is_ats_domain(domain)
+
+
+def company_from_domain(domain: str) -> str:
+    """``mail.acme-labs.co.uk`` -> ``Acme Labs``."""
+    name = (registrable_domain(domain) or domain).split('.')[0]
+    return name.replace('-', ' ').replace('_', ' ').title()
+
+
+def company_key(name: str) -> str:
+    """Normalize a company name for matching: ``The Acme Corp.`` and ``acme.com`` -> ``acme``."""
+    words = _WORD_RE.findall(name.lower().replace('&', ' and '))
+    if words and words[0] == 'the':
+        words = words[1:]
+    while len(words) > 1 and words[-1] in _LEGAL_SUFFIXES:
+        words.pop()
+    key = ''.join(words)
+    return key if len(key) > 1 else ''
+
+
+def domain_company_key(domain: str) -> str:
+    """Company key implied by an employer domain, or ``''`` for shared and ATS domains."""
+    if not is_employer_domain(domain):
+        return ''
+    return company_key(domain.split('.')[0])
+
+
+def application_match_keys(company_name: str, contact_email: str) -> set[str]:
+    """Keys an application is found by: its contact's employer domain and company name.
+
+    Domain keys always contain a dot and company keys never do, so both share
+    one namespace.
+    """
+    keys = {company_key(company_name)}
+    domain = registrable_domain(contact_email.rpartition('@')[2]) if '@' in contact_email else ''
+    if is_employer_domain(domain):
+        keys.add(domain)
+        keys.add(domain_company_key(domain))
+    keys.discard('')
+    return keys
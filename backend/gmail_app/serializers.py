@@ -1,5 +1,14 @@
 from rest_framework import serializers
-from .models import GmailAccount, EmailMessage, JobApplicationEmail
+from .models import (
+    EmailAttachment,
+    EmailMessage,
+    EmailThread,
+    GmailAccount,
+    JobApplicationEmail,
+    MailboxBackfill,
+    SyncJob,
+)
+from .sync_filter import DEFAULT_FILTER_KEYWORDS, FILTER_CATEGORIES
 
 
 class GmailAccountSerializer(serializers.ModelSerializer):
@@ -14,6 +23,72 @@ class EmailMessageSerializer(serializers.ModelSerializer):
         fields = ['id', 'gmail_message_id', 'thread_id', 'subject', 'sender', 'snippet', 'received_at']
 
 
+class EmailAttachmentSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = EmailAttachment
+        fields = ['id', 'filename', 'mime_type', 'size', 'is_downloaded']
+
+
+class EmailMessageDetailSerializer(EmailMessageSerializer):
+    attachments = EmailAttachmentSerializer(many=True, read_only=True)
+
+    class Meta(EmailMessageSerializer.Meta):
+        fields = EmailMessageSerializer.Meta.fields + ['body_text', 'attachments', 'raw_payload']
+
+
+class EmailSearchResultSerializer(EmailMessageSerializer):
+    subject_highlight = serializers.CharField(read_only=True)
+    snippet_highlight = serializers.CharField(read_only=True)
+
+    class Meta(EmailMessageSerializer.Meta):
+        fields = EmailMessageSerializer.Meta.fields + ['subject_highlight', 'snippet_highlight']
+
+
+class EmailThreadSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = EmailThread
+        fields = [
+            'id', 'thread_id', 'subject', 'message_count', 'first_message_at',
+            'last_message_at', 'participants', 'latest_snippet',
+        ]
+
+
+class MailboxBackfillSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = MailboxBackfill
+        fields = [
+            'status', 'processed', 'stored', 'messages_total', 'query',
+            'started_at', 'completed_at', 'updated_at',
+        ]
+
+
+class SyncFilterSerializer(serializers.Serializer):
+    """Settings an account's Gmail search filter is compiled from."""
+
+    enabled = serializers.BooleanField(default=False)
+    domains = serializers.ListField(child=serializers.CharField(max_length=253), default=list)
+    keywords = serializers.ListField(
+        child=serializers.CharField(max_length=100),
+        default=lambda: list(DEFAULT_FILTER_KEYWORDS),
+    )
+    include_ats = serializers.BooleanField(default=True)
+    include_applications = serializers.BooleanField(default=True)
+    exclude_categories = serializers.ListField(
+        child=serializers.ChoiceField(choices=FILTER_CATEGORIES),
+        default=list,
+    )
+    label_ids = serializers.ListField(child=serializers.CharField(max_length=64), default=list)
+
+
+class SyncJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = SyncJob
+        fields = [
+            'id', 'kind', 'status', 'attempts', 'fetched', 'stored', 'updated', 'failed',
+            'error', 'created_at', 'started_at', 'finished_at',
+        ]
+
+
 class JobApplicationEmailSerializer(serializers.ModelSerializer):
     message = EmailMessageSerializer(read_only=True)
 
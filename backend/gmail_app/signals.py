@@ -0,0 +1,32 @@
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+
+from applications.models import JobApplication
+from applications.signals import applications_import_finished
+
+from .linking import INDEX_BATCH_SIZE, index_applications
+from .sync_filter import schedule_sync_filter_refresh
+
+
+@receiver(post_save, sender=JobApplication)
+def reindex_application(sender, instance, raw=False, **kwargs):
+    """Keep the application's email match keys, and sync filters following it, in step."""
+    if raw:
+        return
+    if index_applications([instance]):
+        transaction.on_commit(schedule_sync_filter_refresh)
+
+
+@receiver(applications_import_finished)
+def reindex_imported_applications(sender, application_ids, **kwargs):
+    """Index a whole import at once, so its mail is linked and filters refreshed a single time."""
+    if index_applications(_load_applications(application_ids)):
+        transaction.on_commit(schedule_sync_filter_refresh)
+
+
+def _load_applications(application_ids):
+    for start in range(0, len(application_ids), INDEX_BATCH_SIZE):
+        yield from JobApplication.objects.filter(
+            pk__in=application_ids[start:start + INDEX_BATCH_SIZE],
+        ).only('id', 'company_name', 'contact_email')
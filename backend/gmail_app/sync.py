@@ -0,0 +1,369 @@
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from .attachments import record_attachments
+from .classifier import classify_new_messages
+from .fetch_engine import (
+    HISTORY_LIST_UNITS,
+    MESSAGES_LIST_UNITS,
+    PROFILE_UNITS,
+    GmailFetchEngine,
+)
+from .gmail_client import (
+    MESSAGE_FORMAT_FULL,
+    HistoryExpiredError,
+    extract_body_text,
+    get_profile,
+    list_history_changes,
+    list_message_ids,
+    list_messages_page,
+    message_get_params,
+    parse_gmail_headers,
+    parse_rfc2822_datetime,
+)
+from .models import EmailMessage, EmailPayload, GmailAccount, MailboxBackfill
+from .senders import sender_domain
+from .threads import refresh_threads
+
+# Upper bound on messages listed when there is no usable history ID.
+FULL_RESYNC_LIMIT = 500
+
+BACKFILL_PAGE_SIZE = 100
+
+# Upper bound on IDs listed to narrow an incremental sync to the account's filter.
+FILTERED_SYNC_LIMIT = 2000
+# Slack on the ``after:`` bound of that listing, which Gmail applies by day.
+FILTERED_SYNC_OVERLAP = timedelta(days=1)
+
+# Rows per INSERT statement when writing messages.
+STORE_BATCH_SIZE = 500
+
+UPSERT_FIELDS = ['thread_id', 'subject', 'sender', 'sender_domain', 'snippet', 'received_at']
+# Only written by full-format syncs, which are the ones that carry a body.
+FULL_UPSERT_FIELDS = ['payload_format', 'body_text']
+
+SYNC_MODE_FULL = 'full'
+SYNC_MODE_INCREMENTAL = 'incremental'
+
+
+def sync_account(account: GmailAccount, access_token: str, update_existing: bool = False) -> dict:
+    """Pull messages added or changed since the account's last sync.
+
+    Uses ``users.history.list`` when a history ID is stored, and falls back to a
+    bounded full resync for first syncs or when that history has expired. The
+    stored history ID only advances once every listed message has been fetched.
+    New messages are then run through the job-email classifier, which fetches
+    the bodies of likely job mail synced in metadata format.
+
+    With a sync filter, the full resync lists only matching messages, and
+    history changes are narrowed to them before anything is fetched.
+    """
+    engine = GmailFetchEngine(account, access_token)
+    mode = SYNC_MODE_INCREMENTAL
+    message_ids: list[str] = []
+    history_id = ''
+    if account.history_id:
+        try:
+            message_ids, history_id = engine.call(
+                list_history_changes, access_token, account.history_id, units=HISTORY_LIST_UNITS,
+            )
+        except HistoryExpiredError:
+            mode = SYNC_MODE_FULL
+        else:
+            message_ids = _filter_message_ids(account, engine, access_token, message_ids)
+    else:
+        mode = SYNC_MODE_FULL
+
+    if mode == SYNC_MODE_FULL:
+        # Read the history ID before listing so nothing arriving mid-sync is missed
+        history_id = engine.call(get_profile, access_token, units=PROFILE_UNITS).get('historyId', '')
+        message_ids = engine.call(
+            list_message_ids,
+            access_token,
+            FULL_RESYNC_LIMIT,
+            query=account.sync_query,
+            label_ids=account.sync_label_ids,
+            units=MESSAGES_LIST_UNITS,
+        )
+
+    listed = len(message_ids)
+    stored, updated, failed = fetch_and_store(account, engine, message_ids, update_existing)
+
+    if history_id and history_id != account.history_id and not failed:
+        account.history_id = history_id
+        account.save(update_fields=['history_id'])
+
+    classified = classify_new_messages(account, access_token)
+    return {
+        'mode': mode,
+        'fetched': listed,
+        'stored': stored,
+        'updated': updated,
+        'failed': len(failed),
+        'classified': classified,
+    }
+
+
+def _filter_message_ids(
+    account: GmailAccount,
+    engine: GmailFetchEngine,
+    access_token: str,
+    message_ids: list[str],
+) -> list[str]:
+    # History has no search, so list what matches the filter since the last sync and intersect
+    if not message_ids or not (account.sync_query or account.sync_label_ids) or not account.last_synced_at:
+        return message_ids
+    since = int((account.last_synced_at - FILTERED_SYNC_OVERLAP).timestamp())
+    query = f'({account.sync_query}) after:{since}' if account.sync_query else f'after:{since}'
+    matching = engine.call(
+        list_message_ids,
+        access_token,
+        FILTERED_SYNC_LIMIT,
+        query=query,
+        label_ids=account.sync_label_ids,
+        units=MESSAGES_LIST_UNITS,
+    )
+    if len(matching) >= FILTERED_SYNC_LIMIT:
+        # Too many to be sure the listing covers every change; fetch them all
+        return message_ids
+    matching_ids = set(matching)
+    return [message_id for message_id in message_ids if message_id in matching_ids]
+
+
+def backfill_account(
+    account: GmailAccount,
+    access_token: str,
+    max_pages: int | None = None,
+    restart: bool = False,
+) -> MailboxBackfill:
+    """Walk the whole mailbox page by page, newest first, checkpointing as it goes.
+
+    Each page is stored before its ``nextPageToken`` is saved, so an interrupted
+    backfill resumes from the last completed page. A page with messages that
+    could not be fetched is not checkpointed, so the next call retries it.
+    ``max_pages`` bounds the amount of work done in one call.
+
+    Messages are listed with the search the backfill was scheduled with. If the
+    account's filter changes mid-walk, checkpoints stop applying and the call
+    returns, leaving the rescheduled walk to the next one.
+    """
+    engine = GmailFetchEngine(account, access_token)
+    backfill, _ = MailboxBackfill.objects.get_or_create(account=account, defaults={
+        'query': account.sync_query,
+        'label_ids': account.sync_label_ids,
+        'filter_version': account.sync_filter_version,
+    })
+    if restart:
+        backfill.page_token = ''
+        backfill.processed = 0
+        backfill.stored = 0
+        backfill.completed_at = None
+        backfill.status = MailboxBackfill.STATUS_PENDING
+        backfill.query = account.sync_query
+        backfill.label_ids = account.sync_label_ids
+        backfill.filter_version = account.sync_filter_version
+    if backfill.status == MailboxBackfill.STATUS_COMPLETE:
+        return backfill
+
+    if backfill.status == MailboxBackfill.STATUS_PENDING:
+        backfill.status = MailboxBackfill.STATUS_RUNNING
+        backfill.started_at = timezone.now()
+        backfill.messages_total = engine.call(
+            get_profile, access_token, units=PROFILE_UNITS,
+        ).get('messagesTotal')
+        backfill.save()
+
+    pages = 0
+    while max_pages is None or pages < max_pages:
+        message_ids, next_page_token = engine.call(
+            list_messages_page,
+            access_token,
+            backfill.page_token or None,
+            max_results=BACKFILL_PAGE_SIZE,
+            query=backfill.query,
+            label_ids=backfill.label_ids,
+            units=MESSAGES_LIST_UNITS,
+        )
+        stored, _, failed = fetch_and_store(account, engine, message_ids)
+        if failed:
+            backfill.stored += stored
+            _save_checkpoint(backfill, ['stored'])
+            break
+
+        backfill.processed += len(message_ids)
+        backfill.stored += stored
+        backfill.page_token = next_page_token or ''
+        if not next_page_token:
+            backfill.status = MailboxBackfill.STATUS_COMPLETE
+            backfill.completed_at = timezone.now()
+        if not _save_checkpoint(backfill, ['processed', 'stored', 'page_token', 'status', 'completed_at']):
+            break
+        pages += 1
+        if backfill.status == MailboxBackfill.STATUS_COMPLETE:
+            break
+
+    classify_new_messages(account, access_token)
+    return backfill
+
+
+def _save_checkpoint(backfill: MailboxBackfill, fields: list[str]) -> bool:
+    # Only while the walk is still the one scheduled for the current filter
+    backfill.updated_at = timezone.now()
+    saved = MailboxBackfill.objects.filter(
+        pk=backfill.pk, filter_version=backfill.filter_version,
+    ).update(**{field: getattr(backfill, field) for field in fields + ['updated_at']})
+    if not saved:
+        backfill.refresh_from_db()
+    return bool(saved)
+
+
+def fetch_and_store(
+    account: GmailAccount,
+    engine: GmailFetchEngine,
+    message_ids: list[str],
+    update_existing: bool = False,
+) -> tuple[int, int, list[str]]:
+    """Download details for ``message_ids`` and store them.
+
+    Messages are requested in the account's ``sync_format``. Unless
+    ``update_existing`` is set, messages already stored are not fetched again.
+    Returns ``(stored, updated, failed_ids)``.
+    """
+    existing_ids = set(
+        EmailMessage.objects.filter(gmail_message_id__in=message_ids)
+        .values_list('gmail_message_id', flat=True)
+    )
+    if not update_existing:
+        message_ids = [message_id for message_id in message_ids if message_id not in existing_ids]
+    message_format = account.sync_format
+    details, failed = engine.fetch_messages(message_ids, params=message_get_params(message_format))
+    stored, updated = store_message_details(
+        account, details, existing_ids, update_existing, message_format,
+    )
+    return stored, updated, failed
+
+
+def store_message_details(
+    account: GmailAccount,
+    details: dict[str, dict],
+    existing_ids: set[str],
+    update_existing: bool = False,
+    message_format: str = MESSAGE_FORMAT_FULL,
+) -> tuple[int, int]:
+    """Write Gmail details as ``EmailMessage`` rows in chunked bulk inserts.
+
+    ``existing_ids`` are the IDs already stored; they are upserted when
+    ``update_existing`` is set and skipped otherwise. Payloads go to the
+    ``EmailPayload`` side table, attachments of full payloads are recorded
+    (not downloaded) and the touched threads are re-summarized.
+    Returns ``(stored, updated)``.
+    """
+    rows = [
+        build_email_message(account, message_id, detail, message_format)
+        for message_id, detail in details.items()
+        if update_existing or message_id not in existing_ids
+    ]
+    if not rows:
+        return 0, 0
+
+    # Only a full-format sync may overwrite a stored payload; a metadata one would drop the body
+    overwrite_payloads = message_format == MESSAGE_FORMAT_FULL
+    with transaction.atomic():
+        if update_existing:
+            EmailMessage.objects.bulk_create(
+                rows,
+                batch_size=STORE_BATCH_SIZE,
+                update_conflicts=True,
+                unique_fields=['gmail_message_id'],
+                update_fields=UPSERT_FIELDS + (FULL_UPSERT_FIELDS if overwrite_payloads else []),
+            )
+        else:
+            # A concurrent sync may have stored some of these since we checked
+            EmailMessage.objects.bulk_create(rows, batch_size=STORE_BATCH_SIZE, ignore_conflicts=True)
+
+        # bulk_create cannot report PKs for conflicting rows, so look them all up at once
+        message_pks = dict(
+            EmailMessage.objects.filter(gmail_message_id__in=[row.gmail_message_id for row in rows])
+            .values_list('gmail_message_id', 'pk')
+        )
+        payloads = {message_pks[row.gmail_message_id]: details[row.gmail_message_id] for row in rows}
+        store_payloads(payloads, overwrite=overwrite_payloads)
+        if overwrite_payloads:
+            record_attachments(payloads)
+        refresh_threads(account, {row.thread_id for row in rows})
+
+    updated = sum(1 for row in rows if row.gmail_message_id in existing_ids)
+    return len(rows) - updated, updated
+
+
+def build_email_message(
+    account: GmailAccount,
+    message_id: str,
+    detail: dict,
+    message_format: str = MESSAGE_FORMAT_FULL,
+) -> EmailMessage:
+    payload = detail.get('payload', {})
+    headers = parse_gmail_headers(payload.get('headers', []))
+    sender = headers.get('from', '')
+    return EmailMessage(
+        account=account,
+        gmail_message_id=message_id,
+        thread_id=detail.get('threadId', ''),
+        subject=headers.get('subject', '')[:255],
+        sender=sender[:255],
+        sender_domain=sender_domain(sender)[:255],
+        snippet=detail.get('snippet', ''),
+        body_text=extract_body_text(payload) if message_format == MESSAGE_FORMAT_FULL else '',
+        received_at=parse_rfc2822_datetime(headers.get('date')),
+        payload_format=message_format,
+    )
+
+
+def store_payloads(payloads: dict[int, dict], overwrite: bool = True) -> list[EmailPayload]:
+    """Compress and write payloads keyed by ``EmailMessage`` PK."""
+    rows = [EmailPayload.from_content(message_pk, content) for message_pk, content in payloads.items()]
+    if overwrite:
+        EmailPayload.objects.bulk_create(
+            rows,
+            batch_size=STORE_BATCH_SIZE,
+            update_conflicts=True,
+            unique_fields=['message'],
+            update_fields=['data', 'size'],
+        )
+    else:
+        EmailPayload.objects.bulk_create(rows, batch_size=STORE_BATCH_SIZE, ignore_conflicts=True)
+    return rows
+
+
+def hydrate_messages(
+    account: GmailAccount,
+    access_token: str,
+    messages: list[EmailMessage],
+) -> list[EmailMessage]:
+    """Fetch and store full payloads for messages synced in metadata format.
+
+    Hydrated payloads are saved, so each body is downloaded at most once.
+    """
+    pending = [message for message in messages if not message.is_hydrated]
+    if not pending:
+        return messages
+
+    engine = GmailFetchEngine(account, access_token)
+    details, _ = engine.fetch_messages(
+        [message.gmail_message_id for message in pending],
+        params=message_get_params(MESSAGE_FORMAT_FULL),
+    )
+    hydrated = [message for message in pending if message.gmail_message_id in details]
+    for message in hydrated:
+        message.payload_format = MESSAGE_FORMAT_FULL
+        message.body_text = extract_body_text(details[message.gmail_message_id].get('payload', {}))
+    with transaction.atomic():
+        contents = {message.pk: details[message.gmail_message_id] for message in hydrated}
+        payloads = store_payloads(contents)
+        record_attachments(contents)
+        EmailMessage.objects.bulk_update(hydrated, FULL_UPSERT_FIELDS, batch_size=STORE_BATCH_SIZE)
+    for message, payload in zip(hydrated, payloads):
+        message.payload = payload
+    return messages
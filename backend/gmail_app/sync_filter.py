@@ -0,0 +1,175 @@
+import re
+from typing import Iterable
+
+from django.db.models import Max
+
+from .jobs import enqueue_job
+from .models import ApplicationMatchKey, GmailAccount, MailboxBackfill, SyncJob
+from .senders import ATS_DOMAINS
+
+# Words and phrases that mark job-search mail, matched anywhere in a message.
+DEFAULT_FILTER_KEYWORDS = [
+    'application', 'applying', 'applied', 'interview', 'recruiter', 'recruiting',
+    'candidate', 'hiring', 'position', 'offer letter', 'job offer', 'phone screen',
+    'assessment',
+]
+FILTER_CATEGORIES = ['promotions', 'social', 'updates', 'forums']
+# Gmail rejects overly long searches; sender domains past this are left to the keywords.
+MAX_QUERY_LENGTH = 1500
+# More tracked domains than this can never fit in a query of MAX_QUERY_LENGTH.
+MAX_TRACKED_DOMAINS = MAX_QUERY_LENGTH // len(' OR from:a.co')
+
+_DOMAIN_RE = re.compile(r'^[a-z0-9-]+(?:\.[a-z0-9-]+)+$')
+
+
+def compile_sync_filter(config: dict, company_domains: Iterable[str] = ()) -> tuple[str, list[str]]:
+    """Build the ``q`` expression and ``labelIds`` that ``messages.list`` is called with.
+
+    A message is kept when it comes from one of the configured, ATS or tracked
+    company domains, or mentions one of the keywords. Returns ``('', [])``,
+    meaning the whole mailbox, unless ``config['enabled']`` is set.
+    """
+    if not config.get('enabled'):
+        return '', []
+
+    keywords = config.get('keywords', DEFAULT_FILTER_KEYWORDS)
+    domains = list(config.get('domains', []))
+    if config.get('include_ats', True):
+        domains += sorted(ATS_DOMAINS)
+    if config.get('include_applications', True):
+        domains += company_domains
+
+    exclusions = ''.join(f' -category:{category}' for category in config.get('exclude_categories', []))
+    terms: dict[str, None] = {}
+    for term in [_keyword_term(keyword) for keyword in keywords] + [_domain_term(domain) for domain in domains]:
+        if not term or term in terms:
+            continue
+        if len(_combine(list(terms) + [term], exclusions)) > MAX_QUERY_LENGTH:
+            break
+        terms[term] = None
+    query = _combine(list(terms), exclusions) if terms else exclusions.strip()
+    return query, sorted(set(config.get('label_ids', [])))
+
+
+def targeted_query(query: str, previous_query: str) -> str | None:
+    """Search matching what ``query`` adds to ``previous_query``, or ``None`` if it adds nothing."""
+    if not previous_query:
+        # Everything was already in scope
+        return None
+    if not query:
+        return f'-({previous_query})'
+    return f'({query}) -({previous_query})'
+
+
+def tracked_company_domains() -> list[str]:
+    """Employer domains of tracked applications, most recently applied first.
+
+    These are the domain match keys kept by ``linking.index_applications``, so
+    they come from one aggregate query rather than a pass over applications.
+    """
+    return list(
+        ApplicationMatchKey.objects.filter(key__contains='.')
+        .values('key')
+        .annotate(last_applied=Max('application__date_applied'), last_id=Max('application_id'))
+        .order_by('-last_applied', '-last_id')
+        .values_list('key', flat=True)[:MAX_TRACKED_DOMAINS]
+    )
+
+
+def refresh_sync_filter(account: GmailAccount, company_domains: list[str] | None = None) -> bool:
+    """Recompile the account's filter; when the result changed, store it and backfill what it adds.
+
+    Returns whether the compiled filter changed.
+    """
+    if company_domains is None:
+        company_domains = tracked_company_domains()
+    query, label_ids = compile_sync_filter(account.sync_filter, company_domains)
+    if query == account.sync_query and label_ids == account.sync_label_ids:
+        return False
+
+    previous_query, previous_label_ids = account.sync_query, account.sync_label_ids
+    account.sync_query = query
+    account.sync_label_ids = label_ids
+    account.sync_filter_version += 1
+    account.save(update_fields=['sync_query', 'sync_label_ids', 'sync_filter_version'])
+    _reschedule_backfill(account, previous_query, previous_label_ids)
+    return True
+
+
+def refresh_sync_filters() -> int:
+    """Refresh every account whose filter follows tracked applications; returns how many changed."""
+    accounts = _accounts_following_applications()
+    if not accounts:
+        return 0
+    company_domains = tracked_company_domains()
+    return sum(refresh_sync_filter(account, company_domains) for account in accounts)
+
+
+def schedule_sync_filter_refresh() -> None:
+    """Queue a filter refresh for every account whose filter follows tracked applications.
+
+    A refresh already waiting to run will see the latest applications, so
+    another one is only queued once it has started.
+    """
+    for account in _accounts_following_applications():
+        queued = SyncJob.objects.filter(
+            account=account,
+            kind=SyncJob.KIND_FILTER_REFRESH,
+            status=SyncJob.STATUS_QUEUED,
+        )
+        if not queued.exists():
+            SyncJob.objects.create(account=account, kind=SyncJob.KIND_FILTER_REFRESH)
+
+
+def _accounts_following_applications() -> list[GmailAccount]:
+    return [
+        account for account in GmailAccount.objects.exclude(sync_filter={})
+        if account.sync_filter.get('enabled') and account.sync_filter.get('include_applications', True)
+    ]
+
+
+def _reschedule_backfill(account: GmailAccount, previous_query: str, previous_label_ids: list[str]) -> None:
+    backfill = MailboxBackfill.objects.filter(account=account).first()
+    if backfill is None or (backfill.status == MailboxBackfill.STATUS_PENDING and not backfill.processed):
+        # Not walked yet: the walk will simply start with the new filter
+        MailboxBackfill.objects.filter(account=account).update(
+            query=account.sync_query,
+            label_ids=account.sync_label_ids,
+            filter_version=account.sync_filter_version,
+        )
+        return
+
+    query = account.sync_query
+    if backfill.status == MailboxBackfill.STATUS_COMPLETE and account.sync_label_ids == previous_label_ids:
+        query = targeted_query(account.sync_query, previous_query)
+        if query is None:
+            return
+    # Otherwise the earlier walk never finished, or labels changed: walk again under the new filter.
+    # Messages already stored are skipped, so this costs list calls rather than downloads.
+    MailboxBackfill.objects.filter(pk=backfill.pk).update(
+        status=MailboxBackfill.STATUS_PENDING,
+        page_token='',
+        processed=0,
+        stored=0,
+        completed_at=None,
+        query=query,
+        label_ids=account.sync_label_ids,
+        filter_version=account.sync_filter_version,
+    )
+    enqueue_job(account, SyncJob.KIND_BACKFILL)
+
+
+def _keyword_term(keyword: str) -> str:
+    keyword = ' '.join(keyword.replace('"', ' ').split())
+    if not keyword:
+        return ''
+    return f'"{keyword}"' if ' ' in keyword else keyword
+
+
+def _domain_term(domain: str) -> str:
+    domain = domain.strip().lower().lstrip('@')
+    return f'from:{domain}' if _DOMAIN_RE.match(domain) else ''
+
+
+def _combine(terms: list[str], exclusions: str) -> str:
+    return f'({" OR ".join(terms)}){exclusions}'
@@ -1,3 +1,799 @@
-from django.test import TestCase
+import base64
+import io
+import json
+import tempfile
+import threading
+import zlib
+from datetime import timedelta
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from urllib3.connection import HTTPConnection
+
+from applications.models import JobApplication
+
+from .classifier import classify_message, classify_new_messages
+from .fake_gmail import FAKE_ACCESS_TOKEN, FaultConfig, build_server
+from .fetch_engine import AdaptiveLimiter, GmailFetchEngine, TokenBucket, set_quota_rate
+from .gmail_client import BODY_TEXT_MAX_CHARS, batch_get_messages, extract_body_text, get_http_session, get_profile
+from .jobs import claim_next_job, run_job
+from .attachments import attachment_root
+from .models import EmailAttachment, EmailMessage, EmailPayload, EmailThread, GmailAccount, JobApplicationEmail, MailboxBackfill, SyncJob
+from .scheduler import MAX_SYNC_INTERVAL_SECONDS, MIN_SYNC_INTERVAL_SECONDS, record_sync_result, schedule_due_accounts
+from .search import search_messages
+from .sync import _save_checkpoint, backfill_account, sync_account
+from .sync_filter import refresh_sync_filter, tracked_company_domains
+from .tokens import get_access_token, invalidate_access_token
+
+
+def create_account(email='me@example.com'):
+    user = get_user_model().objects.create_user(username=email)
+    return GmailAccount.objects.create(
+        user=user,
+        email=email,
+        access_token=FAKE_ACCESS_TOKEN,
+        token_expiry=timezone.now() + timedelta(hours=1),
+    )
+
+
+class FakeGmailTestCase(TestCase):
+    """Runs each test against a local fake Gmail server holding ``mailbox_size`` messages."""
+
+    mailbox_size = 250
+    faults = None
+    seed = 0
+
+    def setUp(self):
+        self.server = build_server(messages=self.mailbox_size, faults=self.faults, seed=self.seed)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        overrides = self.settings(**self.server.setting_overrides())
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        self.account = create_account(self.server.mailbox.email)
+        # Gmail's per-user quota would only slow the fake server down
+        set_quota_rate(self.account.pk, 1_000_000)
+
+
+class BackfillCommandTests(FakeGmailTestCase):
+    def backfill(self, *args):
+        out, err = io.StringIO(), io.StringIO()
+        call_command('backfill_gmail', *args, stdout=out, stderr=err)
+        return out.getvalue(), err.getvalue()
+
+    def test_max_pages_stops_and_the_next_run_resumes(self):
+        out, _ = self.backfill('--max-pages', '1')
+        self.assertIn('stopped after --max-pages', out)
+        self.assertEqual(MailboxBackfill.objects.get(account=self.account).processed, 100)
+
+        out, _ = self.backfill()
+        self.assertIn('backfill complete', out)
+        self.assertEqual(EmailMessage.objects.filter(account=self.account).count(), 250)
+
+    def test_stalled_backfill_gives_up(self):
+        stuck = MailboxBackfill(
+            account=self.account, status=MailboxBackfill.STATUS_RUNNING, page_token='100', processed=100,
+        )
+        with mock.patch('gmail_app.management.commands.backfill_gmail.backfill_account', return_value=stuck) as step:
+            _, err = self.backfill()
+        self.assertIn('backfill stalled', err)
+        # The first call sets the checkpoint, then MAX_STALLED_STEPS more fail to move it
+        self.assertEqual(step.call_count, 4)
+
+
+class BenchmarkCommandTests(FakeGmailTestCase):
+    mailbox_size = 60
+    # With seed 1 the server's first answer, to the profile call, is an injected 503
+    faults = FaultConfig(error_rate=0.1, throttle_rate=0.1)
+    seed = 1
+
+    def test_benchmark_retries_injected_faults(self):
+        out = io.StringIO()
+        with mock.patch('gmail_app.fetch_engine.backoff_delay', return_value=0):
+            call_command(
+                'benchmark_gmail_sync', '--server', self.server.base_url, '--rounds', '2', '--new-per-round', '5',
+                stdout=out,
+            )
+        self.assertIn('Incremental sync: 2 rounds', out.getvalue())
+        self.assertGreater(self.server.stats['errors'] + self.server.stats['throttled'], 0)
+
+
+class FetchEmailsViewTests(TestCase):
+    def test_fetch_queues_a_sync_job(self):
+        account = create_account()
+        session = self.client.session
+        session['gmail_account_id'] = account.pk
+        session.save()
+
+        with mock.patch('gmail_app.sync.sync_account') as sync:
+            response = self.client.get(reverse('gmail:fetch-emails'))
+        sync.assert_not_called()
+        job = SyncJob.objects.get(account=account)
+        self.assertEqual((job.kind, job.status), (SyncJob.KIND_SYNC, SyncJob.STATUS_QUEUED))
+        self.assertRedirects(response, reverse('api-gmail-job-status', args=[job.pk]))
+
+
+def text_part(mime_type, text, charset='utf-8', **extra):
+    data = base64.urlsafe_b64encode(text.encode(charset)).decode().rstrip('=')
+    headers = [{'name': 'Content-Type', 'value': f'{mime_type}; charset="{charset}"'}]
+    return {'mimeType': mime_type, 'headers': headers, 'body': {'data': data}, **extra}
+
+
+class BodyTextTests(TestCase):
+    def test_plain_text_parts_win_over_html(self):
+        payload = {'mimeType': 'multipart/mixed', 'parts': [
+            {'mimeType': 'multipart/alternative', 'parts': [
+                text_part('text/plain', 'Hello  Ana,\r\n\r\n\r\nWe would like to   schedule a call.'),
+                text_part('text/html', '<p>Hello Ana</p>'),
+            ]},
+            text_part('text/plain', 'Not the body', filename='notes.txt'),
+            text_part('text/plain', 'Sent from my phone'),
+        ]}
+        self.assertEqual(
+            extract_body_text(payload),
+            'Hello Ana,\n\nWe would like to schedule a call.\n\nSent from my phone',
+        )
+
+    def test_html_only_messages_are_converted(self):
+        markup = (
+            '<html><head><title>Ignored</title><style>p {color: red}</style></head>'
+            '<body><p>Caf&eacute; &amp; <b>bar</b></p><!-- hidden --><div>Next&nbsp;step</div></body></html>'
+        )
+        self.assertEqual(extract_body_text(text_part('text/html', markup)), 'Café & bar\n\nNext step')
+
+    def test_declared_charsets_are_decoded_and_text_is_capped(self):
+        self.assertEqual(extract_body_text(text_part('text/plain', 'Société', charset='latin-1')), 'Société')
+        unknown = text_part('text/plain', 'Hi')
+        unknown['headers'][0]['value'] = 'text/plain; charset=x-unknown'
+        self.assertEqual(extract_body_text(unknown), 'Hi')
+        long_body = extract_body_text(text_part('text/plain', 'word ' * BODY_TEXT_MAX_CHARS))
+        self.assertEqual(len(long_body), BODY_TEXT_MAX_CHARS)
+
+
+class EmailPaginationTests(TestCase):
+    def setUp(self):
+        self.account = create_account()
+        session = self.client.session
+        session['gmail_account_id'] = self.account.pk
+        session.save()
+
+    def add_message(self, gmail_message_id, received_at, sender='jobs@initech.com'):
+        return EmailMessage.objects.create(
+            account=self.account,
+            gmail_message_id=gmail_message_id,
+            sender=sender,
+            sender_domain=sender.split('@')[1],
+            received_at=received_at,
+        ).pk
+
+    def walk(self, params, on_page=None):
+        ids = []
+        params = dict(params, limit=2)
+        while True:
+            data = self.client.get(reverse('api-gmail-emails'), params).json()
+            ids += [message['id'] for message in data['results']]
+            if on_page:
+                on_page()
+            if not data['next_cursor']:
+                return ids
+            params['cursor'] = data['next_cursor']
+
+    def test_cursor_pages_are_stable_while_mail_arrives(self):
+        now = timezone.now()
+        # Ties on received_at and undated mail are where offset-style paging slips
+        expected = [
+            self.add_message('a', now), self.add_message('b', now), self.add_message('c', now),
+            self.add_message('d', now - timedelta(hours=1)), self.add_message('e', None), self.add_message('f', None),
+        ]
+        expected = sorted(expected[:3], reverse=True) + [expected[3]] + sorted(expected[4:], reverse=True)
+
+        arrivals = iter(range(10))
+        walked = self.walk({}, lambda: self.add_message(f'new{next(arrivals)}', now + timedelta(minutes=1)))
+        self.assertEqual(walked, expected)
+
+    def test_filters_apply_on_every_page(self):
+        now = timezone.now()
+        matching = [
+            self.add_message(str(i), now - timedelta(minutes=i), sender='jobs@initech.com' if i % 2 else 'a@b.com')
+            for i in range(7)
+        ]
+        self.assertEqual(self.walk({'domain': 'initech.com'}), matching[1::2])
+        self.assertEqual(self.client.get(reverse('api-gmail-emails'), {'cursor': 'nope'}).status_code, 400)
+
+
+class BatchGetTests(TestCase):
+    def test_unanswered_and_throttled_messages_are_reported(self):
+        answers = [(200, {'id': 'a'}), (429, {}), (404, {}), (0, {}), (503, {})]
+        with mock.patch('gmail_app.gmail_client.gmail_api_batch_get', return_value=answers):
+            details, failed = batch_get_messages(['a', 'b', 'c', 'd', 'e'], 'token')
+        self.assertEqual(details, {'a': {'id': 'a'}})
+        self.assertEqual(failed, ['b', 'd', 'e'])
+
+
+class HttpSessionTests(FakeGmailTestCase):
+    mailbox_size = 1
+
+    def test_calls_share_one_kept_alive_connection(self):
+        session = get_http_session()
+        self.assertIs(get_http_session(), session)
+        connect = HTTPConnection.connect
+        with mock.patch.object(HTTPConnection, 'connect', autospec=True, side_effect=connect) as connects:
+            for _ in range(3):
+                self.assertEqual(get_profile(FAKE_ACCESS_TOKEN)['messagesTotal'], 1)
+
+        self.assertEqual(connects.call_count, 1)
+        self.assertEqual(self.server.stats['requests'], 3)
+        self.assertIn('gzip', session.headers['Accept-Encoding'])
+
+
+class BatchRequestTests(FakeGmailTestCase):
+    mailbox_size = 5
+
+    def test_batch_returns_each_message_under_its_id(self):
+        mailbox = self.server.mailbox
+        message_ids = [mailbox.message_id(i) for i in range(5)] + ['ffffffffffffffff']
+        details, failed = batch_get_messages(
+            message_ids, FAKE_ACCESS_TOKEN, params={'format': 'metadata'}, batch_size=2,
+        )
+
+        self.assertEqual(failed, [])
+        # The unknown ID gets a 404, like a message deleted since it was listed
+        self.assertEqual(list(details), message_ids[:5])
+        self.assertEqual({message_id: detail['id'] for message_id, detail in details.items()}, {
+            message_id: message_id for message_id in message_ids[:5]
+        })
+        self.assertNotIn('parts', details[message_ids[0]]['payload'])
+        self.assertEqual(self.server.stats['batch_items'], 6)
+
+
+class ThrottledFetchTests(FakeGmailTestCase):
+    mailbox_size = 10
+    faults = FaultConfig(throttle_rate=1)
+
+    def test_messages_still_throttled_after_retries_are_returned_as_failed(self):
+        message_ids = [self.server.mailbox.message_id(i) for i in range(3)]
+        engine = GmailFetchEngine(self.account, FAKE_ACCESS_TOKEN)
+        with mock.patch('gmail_app.fetch_engine.backoff_delay', return_value=0), \
+                self.assertLogs('gmail_app.fetch_engine', 'WARNING'):
+            details, failed = engine.fetch_messages(message_ids)
+        self.assertEqual(details, {})
+        self.assertEqual(failed, message_ids)
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class RateLimitTests(TestCase):
+    def test_bucket_refills_at_its_rate(self):
+        clock = FakeClock()
+        bucket = TokenBucket(10, clock=clock, sleep=clock.sleep)
+
+        bucket.acquire(10)
+        self.assertEqual(clock.sleeps, [])
+        clock.now += 0.3
+        bucket.acquire(3)
+        self.assertEqual(clock.sleeps, [])
+
+        bucket.acquire(5)
+        self.assertEqual(clock.sleeps, [0.5])
+
+        # A drained bucket waits out a full refill; requests never ask for more than it holds
+        bucket.drain()
+        bucket.acquire(50)
+        self.assertEqual(clock.sleeps, [0.5, 1.0])
+
+    def test_limiter_halves_when_throttled_and_regrows(self):
+        limiter = AdaptiveLimiter(8)
+        limiter.record_throttle()
+        self.assertEqual(limiter.limit, 4)
+        limiter.record_throttle()
+        limiter.record_throttle()
+        limiter.record_throttle()
+        self.assertEqual(limiter.limit, 1)
+
+        # Each step up takes as many successes as the current limit
+        for expected in [2, 3, 4]:
+            for _ in range(expected - 1):
+                limiter.record_success()
+            self.assertEqual(limiter.limit, expected)
+        for _ in range(100):
+            limiter.record_success()
+        self.assertEqual(limiter.limit, 8)
+
+
+class HistorySyncTests(FakeGmailTestCase):
+    def sync(self):
+        result = sync_account(self.account, FAKE_ACCESS_TOKEN)
+        self.account.refresh_from_db()
+        return result
+
+    def stored_ids(self):
+        return set(EmailMessage.objects.filter(account=self.account).values_list('gmail_message_id', flat=True))
+
+    def test_incremental_sync_fetches_only_the_delta(self):
+        self.assertEqual(self.sync()['mode'], 'full')
+        self.assertEqual(self.account.history_id, '250')
+
+        self.server.mailbox.add_messages(5)
+        result = self.sync()
+        self.assertEqual((result['mode'], result['fetched'], result['stored']), ('incremental', 5, 5))
+        self.assertEqual(self.account.history_id, '255')
+        self.assertEqual(len(self.stored_ids()), 255)
+
+    def test_expired_history_falls_back_to_full_resync(self):
+        self.account.history_id = '1'
+        self.account.save()
+        with mock.patch('gmail_app.fake_gmail.HISTORY_RETENTION', 10):
+            result = self.sync()
+        self.assertEqual((result['mode'], result['stored']), ('full', 250))
+        self.assertEqual(self.account.history_id, '250')
+
+    def test_filtered_sync_keeps_only_changes_matching_the_filter(self):
+        mailbox = self.server.mailbox
+        self.account.history_id = '240'
+        self.account.sync_query = 'interview'
+        self.account.last_synced_at = timezone.now()
+        self.account.save()
+        # The fake server does not search, so stand in for Gmail's answer to the filter
+        matching = [mailbox.message_id(i) for i in (249, 245, 120)]
+        with mock.patch('gmail_app.sync.list_message_ids', return_value=matching) as listing:
+            result = self.sync()
+
+        self.assertIn('(interview) after:', listing.call_args.kwargs['query'])
+        self.assertEqual((result['mode'], result['fetched']), ('incremental', 2))
+        self.assertEqual(self.stored_ids(), {mailbox.message_id(249), mailbox.message_id(245)})
+        self.assertEqual(self.account.history_id, '250')
+
+
+class SchedulerTests(TestCase):
+    def test_each_due_account_gets_one_turn_most_overdue_first(self):
+        now = timezone.now()
+        never = create_account('never@example.com')
+        overdue = create_account('overdue@example.com')
+        busy = create_account('busy@example.com')
+        later = create_account('later@example.com')
+        GmailAccount.objects.filter(pk=overdue.pk).update(next_sync_at=now - timedelta(minutes=5))
+        GmailAccount.objects.filter(pk=busy.pk).update(next_sync_at=now - timedelta(minutes=10))
+        GmailAccount.objects.filter(pk=later.pk).update(next_sync_at=now + timedelta(minutes=5))
+        SyncJob.objects.create(account=busy, kind=SyncJob.KIND_SYNC)
+
+        jobs = schedule_due_accounts()
+        self.assertEqual([job.account_id for job in jobs], [never.pk, overdue.pk])
+        self.assertEqual(SyncJob.objects.filter(account=busy).count(), 1)
+        for account in (never, overdue, busy):
+            account.refresh_from_db()
+            self.assertGreater(account.next_sync_at, now)
+
+        # Nothing is due again until the interval has passed
+        self.assertEqual(schedule_due_accounts(), [])
+
+    def test_interval_follows_mail_velocity_within_bounds(self):
+        account = create_account()
+        intervals = []
+        for stored in [5, 5, 5, 5, 5, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0, 0]:
+            record_sync_result(account, stored)
+            intervals.append(account.sync_interval_seconds)
+        self.assertEqual(intervals[4], MIN_SYNC_INTERVAL_SECONDS)
+        self.assertEqual(intervals[5], int(MIN_SYNC_INTERVAL_SECONDS * 1.5))
+        self.assertEqual(intervals[-1], MAX_SYNC_INTERVAL_SECONDS)
+        account.refresh_from_db()
+        self.assertEqual(account.next_sync_at, account.last_synced_at + timedelta(seconds=MAX_SYNC_INTERVAL_SECONDS))
+
+
+class ClassifierTests(TestCase):
+    def setUp(self):
+        self.account = create_account()
+
+    def add_message(self, subject):
+        return EmailMessage.objects.create(
+            account=self.account,
+            gmail_message_id=subject,
+            subject=subject,
+            sender='Careers <jobs@initech.com>',
+            sender_domain='initech.com',
+        )
+
+    def test_each_message_is_classified_once(self):
+        self.add_message('Thank you for applying to Initech')
+        last = self.add_message('Interview for the Engineer position')
+        self.assertEqual(classify_new_messages(self.account), 2)
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.classified_through_id, last.pk)
+
+        newest = self.add_message('Your offer letter from Initech')
+        with mock.patch('gmail_app.classifier.classify_message', wraps=classify_message) as classify:
+            self.assertEqual(classify_new_messages(self.account), 1)
+        self.assertEqual(classify.call_count, 1)
+        self.assertEqual(classify.call_args.args[0], newest.subject)
+
+    def test_created_counts_only_inserted_rows(self):
+        self.add_message('Thank you for applying to Initech')
+        classify_new_messages(self.account)
+
+        # Rewinding the watermark reclassifies, but the stored results are kept as they are
+        GmailAccount.objects.filter(pk=self.account.pk).update(classified_through_id=0)
+        self.account.refresh_from_db()
+        self.add_message('Interview for the Engineer position')
+        self.assertEqual(classify_new_messages(self.account), 1)
+        self.assertEqual(JobApplicationEmail.objects.count(), 2)
+
+
+class AttachmentStoreTests(FakeGmailTestCase):
+    # The fake mailbox attaches a file to every tenth message, with the same content every seventy
+    mailbox_size = 71
+
+    def setUp(self):
+        super().setUp()
+        root = tempfile.TemporaryDirectory()
+        self.addCleanup(root.cleanup)
+        overrides = self.settings(GMAIL_ATTACHMENT_ROOT=root.name)
+        overrides.enable()
+        self.addCleanup(overrides.disable)
+        session = self.client.session
+        session['gmail_account_id'] = self.account.pk
+        session.save()
+        self.account.sync_format = GmailAccount.SYNC_FORMAT_FULL
+        self.account.save()
+        sync_account(self.account, FAKE_ACCESS_TOKEN)
+
+    def download(self, index):
+        attachment = EmailAttachment.objects.get(message__gmail_message_id=self.server.mailbox.message_id(index))
+        url = f'/api/gmail/emails/{attachment.message_id}/attachments/{attachment.pk}/'
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        content = b''.join(response.streaming_content)
+        response.close()
+        attachment.refresh_from_db()
+        return attachment, content
+
+    def test_identical_content_is_stored_once(self):
+        self.assertEqual(EmailAttachment.objects.count(), 8)
+        first, first_content = self.download(0)
+        same, same_content = self.download(70)
+        other, _ = self.download(10)
+
+        self.assertEqual(first_content, self.server.mailbox.attachment_data(0))
+        self.assertEqual(same_content, first_content)
+        self.assertEqual(first.sha256, same.sha256)
+        self.assertNotEqual(first.sha256, other.sha256)
+        blobs = [path for path in attachment_root().rglob('*') if path.is_file()]
+        self.assertEqual(len(blobs), 2)
+
+        # A second download is served from the store without asking Gmail
+        requests_before = self.server.stats['requests']
+        self.download(0)
+        self.assertEqual(self.server.stats['requests'], requests_before)
+
+
+class ThreadSummaryTests(FakeGmailTestCase):
+    # The fake mailbox puts every three consecutive messages in one thread
+    mailbox_size = 7
+
+    def test_threads_follow_new_mail(self):
+        mailbox = self.server.mailbox
+        sync_account(self.account, FAKE_ACCESS_TOKEN)
+        threads = {thread.thread_id: thread for thread in EmailThread.objects.filter(account=self.account)}
+        self.assertEqual({thread_id: thread.message_count for thread_id, thread in threads.items()}, {
+            mailbox._thread_id(0): 3, mailbox._thread_id(3): 3, mailbox._thread_id(6): 1,
+        })
+        first = threads[mailbox._thread_id(0)]
+        messages = EmailMessage.objects.filter(thread_id=first.thread_id).order_by('received_at')
+        self.assertEqual(first.first_message_at, messages.first().received_at)
+        self.assertEqual(first.last_message_at, messages.last().received_at)
+        self.assertEqual(first.latest_snippet, messages.last().snippet)
+        self.assertEqual(first.participants, [message.sender for message in messages])
+
+        mailbox.add_messages(2)
+        sync_account(self.account, FAKE_ACCESS_TOKEN)
+        last = EmailThread.objects.get(account=self.account, thread_id=mailbox._thread_id(6))
+        self.assertEqual(last.message_count, 3)
+        # Threads without new mail are not rewritten
+        self.assertEqual(EmailThread.objects.get(pk=first.pk).updated_at, first.updated_at)
+
+        session = self.client.session
+        session['gmail_account_id'] = self.account.pk
+        session.save()
+        listed = self.client.get(reverse('api-gmail-threads')).json()['results']
+        self.assertEqual([thread['id'] for thread in listed][0], last.pk)
+
+
+class PayloadStoreTests(FakeGmailTestCase):
+    mailbox_size = 3
+
+    def test_payloads_are_stored_compressed_and_kept_out_of_lists(self):
+        self.account.sync_format = GmailAccount.SYNC_FORMAT_FULL
+        self.account.save()
+        sync_account(self.account, FAKE_ACCESS_TOKEN)
+
+        mailbox = self.server.mailbox
+        message = EmailMessage.objects.select_related('payload').get(gmail_message_id=mailbox.message_id(0))
+        self.assertEqual(message.raw_payload, mailbox.message(0, 'full', []))
+        self.assertLess(len(message.payload.data), message.payload.size)
+
+        session = self.client.session
+        session['gmail_account_id'] = self.account.pk
+        session.save()
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(len(self.client.get(reverse('api-gmail-emails')).json()['results']), 3)
+        self.assertFalse(any(EmailPayload._meta.db_table in query['sql'] for query in queries))
+
+        # A later metadata sync must not replace the full payload with headers only
+        self.account.sync_format = GmailAccount.SYNC_FORMAT_METADATA
+        self.account.history_id = ''
+        self.account.save()
+        self.assertEqual(sync_account(self.account, FAKE_ACCESS_TOKEN, update_existing=True)['updated'], 3)
+        message = EmailMessage.objects.select_related('payload').get(pk=message.pk)
+        self.assertEqual(message.raw_payload, mailbox.message(0, 'full', []))
+        self.assertTrue(message.is_hydrated)
+
+
+class ClassifierHydrationTests(FakeGmailTestCase):
+    mailbox_size = 14
+
+    def test_only_likely_job_mail_is_hydrated_for_classification(self):
+        self.assertEqual(self.account.sync_format, GmailAccount.SYNC_FORMAT_METADATA)
+        result = sync_account(self.account, FAKE_ACCESS_TOKEN)
+
+        # The fake mailbox cycles through seven kinds of mail; the first four are job mail
+        hydrated = set(
+            EmailMessage.objects.filter(payload_format=GmailAccount.SYNC_FORMAT_FULL)
+            .exclude(body_text='').values_list('gmail_message_id', flat=True)
+        )
+        mailbox = self.server.mailbox
+        self.assertEqual(hydrated, {mailbox.message_id(i) for i in range(14) if i % 7 < 4})
+        self.assertEqual(result['classified'], 8)
+        self.assertEqual(
+            JobApplicationEmail.objects.get(message__gmail_message_id=mailbox.message_id(2)).status,
+            JobApplicationEmail.STATUS_REJECTION,
+        )
+
+
+class TokenRefreshTests(TestCase):
+    def setUp(self):
+        self.account = create_account()
+        self.account.refresh_token = 'refresh'
+        self.account.token_expiry = timezone.now() + timedelta(minutes=1)
+        self.account.save()
+        invalidate_access_token(self.account.pk)
+        self.addCleanup(invalidate_access_token, self.account.pk)
+
+    def test_refresh_is_saved(self):
+        with mock.patch('gmail_app.tokens.refresh_access_token', return_value={'access_token': 'new', 'expires_in': 3600}):
+            self.assertEqual(get_access_token(self.account.pk), 'new')
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.access_token, 'new')
+        self.assertGreater(self.account.token_expiry, timezone.now() + timedelta(minutes=50))
+
+    def test_losing_a_refresh_race_reuses_the_stored_token(self):
+        def refresh_elsewhere_first(refresh_token):
+            # Another process refreshes and saves while this one waits on Google
+            GmailAccount.objects.filter(pk=self.account.pk).update(
+                access_token='theirs', token_expiry=timezone.now() + timedelta(hours=1),
+            )
+            return {'access_token': 'ours', 'expires_in': 3600}
+
+        with mock.patch('gmail_app.tokens.refresh_access_token', side_effect=refresh_elsewhere_first):
+            self.assertEqual(get_access_token(self.account.pk), 'theirs')
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.access_token, 'theirs')
+
+    def test_token_replaced_by_another_process_is_not_served_from_cache(self):
+        with mock.patch('gmail_app.tokens.refresh_access_token', return_value={'access_token': 'new', 'expires_in': 3600}):
+            self.assertEqual(get_access_token(self.account.pk), 'new')
+
+        # E.g. the OAuth callback ran in another worker process, whose cache invalidation never reaches this one
+        GmailAccount.objects.filter(pk=self.account.pk).update(
+            access_token='reauthorized', token_expiry=timezone.now() + timedelta(hours=2),
+        )
+        with mock.patch('gmail_app.tokens.refresh_access_token') as refresh:
+            self.assertEqual(get_access_token(self.account.pk), 'reauthorized')
+            self.assertEqual(get_access_token(self.account.pk), 'reauthorized')
+        refresh.assert_not_called()
+
+
+@skipUnless(connection.vendor == 'sqlite', 'Message search uses SQLite FTS5')
+class MessageSearchTests(TestCase):
+    def test_new_messages_are_searchable(self):
+        account = create_account()
+        message = EmailMessage.objects.create(
+            account=account,
+            gmail_message_id='m1',
+            subject='Interview with Initech',
+            sender='Recruiter <jobs@initech.com>',
+        )
+
+        results, _ = search_messages(account.id, 'initech')
+        self.assertEqual([result.id for result in results], [message.id])
+
+
+class MessageSearchFallbackTests(TestCase):
+    def test_substring_search_without_full_text_index(self):
+        account = create_account()
+        messages = [
+            EmailMessage.objects.create(
+                account=account,
+                gmail_message_id=f'm{i}',
+                subject=subject,
+                sender='Recruiter <jobs@initech.com>',
+                received_at=timezone.now() - timedelta(days=i),
+            )
+            for i, subject in enumerate(['Interview <Tuesday>', 'Interview follow-up', 'Offer'])
+        ]
+
+        with mock.patch('gmail_app.search.search_enabled', return_value=False):
+            first, cursor = search_messages(account.id, 'initech interv', limit=1)
+            second, last_cursor = search_messages(account.id, 'initech interv', cursor=cursor, limit=1)
+        self.assertEqual([message.id for message in first + second], [messages[0].id, messages[1].id])
+        self.assertIsNone(last_cursor)
+        self.assertEqual(first[0].subject_highlight, 'Interview &lt;Tuesday&gt;')
+
+
+class MessageLinkingTests(TestCase):
+    def test_new_application_links_matching_mail(self):
+        self.assertLinksMatchingMail()
+
+    def test_many_new_keys_link_through_one_domain_walk(self):
+        with mock.patch('gmail_app.linking.LINK_KEY_BATCH_SIZE', 1):
+            self.assertLinksMatchingMail()
+
+    def assertLinksMatchingMail(self):
+        account = create_account()
+        messages = {
+            domain: EmailMessage.objects.create(
+                account=account,
+                gmail_message_id=domain,
+                sender=f'Someone <someone@{domain}>',
+                sender_domain=domain,
+            )
+            for domain in ['initech.com', 'initech.co.uk', 'initechnology.com', 'lever.co', 'example.com']
+        }
+
+        application = JobApplication.objects.create(
+            company_name='Initech',
+            position_title='Engineer',
+            contact_email='hr@initech.com',
+        )
+
+        linked = set(EmailMessage.objects.filter(application=application).values_list('sender_domain', flat=True))
+        self.assertEqual(linked, {'initech.com', 'initech.co.uk'})
+        self.assertIsNone(EmailMessage.objects.get(pk=messages['example.com'].pk).application_id)
+
+
+class SyncFilterRefreshTests(TestCase):
+    def setUp(self):
+        self.account = create_account()
+        self.account.sync_filter = {'enabled': True, 'keywords': ['interview'], 'include_ats': False}
+        self.account.save()
+
+    def refresh_jobs(self):
+        return SyncJob.objects.filter(account=self.account, kind=SyncJob.KIND_FILTER_REFRESH)
+
+    def test_domain_changes_queue_one_refresh(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            application = JobApplication.objects.create(
+                company_name='Initech', position_title='Engineer', contact_email='hr@initech.com',
+            )
+        with self.captureOnCommitCallbacks(execute=True):
+            JobApplication.objects.create(company_name='Globex', position_title='Analyst', contact_email='a@globex.com')
+        self.assertEqual(self.refresh_jobs().count(), 1)
+        self.assertEqual(tracked_company_domains(), ['globex.com', 'initech.com'])
+
+        job = claim_next_job('test')
+        run_job(job)
+        self.account.refresh_from_db()
+        self.assertEqual(self.account.sync_query, '(interview OR from:globex.com OR from:initech.com)')
+        self.assertEqual(self.account.sync_filter_version, 1)
+
+        # Edits that leave the contact domain alone queue nothing
+        with self.captureOnCommitCallbacks(execute=True):
+            application.notes = 'Sent a thank-you note'
+            application.save()
+        self.assertFalse(self.refresh_jobs().filter(status=SyncJob.STATUS_QUEUED).exists())
+
+
+class SyncFilterBackfillTests(FakeGmailTestCase):
+    mailbox_size = 150
+
+    def set_keywords(self, *keywords):
+        self.account.sync_filter = {'enabled': True, 'keywords': list(keywords), 'include_ats': False}
+        self.account.save()
+        return refresh_sync_filter(self.account, company_domains=[])
+
+    def test_filter_change_restarts_an_unfinished_walk(self):
+        self.set_keywords('interview')
+        walk = backfill_account(self.account, FAKE_ACCESS_TOKEN, max_pages=1)
+        self.assertEqual((walk.status, walk.processed, walk.query), (MailboxBackfill.STATUS_RUNNING, 100, '(interview)'))
+
+        self.assertTrue(self.set_keywords('interview', 'offer'))
+        restarted = MailboxBackfill.objects.get(account=self.account)
+        self.assertEqual(
+            (restarted.status, restarted.page_token, restarted.processed, restarted.query),
+            (MailboxBackfill.STATUS_PENDING, '', 0, '(interview OR offer)'),
+        )
+        self.assertEqual(restarted.filter_version, self.account.sync_filter_version)
+        self.assertTrue(SyncJob.objects.filter(account=self.account, kind=SyncJob.KIND_BACKFILL).exists())
+
+        # A walker still holding the old version cannot checkpoint over the new walk
+        walk.processed = 200
+        self.assertFalse(_save_checkpoint(walk, ['processed']))
+        self.assertEqual((walk.processed, walk.filter_version), (0, self.account.sync_filter_version))
+
+    def test_broadened_filter_after_a_finished_walk_backfills_only_the_difference(self):
+        self.set_keywords('interview')
+        self.assertEqual(backfill_account(self.account, FAKE_ACCESS_TOKEN).status, MailboxBackfill.STATUS_COMPLETE)
+
+        self.set_keywords('interview', 'offer')
+        self.assertEqual(
+            MailboxBackfill.objects.get(account=self.account).query, '((interview OR offer)) -((interview))',
+        )
+        # Recompiling to the same filter changes nothing
+        self.assertFalse(refresh_sync_filter(self.account, company_domains=[]))
+
+
+@skipUnless(connection.vendor == 'sqlite', 'Message search uses SQLite FTS5')
+class MessageSearchMigrationTests(TransactionTestCase):
+    """The search triggers must survive migrations that remake the message table."""
+
+    def test_triggers_exist_after_sender_domain_rebuild(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate([('gmail_app', '0010_gmailaccount_classified_through')])
+        executor = MigrationExecutor(connection)
+        executor.migrate([('gmail_app', '0011_message_application_links')])
+        try:
+            with connection.cursor() as db:
+                db.execute(
+                    "SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'gmail_app_emailmessage'"
+                )
+                triggers = {row[0] for row in db.fetchall()}
+        finally:
+            executor = MigrationExecutor(connection)
+            executor.migrate(executor.loader.graph.leaf_nodes())
+        self.assertEqual(
+            triggers,
+            {'gmail_app_emailmessage_fts_ai', 'gmail_app_emailmessage_fts_ad', 'gmail_app_emailmessage_fts_au'},
+        )
+
+
+class AttachmentMigrationTests(TransactionTestCase):
+    def test_stored_payloads_are_backfilled_across_batches(self):
+        before = [('gmail_app', '0014_emailmessage_body_text')]
+        executor = MigrationExecutor(connection)
+        executor.migrate(before)
+        old_apps = executor.loader.project_state(before).apps
+        user = old_apps.get_model('auth', 'User').objects.create(username='me@example.com')
+        account = old_apps.get_model('gmail_app', 'GmailAccount').objects.create(user=user, email='me@example.com')
+        EmailMessage = old_apps.get_model('gmail_app', 'EmailMessage')
+        EmailPayload = old_apps.get_model('gmail_app', 'EmailPayload')
+        for index in range(300):
+            message = EmailMessage.objects.create(account=account, gmail_message_id=f'm{index}', payload_format='full')
+            parts = [
+                {'partId': str(part), 'filename': f'{part}.pdf', 'body': {'attachmentId': f'a{index}-{part}', 'size': 10}}
+                for part in range(2)
+            ]
+            raw = json.dumps({'payload': {'mimeType': 'multipart/mixed', 'parts': parts}}).encode('utf-8')
+            EmailPayload.objects.create(message=message, data=zlib.compress(raw), size=len(raw))
+
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+        self.assertEqual(EmailAttachment.objects.count(), 600)
+        self.assertEqual(
+            EmailAttachment.objects.get(message__gmail_message_id='m299', part_id='1').attachment_id, 'a299-1',
+        )
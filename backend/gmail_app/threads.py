@@ -0,0 +1,57 @@
+from .models import EmailMessage, EmailThread, GmailAccount
+
+# Threads recomputed per query.
+THREAD_BATCH_SIZE = 500
+MAX_THREAD_PARTICIPANTS = 20
+
+THREAD_FIELDS = [
+    'subject', 'message_count', 'first_message_at', 'last_message_at',
+    'participants', 'latest_snippet', 'updated_at',
+]
+
+
+def refresh_threads(account: GmailAccount, thread_ids) -> None:
+    """Recompute the summaries of the given threads from their stored messages.
+
+    Only threads touched by a sync are refreshed, each with one read of its own
+    messages, so the cost follows the new mail rather than the mailbox size.
+    """
+    thread_ids = sorted({thread_id for thread_id in thread_ids if thread_id})
+    for i in range(0, len(thread_ids), THREAD_BATCH_SIZE):
+        chunk = thread_ids[i:i + THREAD_BATCH_SIZE]
+        messages = (
+            EmailMessage.objects.filter(account=account, thread_id__in=chunk)
+            .order_by('thread_id', 'received_at', 'id')
+            .values_list('thread_id', 'received_at', 'sender', 'subject', 'snippet')
+        )
+        EmailThread.objects.bulk_create(
+            [
+                EmailThread(account=account, thread_id=thread_id, **summary)
+                for thread_id, summary in summarize_threads(messages).items()
+            ],
+            update_conflicts=True,
+            unique_fields=['account', 'thread_id'],
+            update_fields=THREAD_FIELDS,
+        )
+
+
+def summarize_threads(messages) -> dict[str, dict]:
+    """Fold ``(thread_id, received_at, sender, subject, snippet)`` rows, oldest first, into summaries."""
+    summaries: dict[str, dict] = {}
+    for thread_id, received_at, sender, subject, snippet in messages:
+        summary = summaries.get(thread_id)
+        if summary is None:
+            summary = summaries[thread_id] = {
+                'subject': subject,
+                'message_count': 0,
+                'first_message_at': received_at,
+                'participants': [],
+            }
+        summary['message_count'] += 1
+        summary['first_message_at'] = summary['first_message_at'] or received_at
+        summary['last_message_at'] = received_at
+        summary['latest_snippet'] = snippet
+        participants = summary['participants']
+        if sender and sender not in participants and len(participants) < MAX_THREAD_PARTICIPANTS:
+            participants.append(sender)
+    return summaries
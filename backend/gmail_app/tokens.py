@@ -0,0 +1,106 @@
+import logging
+import threading
+from datetime import datetime, timedelta, timezone
+
+from .gmail_client import compute_expiry, refresh_access_token
+from .models import GmailAccount
+
+logger = logging.getLogger(__name__)
+
+# Refresh this long before expiry so requests never wait on Google for a new token.
+REFRESH_MARGIN = timedelta(minutes=5)
+
+# account id -> (access token, expiry); shared by every request and worker thread in the process,
+# and checked against the stored expiry before use
+_token_cache: dict[int, tuple[str, datetime | None]] = {}
+_refresh_locks: dict[int, threading.Lock] = {}
+_refresh_locks_guard = threading.Lock()
+
+
+def ensure_access_token(account: GmailAccount) -> str:
+    """Return a usable access token for ``account``, refreshing it if needed."""
+    account.access_token = get_access_token(account.pk)
+    return account.access_token
+
+
+def get_access_token(account_id: int) -> str:
+    """Return a cached access token, refreshing it shortly before it expires.
+
+    The cache is per process, so an entry is only reused while its expiry
+    still matches the stored ``token_expiry``; a token replaced by another
+    process or the OAuth callback is picked up on the next call. The
+    per-account lock keeps threads in this process to one refresh at a time.
+    Across processes the refresh call to Google runs outside any transaction
+    and the result is saved only if ``token_expiry`` is still the value that
+    was read; a process that loses that race discards its token and reuses
+    the one the winner stored.
+    """
+    stored_expiry = GmailAccount.objects.filter(pk=account_id).values_list('token_expiry', flat=True).first()
+    cached = _cached_token(account_id, stored_expiry)
+    if cached is not None:
+        return cached
+
+    with _refresh_lock(account_id):
+        account = GmailAccount.objects.get(pk=account_id)
+        cached = _cached_token(account_id, account.token_expiry)
+        if cached is not None:
+            return cached
+
+        if not _is_fresh(account.token_expiry):
+            refreshed = _refresh(account)
+            if refreshed:
+                access_token, token_expiry = refreshed
+                saved = GmailAccount.objects.filter(pk=account_id, token_expiry=account.token_expiry).update(
+                    access_token=access_token, token_expiry=token_expiry,
+                )
+                if saved:
+                    account.access_token, account.token_expiry = access_token, token_expiry
+                else:
+                    account.refresh_from_db(fields=['access_token', 'token_expiry'])
+
+        _token_cache[account_id] = (account.access_token, account.token_expiry)
+        return account.access_token
+
+
+def invalidate_access_token(account_id: int) -> None:
+    """Drop the cached token, e.g. after the OAuth callback stores a new one."""
+    _token_cache.pop(account_id, None)
+
+
+def _refresh(account: GmailAccount) -> tuple[str, datetime | None] | None:
+    """Ask Google for a new token; ``None`` keeps the current one for now."""
+    expired = _is_expired(account.token_expiry)
+    if not account.refresh_token:
+        if expired:
+            raise RuntimeError('Refresh token missing.')
+        return None
+    try:
+        refreshed = refresh_access_token(account.refresh_token)
+    except Exception:
+        if expired:
+            raise
+        # The current token still works; try again on a later request
+        logger.warning('Early token refresh failed for Gmail account %s', account.pk, exc_info=True)
+        return None
+    return refreshed.get('access_token', account.access_token), compute_expiry(refreshed.get('expires_in'))
+
+
+def _cached_token(account_id: int, stored_expiry: datetime | None) -> str | None:
+    """The cached token, if it is still the stored one and not due for refresh."""
+    cached = _token_cache.get(account_id)
+    if cached and cached[1] == stored_expiry and _is_fresh(stored_expiry):
+        return cached[0]
+    return None
+
+
+def _refresh_lock(account_id: int) -> threading.Lock:
+    with _refresh_locks_guard:
+        return _refresh_locks.setdefault(account_id, threading.Lock())
+
+
+def _is_fresh(expiry: datetime | None) -> bool:
+    return expiry is None or expiry - REFRESH_MARGIN > datetime.now(timezone.utc)
+
+
+def _is_expired(expiry: datetime | None) -> bool:
+    return expiry is not None and expiry <= datetime.now(timezone.utc)
@@ -1,27 +1,28 @@
 import secrets
-from datetime import datetime, timezone
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.http import JsonResponse
-from django.shortcuts import render
+from django.shortcuts import redirect, render
 from django.urls import reverse
 from django.views.decorators.http import require_GET
 
+from .filters import EmailMessageFilter
+from .jobs import enqueue_job
 from .gmail_client import (
     build_google_auth_url,
     compute_expiry,
     exchange_code_for_tokens,
-    gmail_api_get,
     get_userinfo,
-    parse_gmail_headers,
-    parse_rfc2822_datetime,
-    refresh_access_token,
 )
-from .models import EmailMessage, GmailAccount
+from .models import EmailMessage, GmailAccount, JobApplicationEmail, SyncJob
+from .pagination import InvalidCursorError, paginate_by_recency
+from .tokens import invalidate_access_token
 
 User = get_user_model()
 
+EMAIL_PAGE_SIZE = 25
+
 
 @require_GET
 def google_login(request):
@@ -69,6 +70,7 @@ def google_callback(request):
     account.token_expiry = compute_expiry(expires_in)
     account.scope = token_data.get('scope', account.scope)
     account.save(update_fields=['access_token', 'refresh_token', 'token_expiry', 'scope'])
+    invalidate_access_token(account.id)
 
     request.session['gmail_account_id'] = account.id
     return render(
@@ -78,19 +80,9 @@ def google_callback(request):
     )
 
 
-def _ensure_access_token(account: GmailAccount) -> str:
-    if account.token_expiry and account.token_expiry <= datetime.now(timezone.utc):
-        if not account.refresh_token:
-            raise RuntimeError('Refresh token missing.')
-        refreshed = refresh_access_token(account.refresh_token)
-        account.access_token = refreshed.get('access_token', account.access_token)
-        account.token_expiry = compute_expiry(refreshed.get('expires_in'))
-        account.save(update_fields=['access_token', 'token_expiry'])
-    return account.access_token
-
-
 @require_GET
 def fetch_emails(request):
+    """Queue a sync and redirect to its job, which the page polls until the worker finishes."""
     account_id = request.session.get('gmail_account_id')
     if not account_id:
         return JsonResponse({'error': 'Not authenticated with Gmail.'}, status=401)
@@ -99,60 +91,8 @@ def fetch_emails(request):
     if not account:
         return JsonResponse({'error': 'Account not found.'}, status=404)
 
-    access_token = _ensure_access_token(account)
-    list_response = gmail_api_get(
-        'https://gmail.googleapis.com/gmail/v1/users/me/messages',
-        access_token,
-        params={'maxResults': 100},
-    )
-    messages = list_response.get('messages', [])
-
-    stored = 0
-    for message in messages:
-        message_id = message.get('id')
-        if not message_id:
-            continue
-        detail = gmail_api_get(
-            f'https://gmail.googleapis.com/gmail/v1/users/me/messages/{message_id}',
-            access_token,
-            params={'format': 'full'},
-        )
-        payload = detail.get('payload', {})
-        headers = parse_gmail_headers(payload.get('headers', []))
-        subject = headers.get('subject', '')
-        sender = headers.get('from', '')
-        received_at = parse_rfc2822_datetime(headers.get('date'))
-        existing = EmailMessage.objects.filter(gmail_message_id=message_id).first()
-        if existing:
-            needs_update = False
-            if subject and existing.subject != subject:
-                existing.subject = subject
-                needs_update = True
-            if sender and existing.sender != sender:
-                existing.sender = sender
-                needs_update = True
-            if received_at and existing.received_at != received_at:
-                existing.received_at = received_at
-                needs_update = True
-            if needs_update:
-                existing.snippet = detail.get('snippet', existing.snippet)
-                existing.raw_payload = detail
-                existing.save(update_fields=['subject', 'sender', 'received_at', 'snippet', 'raw_payload'])
-            continue
-
-        EmailMessage.objects.create(
-            account=account,
-            gmail_message_id=message_id,
-            thread_id=detail.get('threadId', ''),
-            subject=subject,
-            sender=sender,
-            snippet=detail.get('snippet', ''),
-            received_at=received_at,
-            raw_payload=detail,
-        )
-        stored += 1
-
-    return JsonResponse({'fetched': len(messages), 'stored': stored})
+    job = enqueue_job(account, SyncJob.KIND_SYNC)
+    return redirect('api-gmail-job-status', pk=job.pk)
 
 
 @require_GET
@@ -165,8 +105,33 @@ def email_list_page(request):
     if not account:
         return render(request, 'gmail_app/login_required.html', status=404)
 
-    messages = EmailMessage.objects.filter(account=account).order_by('-received_at')[:5]
-    return render(request, 'gmail_app/email_list.html', {'messages': messages})
+    filterset = EmailMessageFilter(
+        request.GET,
+        queryset=EmailMessage.objects.filter(account=account).defer('body_text'),
+    )
+    messages, next_cursor = [], None
+    if filterset.is_valid():
+        try:
+            messages, next_cursor = paginate_by_recency(
+                filterset.qs, 'received_at', request.GET.get('cursor'), EMAIL_PAGE_SIZE,
+            )
+        except InvalidCursorError:
+            return redirect('gmail:email-list-page')
+
+    query = request.GET.copy()
+    query.pop('cursor', None)
+    first_query = query.urlencode()
+    next_query = None
+    if next_cursor:
+        query['cursor'] = next_cursor
+        next_query = query.urlencode()
+    return render(request, 'gmail_app/email_list.html', {
+        'messages': messages,
+        'filter': filterset,
+        'status_choices': JobApplicationEmail.STATUS_CHOICES,
+        'first_query': first_query,
+        'next_query': next_query,
+    })
 
 
 
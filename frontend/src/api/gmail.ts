@@ -1,10 +1,20 @@
-import { useQuery, useMutation, useQueryClient } from '@tanstack/react-query';
+import { useQuery, useInfiniteQuery, useMutation, useQueryClient } from '@tanstack/react-query';
 import { apiClient } from './client';
-import type { GmailStatus, EmailMessage } from '@/types';
+import type {
+  CursorPage,
+  EmailFilters,
+  EmailMessage,
+  EmailSearchResult,
+  EmailThread,
+  GmailStatus,
+  GmailSyncJob,
+} from '@/types';
 
 export const GMAIL_QUERY_KEYS = {
   status: ['gmail', 'status'] as const,
   emails: ['gmail', 'emails'] as const,
+  threads: ['gmail', 'threads'] as const,
+  search: (query: string) => ['gmail', 'emails', 'search', query] as const,
 };
 
 // Check Gmail connection status
@@ -18,30 +28,79 @@ export function useGmailStatus() {
   });
 }
 
-// Get fetched emails
-export function useGmailEmails() {
-  return useQuery({
-    queryKey: GMAIL_QUERY_KEYS.emails,
-    queryFn: async () => {
-      const { data } = await apiClient.get<EmailMessage[]>('/gmail/emails/');
+// Get fetched emails, newest first; fetchNextPage loads older ones
+export function useGmailEmails(filters: EmailFilters = {}) {
+  return useInfiniteQuery({
+    queryKey: [...GMAIL_QUERY_KEYS.emails, filters],
+    queryFn: async ({ pageParam }) => {
+      const { data } = await apiClient.get<CursorPage<EmailMessage>>('/gmail/emails/', {
+        params: { ...filters, cursor: pageParam || undefined },
+      });
+      return data;
+    },
+    initialPageParam: '',
+    getNextPageParam: (lastPage) => lastPage.next_cursor,
+  });
+}
+
+// Get conversations, most recently active first
+export function useGmailThreads() {
+  return useInfiniteQuery({
+    queryKey: GMAIL_QUERY_KEYS.threads,
+    queryFn: async ({ pageParam }) => {
+      const { data } = await apiClient.get<CursorPage<EmailThread>>('/gmail/threads/', {
+        params: { cursor: pageParam || undefined },
+      });
+      return data;
+    },
+    initialPageParam: '',
+    getNextPageParam: (lastPage) => lastPage.next_cursor,
+  });
+}
+
+// Search fetched emails, ranked by relevance; fetchNextPage follows the cursor
+export function useSearchEmails(query: string) {
+  return useInfiniteQuery({
+    queryKey: GMAIL_QUERY_KEYS.search(query),
+    queryFn: async ({ pageParam }) => {
+      const { data } = await apiClient.get<CursorPage<EmailSearchResult>>('/gmail/emails/search/', {
+        params: { q: query, cursor: pageParam || undefined },
+      });
       return data;
     },
+    initialPageParam: '',
+    getNextPageParam: (lastPage) => lastPage.next_cursor,
+    enabled: query.trim().length > 0,
   });
 }
 
-// Fetch new emails from Gmail
+const JOB_POLL_INTERVAL_MS = 2000;
+
+// Poll a queued sync job until the worker finishes it
+async function waitForSyncJob(job: GmailSyncJob): Promise<GmailSyncJob> {
+  while (job.status === 'queued' || job.status === 'running') {
+    await new Promise((resolve) => setTimeout(resolve, JOB_POLL_INTERVAL_MS));
+    const { data } = await apiClient.get<GmailSyncJob>(`/gmail/jobs/${job.id}/`);
+    job = data;
+  }
+  if (job.status === 'failed') {
+    throw new Error(job.error || 'Sync failed');
+  }
+  return job;
+}
+
+// Fetch new emails from Gmail (runs as a background job)
 export function useFetchEmails() {
   const queryClient = useQueryClient();
 
   return useMutation({
     mutationFn: async () => {
-      const { data } = await apiClient.post<{ fetched: number; stored: number }>(
-        '/gmail/emails/fetch/'
-      );
-      return data;
+      const { data } = await apiClient.post<GmailSyncJob>('/gmail/emails/fetch/');
+      return waitForSyncJob(data);
     },
     onSuccess: () => {
       queryClient.invalidateQueries({ queryKey: GMAIL_QUERY_KEYS.emails });
+      queryClient.invalidateQueries({ queryKey: GMAIL_QUERY_KEYS.threads });
     },
   });
 }
@@ -10,7 +10,14 @@ import { formatDateTime } from '@/utils/date';
 
 export function GmailPage() {
   const { data: status, isLoading: statusLoading } = useGmailStatus();
-  const { data: emails, isLoading: emailsLoading } = useGmailEmails();
+  const {
+    data: emailPages,
+    isLoading: emailsLoading,
+    hasNextPage,
+    fetchNextPage,
+    isFetchingNextPage,
+  } = useGmailEmails();
+  const emails = emailPages?.pages.flatMap((page) => page.results);
   const connectMutation = useGmailConnect();
   const fetchMutation = useFetchEmails();
   const disconnectMutation = useDisconnectGmail();
@@ -146,6 +153,17 @@ export function GmailPage() {
             </tbody>
           </table>
         )}
+        {hasNextPage && (
+          <div className="text-center py-4">
+            <button
+              onClick={() => fetchNextPage()}
+              disabled={isFetchingNextPage}
+              className="btn btn-secondary"
+            >
+              {isFetchingNextPage ? 'Loading...' : 'Load older emails'}
+            </button>
+          </div>
+        )}
       </div>
     </div>
   );
@@ -54,6 +54,7 @@ export interface JobApplication extends JobApplicationListItem {
   resume_version: string;
   cover_letter_sent: boolean;
   application_notes: ApplicationNote[];
+  emails: EmailMessage[];
   created_at: string;
   updated_at: string;
 }
@@ -216,6 +217,51 @@ export interface EmailMessage {
   received_at: string;
 }
 
+export interface EmailThread {
+  id: number;
+  thread_id: string;
+  subject: string;
+  message_count: number;
+  first_message_at: string | null;
+  last_message_at: string | null;
+  participants: string[];
+  latest_snippet: string;
+}
+
+export interface EmailSearchResult extends EmailMessage {
+  subject_highlight: string;
+  snippet_highlight: string;
+}
+
+export interface CursorPage<T> {
+  results: T[];
+  next_cursor: string | null;
+}
+
+export interface EmailFilters {
+  sender?: string;
+  domain?: string;
+  received_after?: string;
+  received_before?: string;
+  status?: 'applied' | 'interview' | 'offer' | 'rejection' | 'other';
+  application?: number;
+}
+
+export interface GmailSyncJob {
+  id: number;
+  kind: 'sync' | 'backfill';
+  status: 'queued' | 'running' | 'succeeded' | 'failed';
+  attempts: number;
+  fetched: number;
+  stored: number;
+  updated: number;
+  failed: number;
+  error: string;
+  created_at: string;
+  started_at: string | null;
+  finished_at: string | null;
+}
+
 export interface GmailStatus {
   connected: boolean;
   account?: GmailAccount;